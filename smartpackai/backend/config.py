@@ -18,6 +18,75 @@ class Settings(BaseSettings):
     
     # Model Paths
     MODEL_PATH: str = os.getenv("MODEL_PATH", "./ml_model/model.pkl")
+    # Report not-ready until the model has loaded and warmed up
+    REQUIRE_MODEL: bool = True
+    # Versioned model directory (see ml_model/registry.py); when set it
+    # takes precedence over MODEL_PATH. A poll interval of 0 disables
+    # watching it for new versions
+    MODEL_REGISTRY_DIR: str = os.getenv("MODEL_REGISTRY_DIR", "")
+    MODEL_REGISTRY_POLL_SECONDS: float = 0.0
+    # Share of predictions re-scored on a shadowed candidate model
+    MODEL_SHADOW_SAMPLE_RATE: float = 0.05
+    # Required in the X-Admin-Token header of /api/admin calls when set
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+    
+    # Packing plan cache (empty path keeps it in memory only)
+    PLAN_CACHE_SIZE: int = 1024
+    PLAN_CACHE_TTL_SECONDS: float = 3600.0
+    PLAN_CACHE_PATH: str = os.getenv("PLAN_CACHE_PATH", "")
+    
+    # SKU dimension store (empty path keeps it in memory only). Records
+    # below the confidence floor are flagged for re-measurement; repeat
+    # measurements within the tolerance (relative, per edge) are merged
+    SKU_STORE_PATH: str = os.getenv("SKU_STORE_PATH", "")
+    SKU_CACHE_SIZE: int = 100000
+    SKU_MIN_CONFIDENCE: float = 0.8
+    SKU_DIMENSION_TOLERANCE: float = 0.1
+    
+    # Worker pools (0 workers means one per CPU)
+    PACKING_POOL_KIND: str = "process"
+    PACKING_POOL_WORKERS: int = 0
+    PACKING_POOL_QUEUE: int = 64
+    PACKING_DEADLINE_MS: float = 10000.0
+    PREDICTION_POOL_WORKERS: int = 4
+    PREDICTION_POOL_QUEUE: int = 256
+    PREDICTION_DEADLINE_MS: float = 2000.0
+    VISION_POOL_WORKERS: int = 2
+    VISION_POOL_QUEUE: int = 16
+    VISION_DEADLINE_MS: float = 5000.0
+    
+    # Server-side measurement (/api/measure)
+    VISION_OBJECTRON_MODEL: str = "Shoe"
+    VISION_CAMERA_DISTANCE_CM: float = 60.0
+    VISION_MAX_FRAMES: int = 30
+    
+    # Micro-batching of single-item predictions: a batch runs once this
+    # many requests wait or the oldest has waited this long
+    BATCH_MAX_SIZE: int = 64
+    BATCH_MAX_WAIT_MS: float = 2.0
+    
+    # Share of a request's deadline_ms given to local search; the rest
+    # covers queueing, plan building and serialization
+    SEARCH_BUDGET_FRACTION: float = 0.8
+    
+    # Orders the bulk endpoint packs at once (0 means twice the packing workers)
+    BULK_MAX_IN_FLIGHT: int = 0
+    
+    # Background jobs (empty path keeps the queue in memory only). 0
+    # workers means one per packing worker; reserved workers only take
+    # jobs at or above the interactive priority
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", "")
+    JOB_WORKERS: int = 0
+    JOB_RESERVED_WORKERS: int = 1
+    JOB_INTERACTIVE_PRIORITY: int = 10
+    JOB_RETENTION_SECONDS: float = 86400.0
+    # Per-order packing deadline in pack jobs; an order that misses it gets an error entry
+    JOB_PACKING_DEADLINE_MS: float = 30000.0
+    
+    # Share of requests written to the structured access log; errors and
+    # requests slower than SLOW_REQUEST_MS are always logged
+    LOG_SAMPLE_RATE: float = 0.01
+    SLOW_REQUEST_MS: float = 1000.0
     
     class Config:
         env_file = ".env"
@@ -1,10 +1,32 @@
 # backend/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, File, Header, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from models.item_schema import ItemInput, BoxOutput, PackingPlan
-from services.box_predictor import predict_box_size
-from services.pack_optimizer import optimize_packing
-from typing import List
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from models.item_schema import (ItemInput, BoxOutput, PackingPlan, SkuMeasurement, SkuRecord,
+                                JobInfo, PackJobRequest, PredictJobRequest, MeasurementResult)
+from services.box_predictor import predict_box_size, predict_box_sizes
+from services.pack_optimizer import optimizer
+from services.carton_splitter import split_into_cartons
+from services.plan_cache import plan_cache, plan_variant
+from services.executor import packing_pool, prediction_pool, vision_pool, PoolSaturated, DeadlineExceeded
+from services.batcher import box_batcher, dimension_batcher
+from services.sku_store import sku_store, records_from_csv, records_from_json, records_to_csv
+from services.streaming import RequestBody
+from services.metrics import metrics, observe_stage, stage, InstrumentedRoute, MetricsMiddleware
+from services.serialization import fast_response, plan_response, COLUMNAR_MEDIA_TYPE
+from services.bulk_packing import bulk_packer, orders_from_csv, orders_from_ndjson, NDJSON_MEDIA_TYPE
+from services.jobs import job_queue, SUCCEEDED, FINISHED
+from services.measurement import (measurement_service, decode_image, read_raw_frames, to_bgr,
+                                  VisionUnavailable, VISION_AVAILABLE)
+from ml_model.predict import predictor as model_predictor
+from ml_model.registry import ModelRegistry
+from ml_model.rollout import ModelRollout
+from typing import Dict, List, Optional
+from config import settings
+import asyncio
+import codecs
+import io
 import logging
 
 app = FastAPI(
@@ -12,6 +34,8 @@ app = FastAPI(
     description="Optimal Packaging Recommendation System",
     version="1.0.0"
 )
+# Time every endpoint so request parsing and serialization show up as stages
+app.router.route_class = InstrumentedRoute
 
 # CORS Configuration
 app.add_middleware(
@@ -20,6 +44,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    MetricsMiddleware,
+    log_sample_rate=settings.LOG_SAMPLE_RATE,
+    slow_request_ms=settings.SLOW_REQUEST_MS
+)
 
 # Configure logging
 logging.basicConfig(
@@ -28,32 +57,461 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+    logger.warning(f"Rejected {request.url.path}: {str(exc)}")
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    logger.warning(f"Timed out {request.url.path}: {str(exc)}")
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+model_rollout = ModelRollout(
+    model_predictor,
+    ModelRegistry(settings.MODEL_REGISTRY_DIR) if settings.MODEL_REGISTRY_DIR else None,
+    shadow_sample_rate=settings.MODEL_SHADOW_SAMPLE_RATE
+)
+
+DEADLINE_QUERY = Query(None, gt=0, description="Give up after this many ms (defaults per endpoint)")
+COMPACT_QUERY = Query(False, description="Report blocks of identical units instead of one entry per unit")
+# Bytes of an upload read per step while streaming it into a parser
+IMPORT_CHUNK = 64 * 1024
+
 @app.post("/api/predict-box", response_model=BoxOutput)
-async def predict_box(item: ItemInput):
+async def predict_box(item: ItemInput, deadline_ms: Optional[float] = DEADLINE_QUERY):
     """
     Predict optimal box size for given item dimensions
     """
     try:
-        logger.info(f"Received box prediction request for item: {item}")
-        box = predict_box_size(item)
+        # Concurrent requests share one vectorized prediction
+        box = await box_batcher.submit(item, deadline_ms=deadline_ms)
         return box
+    except (PoolSaturated, DeadlineExceeded):
+        raise
     except Exception as e:
         logger.error(f"Box prediction failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/optimize-pack", response_model=PackingPlan)
-async def optimize_pack(items: List[ItemInput], box: BoxOutput):
+@app.post("/api/predict-box/batch", response_model=List[BoxOutput])
+async def predict_box_batch(items: List[ItemInput], deadline_ms: Optional[float] = DEADLINE_QUERY):
+    """
+    Predict optimal box sizes for a wave of items in one request
+    """
+    try:
+        boxes = await prediction_pool.run(predict_box_sizes, items, deadline_ms=deadline_ms)
+        return fast_response(boxes)
+    except (PoolSaturated, DeadlineExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"Batch box prediction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/predict-dimensions")
+async def predict_dimensions(item: ItemInput, deadline_ms: Optional[float] = DEADLINE_QUERY) -> Dict:
+    """
+    Predict box dimensions with the trained model
+    """
+    try:
+        result = await dimension_batcher.submit(item, deadline_ms=deadline_ms)
+    except (PoolSaturated, DeadlineExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"Model prediction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if result["status"] != "success":
+        raise HTTPException(status_code=503, detail=f"Model unavailable: {result['message']}")
+    return result
+
+@app.post("/api/measure", response_model=MeasurementResult)
+async def measure_item(
+    request: Request,
+    reference_type: str = Query("a4", regex="^(a4|credit_card)$", description="Reference object in view"),
+    distance_cm: Optional[float] = Query(None, gt=0, description="Camera to packing surface in cm"),
+    width: Optional[int] = Query(None, gt=0, description="Frame width of raw frames"),
+    height: Optional[int] = Query(None, gt=0, description="Frame height of raw frames"),
+    pixel_format: str = Query("bgr24", regex="^(bgr24|rgb24)$", description="Channel order of raw frames"),
+    weight: Optional[float] = Query(None, gt=0, description="Item weight in kg, e.g. from the station scale"),
+    sku: Optional[str] = Query(None, min_length=1, description="Store the measurement for this SKU (needs weight)"),
+    deadline_ms: Optional[float] = DEADLINE_QUERY
+):
+    """
+    Measure an item in camera frames. Send a JPEG/PNG body, a multipart
+    upload of one or more images, or application/octet-stream with
+    back-to-back raw frames plus width and height. Several frames are
+    fused into one estimate.
+    """
+    if sku and weight is None:
+        raise HTTPException(status_code=400, detail="Storing a SKU measurement needs its weight")
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        buffers = [await value.read() for _, value in form.multi_items() if hasattr(value, "read")]
+        decode = lambda: [decode_image(buffer) for buffer in buffers]
+        count = len(buffers)
+    elif content_type.startswith("application/octet-stream"):
+        if not width or not height:
+            raise HTTPException(status_code=400, detail="Raw frames need width and height")
+        try:
+            frames = await read_raw_frames(request.stream(), width, height, measurement_service.max_frames)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        decode = lambda: to_bgr(frames, pixel_format)
+        count = len(frames)
+    else:
+        body = await request.body()
+        decode = lambda: [decode_image(body)]
+        count = 1 if body else 0
+    if count == 0:
+        raise HTTPException(status_code=400, detail="No frames received")
+    if count > measurement_service.max_frames:
+        raise HTTPException(status_code=400, detail=f"Send at most {measurement_service.max_frames} frames")
+
+    try:
+        result = await measurement_service.measure(decode, reference_type, distance_cm, deadline_ms=deadline_ms)
+    except VisionUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (PoolSaturated, DeadlineExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"Measurement failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    for name, seconds in result["timings"].items():
+        observe_stage(f"measure_{name}", seconds)
+
+    estimate = result["estimate"]
+    if estimate is None:
+        raise HTTPException(status_code=422, detail=(
+            f"Could not measure the item: reference found in {result['references_found']}/{result['frames']} "
+            f"frames, object in {result['objects_found']}/{result['frames']}"
+        ))
+    length, width_cm, height_cm = estimate.dimensions
+    measured = MeasurementResult(
+        length=length,
+        width=width_cm,
+        height=height_cm,
+        confidence=estimate.confidence,
+        stable=estimate.stable,
+        frames=result["frames"],
+        frames_measured=estimate.frames,
+        timings_ms={name: round(seconds * 1000, 3) for name, seconds in result["timings"].items()}
+    )
+    if weight is not None:
+        measured.item = ItemInput(length=length, width=width_cm, height=height_cm, weight=weight)
+    if sku:
+        measurement = SkuMeasurement(length=length, width=width_cm, height=height_cm, weight=weight,
+                                     confidence=estimate.confidence, source="vision")
+        try:
+            measured.sku = await prediction_pool.run(sku_store.record_measurement, sku, measurement,
+                                                     deadline_ms=deadline_ms)
+        except (PoolSaturated, DeadlineExceeded):
+            raise
+        except Exception as e:
+            logger.error(f"Storing SKU measurement failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+    return measured
+
+PLAN_RESPONSES = {200: {"content": {COLUMNAR_MEDIA_TYPE: {}},
+                        "description": f"Send Accept: {COLUMNAR_MEDIA_TYPE} for parallel arrays instead of objects"}}
+
+@app.post("/api/optimize-pack", response_model=PackingPlan, responses=PLAN_RESPONSES)
+async def optimize_pack(items: List[ItemInput], box: BoxOutput, request: Request,
+                        deadline_ms: Optional[float] = DEADLINE_QUERY, compact: bool = COMPACT_QUERY):
     """
     Optimize packing arrangement for items in given box
     """
     try:
-        logger.info(f"Received packing optimization request for {len(items)} items")
-        plan = optimize_packing(items, box)
-        return plan
+        # deadline_ms doubles as the anytime search budget; without it the
+        # greedy plan is returned straight away
+        budget_ms = deadline_ms * settings.SEARCH_BUDGET_FRACTION if deadline_ms else None
+        async def pack():
+            with stage("pack"):
+                return await packing_pool.run(optimizer.optimize, items, box, budget_ms,
+                                              compact=compact, deadline_ms=deadline_ms)
+
+        plan = await plan_cache.get_or_compute_async(items, box, pack, variant=plan_variant(deadline_ms, compact))
+        return plan_response(plan, request.headers.get("accept"))
+    except (PoolSaturated, DeadlineExceeded):
+        raise
     except Exception as e:
         logger.error(f"Packing optimization failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/optimize-pack/multi", response_model=List[PackingPlan], responses=PLAN_RESPONSES)
+async def optimize_multi_pack(
+    items: List[ItemInput],
+    request: Request,
+    objective: str = Query("count", regex="^(count|volume)$", description="Minimize carton count or total volume"),
+    deadline_ms: Optional[float] = DEADLINE_QUERY,
+    compact: bool = COMPACT_QUERY
+):
+    """
+    Split an order across multiple standard boxes and plan each one
+    """
+    try:
+        with stage("pack"):
+            plans = await packing_pool.run(split_into_cartons, items, objective, compact, deadline_ms=deadline_ms)
+        return plan_response(plans, request.headers.get("accept"))
+    except (PoolSaturated, DeadlineExceeded):
+        raise
+    except ValueError as e:
+        # Nothing in the order fits a standard box
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Multi-carton packing failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/optimize-pack/bulk")
+async def optimize_pack_bulk(
+    file: UploadFile = File(..., description="Orders as CSV (one row per order line) or NDJSON (one order per line)"),
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$", description="Defaults to the file's extension"),
+    deadline_ms: Optional[float] = Query(None, gt=0, description="Give up on an order after this many ms"),
+    compact: bool = COMPACT_QUERY
+):
+    """
+    Pack a file of orders, streaming one NDJSON result line per order as it
+    finishes and a throughput summary line at the end
+    """
+    if format is None:
+        name = (file.filename or "").lower()
+        format = "csv" if name.endswith(".csv") or file.content_type == "text/csv" else "ndjson"
+    # The upload is spooled to disk by the form parser; read it line by line
+    lines = codecs.iterdecode(file.file, "utf-8-sig")
+    orders = orders_from_csv(lines) if format == "csv" else orders_from_ndjson(lines)
+    return StreamingResponse(bulk_packer.stream(orders, compact=compact, deadline_ms=deadline_ms),
+                             media_type=NDJSON_MEDIA_TYPE)
+
+# Job handlers that only touch the SQLite job store are plain functions,
+# so FastAPI runs them in its thread pool instead of on the event loop
+@app.post("/api/jobs/pack", response_model=JobInfo, status_code=202)
+def submit_pack_job(job: PackJobRequest):
+    """
+    Queue orders for packing; poll /api/jobs/{job_id} for progress
+    """
+    return job_queue.submit("pack", job, priority=job.priority, total=len(job.orders))
+
+@app.post("/api/jobs/predict-box", response_model=JobInfo, status_code=202)
+def submit_predict_job(job: PredictJobRequest):
+    """
+    Queue box recommendations for a list of items
+    """
+    return job_queue.submit("predict-box", job, priority=job.priority, total=len(job.items))
+
+@app.get("/api/jobs/stats")
+def job_stats():
+    return job_queue.stats()
+
+@app.get("/api/jobs/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=60, description="Seconds to wait for the job to finish")):
+    """
+    Status and progress of a job; with wait, returns as soon as it finishes
+    """
+    job = await job_queue.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+@app.get("/api/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """Result of a succeeded job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=job.error or f"Job is {job.status}")
+    return Response(content=job_queue.result(job_id), media_type="application/json")
+
+@app.delete("/api/jobs/{job_id}", response_model=JobInfo)
+def cancel_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job.status in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+    return job_queue.cancel(job_id)
+
+@app.get("/api/skus")
+async def export_skus():
+    """Download every stored SKU as CSV"""
+    return StreamingResponse(records_to_csv(sku_store.export_records()), media_type="text/csv",
+                             headers={"Content-Disposition": 'attachment; filename="skus.csv"'})
+
+@app.post("/api/skus")
+async def import_skus(request: Request):
+    """
+    Bulk import SKUs from a CSV body (text/csv) or a JSON list of records
+
+    The body is parsed on a worker thread as it arrives, so records are
+    written in batches without ever holding the whole upload in memory.
+    """
+    body = io.BufferedReader(RequestBody(request.stream(), asyncio.get_running_loop()), IMPORT_CHUNK)
+    if "json" in request.headers.get("content-type", ""):
+        chunks = iter(lambda: body.read(IMPORT_CHUNK), b"")
+        records = records_from_json(codecs.iterdecode(chunks, "utf-8-sig"))
+    else:
+        records = records_from_csv(codecs.iterdecode(body, "utf-8-sig"))
+    try:
+        count = await run_in_threadpool(sku_store.import_records, records)
+    except (ValueError, TypeError, KeyError) as e:
+        logger.error(f"SKU import failed: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid SKU import: {str(e)}")
+    logger.info(f"Imported {count} SKUs")
+    return {"imported": count}
+
+# SKU lookups and deletes only touch SQLite, so they run on the threadpool as plain functions
+@app.get("/api/skus/{sku}", response_model=SkuRecord)
+def get_sku(sku: str):
+    """Stored dimensions and recommended box of a SKU"""
+    record = sku_store.lookup(sku)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown SKU: {sku}")
+    return record
+
+@app.put("/api/skus/{sku}", response_model=SkuRecord)
+async def record_sku_measurement(sku: str, measurement: SkuMeasurement,
+                                 deadline_ms: Optional[float] = DEADLINE_QUERY):
+    """
+    Store a measurement of a SKU, merging it with earlier ones
+    """
+    try:
+        return await prediction_pool.run(sku_store.record_measurement, sku, measurement, deadline_ms=deadline_ms)
+    except (PoolSaturated, DeadlineExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"Storing SKU measurement failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/api/skus/{sku}", status_code=204)
+def delete_sku(sku: str):
+    if not sku_store.delete(sku):
+        raise HTTPException(status_code=404, detail=f"Unknown SKU: {sku}")
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Packing plan cache hit/miss/eviction counters, plus the SKU store's"""
+    return dict(plan_cache.stats(), sku_store=sku_store.stats())
+
+@app.get("/api/pool/stats")
+async def pool_stats():
+    """Worker pool load, rejection and timeout counters"""
+    return {"packing": packing_pool.stats(), "prediction": prediction_pool.stats(), "vision": vision_pool.stats()}
+
+metrics.callback("smartpack_pool_in_flight", "Tasks running or queued per worker pool",
+                 lambda: {(p.name,): p.in_flight for p in (packing_pool, prediction_pool, vision_pool)}, ("pool",))
+metrics.callback("smartpack_pool_rejected_total", "Tasks rejected because the pool was saturated",
+                 lambda: {(p.name,): p.rejected for p in (packing_pool, prediction_pool, vision_pool)}, ("pool",), kind="counter")
+metrics.callback("smartpack_pool_timed_out_total", "Tasks that missed their deadline",
+                 lambda: {(p.name,): p.timed_out for p in (packing_pool, prediction_pool, vision_pool)}, ("pool",), kind="counter")
+metrics.callback("smartpack_plan_cache_lookups_total", "Packing plan cache lookups by result",
+                 lambda: {("hit",): plan_cache.hits, ("miss",): plan_cache.misses}, ("result",), kind="counter")
+metrics.callback("smartpack_plan_cache_entries", "Cached packing plans", lambda: {(): len(plan_cache)})
+metrics.callback("smartpack_jobs", "Background jobs by status",
+                 lambda: {(status,): n for status, n in job_queue.stats()["jobs"].items()}, ("status",))
+metrics.callback("smartpack_model_ready", "1 once the box-size model is loaded and warmed up",
+                 lambda: {(model_predictor.version or "default",): float(model_predictor.is_ready)}, ("version",))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage and request latency histograms, counters and gauges in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/batching/stats")
+async def batching_stats():
+    """Micro-batch size distribution and queue wait per prediction path"""
+    return {"box": box_batcher.stats(), "dimensions": dimension_batcher.stats()}
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if settings.ADMIN_TOKEN and x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.get("/api/admin/model", dependencies=[Depends(require_admin)])
+async def model_status():
+    """Served model, registry versions and any loading or shadowed candidate"""
+    return dict(model_rollout.status(), model=model_predictor.status())
+
+@app.post("/api/admin/model/load", status_code=202, dependencies=[Depends(require_admin)])
+async def load_model_version(
+    version: Optional[str] = Query(None, description="Registry version (defaults to the registry's current one)"),
+    shadow: bool = Query(False, description="Shadow live traffic instead of swapping in once warm")
+):
+    """
+    Load a model version in the background and swap it in (or shadow it) when warm
+    """
+    try:
+        return model_rollout.start(version, shadow=shadow)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/api/admin/model/promote", dependencies=[Depends(require_admin)])
+async def promote_model():
+    """Swap the shadowed candidate model in"""
+    try:
+        return model_rollout.promote()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/api/admin/model/discard", dependencies=[Depends(require_admin)])
+async def discard_model():
+    """Stop shadowing and drop the candidate model"""
+    return model_rollout.discard()
+
+async def _watch_registry(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            model_rollout.check_registry()
+        except Exception as e:
+            logger.error(f"Model registry check failed: {str(e)}")
+
+@app.on_event("shutdown")
+async def shutdown():
+    watcher = getattr(app.state, "registry_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
+    await job_queue.stop()
+    model_rollout.shutdown()
+    plan_cache.save()
+    packing_pool.shutdown()
+    prediction_pool.shutdown()
+    vision_pool.shutdown()
+
+def _warm_up():
+    """Load the model and exercise each prediction path once"""
+    try:
+        predict_box_size(ItemInput(length=20, width=15, height=10, weight=1.0))
+        model_predictor.warm_up()
+        if VISION_AVAILABLE:
+            # MediaPipe graphs take seconds to build; do it before the first measurement
+            measurement_service.detectors.warm_up()
+    finally:
+        app.state.warmed_up = True
+        logger.info(f"Warm-up finished: {model_predictor.status()}")
+
+@app.on_event("startup")
+async def startup():
+    # Warm up off the event loop so /health answers straight away;
+    # /ready reports when the service can take traffic
+    app.state.warmed_up = False
+    asyncio.get_running_loop().run_in_executor(None, _warm_up)
+    await job_queue.start()
+    if settings.MODEL_REGISTRY_DIR and settings.MODEL_REGISTRY_POLL_SECONDS > 0:
+        app.state.registry_watcher = asyncio.create_task(_watch_registry(settings.MODEL_REGISTRY_POLL_SECONDS))
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until warm-up has finished (and the model loaded, if required)"""
+    model = model_predictor.status()
+    warmed_up = getattr(app.state, "warmed_up", False)
+    ready = warmed_up and (model["ready"] or not settings.REQUIRE_MODEL)
+    content = {"status": "ready" if ready else "not_ready", "warmed_up": warmed_up, "model": model}
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
 @app.get("/health")
 async def health_check():
     """Service health check endpoint"""
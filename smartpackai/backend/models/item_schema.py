@@ -1,6 +1,6 @@
 # backend/models/item_schema.py
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, Dict, List, Optional, Tuple
 
 class ItemInput(BaseModel):
     """Input schema for item dimensions"""
@@ -38,10 +38,97 @@ class PackedItem(BaseModel):
     position: Position
     rotation: Rotation
 
+class PackedBlock(BaseModel):
+    """Grid of identical packed units: counts[0] x counts[1] x counts[2] units
+    starting at origin, unit (i, j, k) at origin + (i, j, k) * pitch"""
+    item: ItemInput
+    origin: Position
+    pitch: Position
+    counts: Tuple[int, int, int]
+    rotation: Rotation
+
+class UtilizationSample(BaseModel):
+    """Best plan quality found by a point in the local search"""
+    elapsed_ms: float = Field(..., ge=0, description="Time since packing started in ms")
+    utilization: float = Field(..., ge=0, le=1, description="0-1 space utilization of the best plan so far")
+    packed_height: float = Field(..., ge=0, description="Height of the tallest stack in cm")
+
 class PackingPlan(BaseModel):
     """Complete packing plan output"""
     box: BoxOutput
     items: List[PackedItem]
+    blocks: List[PackedBlock] = Field([], description="Grouped placements; replaces items in compact plans")
+    unpacked_items: List[ItemInput] = Field(
+        [], description="Units that did not fit in the box (one entry per line with its count in compact plans)"
+    )
     space_utilization: float = Field(..., ge=0, le=1, description="0-1 percentage of space used")
     estimated_cost_saving: float = Field(..., ge=0, description="Estimated shipping cost saving in USD")
-    packing_instructions: List[str] = Field(..., description="Step-by-step packing guide")
\ No newline at end of file
+    packing_instructions: List[str] = Field(..., description="Step-by-step packing guide")
+    placement_time_ms: float = Field(0, ge=0, description="Time spent placing items in ms")
+    search_iterations: int = Field(0, ge=0, description="Local search iterations run within the time budget")
+    utilization_history: List[UtilizationSample] = Field([], description="Improvements found over time")
+    # The engine's placed blocks as arrays (a PlanLayout), for encoders; never serialized
+    _layout: Any = PrivateAttr(None)
+
+class SkuMeasurement(BaseModel):
+    """Measured dimensions of one unit of a SKU"""
+    length: float = Field(..., gt=0, description="Item length in cm")
+    width: float = Field(..., gt=0, description="Item width in cm")
+    height: float = Field(..., gt=0, description="Item height in cm")
+    weight: float = Field(..., gt=0, description="Item weight in kg")
+    fragility: float = Field(0.5, ge=0, le=1, description="Fragility rating (0-1)")
+    is_rotatable: bool = Field(True, description="Can item be rotated for packing?")
+    confidence: float = Field(1.0, ge=0, le=1, description="0-1 confidence in the measurement")
+    source: str = Field("manual", description="Where the measurement came from, e.g. vision or import")
+
+class SkuRecord(SkuMeasurement):
+    """Stored dimensions and recommended carton of a SKU"""
+    sku: str = Field(..., min_length=1, description="Stock keeping unit")
+    box: Optional[BoxOutput] = Field(None, description="Recommended box for one unit")
+    measurements: int = Field(1, ge=1, description="Measurements merged into this record")
+    conflicts: int = Field(0, ge=0, description="Measurements that disagreed with the stored dimensions")
+    updated_at: float = Field(0, ge=0, description="Unix time of the last update")
+    needs_measurement: bool = Field(False, description="Confidence is too low to skip measuring")
+
+class JobOrder(BaseModel):
+    """One order of a packing job; without a box it is split across standard cartons"""
+    order_id: Optional[str] = Field(None, description="Caller's reference, defaults to the position in the job")
+    items: List[ItemInput] = Field(..., min_items=1)
+    box: Optional[BoxOutput] = None
+
+class PackJobRequest(BaseModel):
+    """Orders to pack in the background"""
+    orders: List[JobOrder] = Field(..., min_items=1)
+    compact: bool = Field(False, description="Report blocks of identical units instead of one entry per unit")
+    priority: int = Field(0, description="Higher runs first; packing stations should use the interactive priority")
+
+class PredictJobRequest(BaseModel):
+    """Items to recommend boxes for in the background"""
+    items: List[ItemInput] = Field(..., min_items=1)
+    priority: int = Field(0, description="Higher runs first; packing stations should use the interactive priority")
+
+class JobInfo(BaseModel):
+    """Status and progress of a background job"""
+    id: str
+    kind: str
+    status: str = Field(..., description="queued, running, succeeded, failed or cancelled")
+    priority: int
+    done: int = Field(0, ge=0, description="Work units finished so far")
+    total: int = Field(0, ge=0, description="Work units in the job")
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+class MeasurementResult(BaseModel):
+    """Item dimensions measured from camera frames"""
+    length: float = Field(..., gt=0, description="Item length in cm")
+    width: float = Field(..., gt=0, description="Item width in cm")
+    height: float = Field(..., gt=0, description="Item height in cm")
+    confidence: float = Field(..., ge=0, le=1, description="0-1 chance every dimension is within 2% (0 for one frame)")
+    stable: bool = Field(..., description="Enough agreeing frames were measured to stop scanning")
+    frames: int = Field(..., ge=1, description="Frames received")
+    frames_measured: int = Field(..., ge=1, description="Frames the item was measured in")
+    timings_ms: Dict[str, float] = Field(..., description="Time per stage: queue, decode, reference, detect, estimate")
+    item: Optional[ItemInput] = Field(None, description="Ready for /api/predict-box when a weight was given")
+    sku: Optional[SkuRecord] = Field(None, description="Stored SKU record, when a SKU was given")
\ No newline at end of file
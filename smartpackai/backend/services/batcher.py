@@ -0,0 +1,159 @@
+# backend/services/batcher.py
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+from models.item_schema import ItemInput
+from services.box_predictor import predict_box_sizes
+from services.executor import WorkerPool, DeadlineExceeded, prediction_pool
+from services.metrics import metrics, observe_stage
+from ml_model.predict import predict_box_dimensions_many
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Recent queue waits kept for the percentile figures in stats()
+WAIT_SAMPLES = 2048
+
+BATCH_SIZE = metrics.histogram(
+    "smartpack_batch_size", "Requests per micro-batch", ("batcher",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into one batch call.
+
+    Requests queue for at most ``max_wait_ms`` (or until ``max_batch_size``
+    of them are waiting), then ``batch_fn`` runs once on the pool with the
+    whole list and each caller gets the result at its own position.
+    ``batch_fn`` must return one result per input, in order. An exception
+    from the batch is raised to every caller in it.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]], pool: WorkerPool,
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.pool = pool
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        # Upper bounds of the batch size buckets: 1, 2, 4, ... max_batch_size
+        self.size_buckets = sorted({min(2 ** i, self.max_batch_size)
+                                    for i in range(self.max_batch_size.bit_length() + 1)})
+        self.size_counts = [0] * len(self.size_buckets)
+        self._waits_ms: deque = deque(maxlen=WAIT_SAMPLES)
+        self.total_wait_ms = 0.0
+        self.max_observed_wait_ms = 0.0
+
+    async def submit(self, item: Any, deadline_ms: Optional[float] = None) -> Any:
+        """Queue ``item`` for the next batch and await its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        timeout = (deadline_ms or self.pool.default_deadline_ms) / 1000
+        try:
+            # wait_for cancels the future on timeout, so the batch skips it
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"{self.name} batch result exceeded its {timeout * 1000:.0f} ms deadline")
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = [entry for entry in self._pending if not entry[1].done()]
+        self._pending = []
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            wait_ms = (now - enqueued_at) * 1000
+            observe_stage("batch_queue", wait_ms / 1000)
+            self._waits_ms.append(wait_ms)
+            self.total_wait_ms += wait_ms
+            self.max_observed_wait_ms = max(self.max_observed_wait_ms, wait_ms)
+        self.batches += 1
+        self.items += len(batch)
+        self.size_counts[next(i for i, bound in enumerate(self.size_buckets) if len(batch) <= bound)] += 1
+        BATCH_SIZE.observe(len(batch), batcher=self.name)
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        # Hold a reference until the task finishes so it is not collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        try:
+            results = await self.pool.run(self.batch_fn, [item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} inputs")
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"{self.name} batch of {len(batch)} failed: {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Batch size distribution and queue wait times"""
+        waits = sorted(self._waits_ms)
+
+        def percentile(q: float) -> float:
+            return round(waits[min(len(waits) - 1, int(q * len(waits)))], 3) if waits else 0.0
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self.batches,
+            "items": self.items,
+            "failed_batches": self.failed_batches,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": {str(bound): count for bound, count in zip(self.size_buckets, self.size_counts)},
+            "queue_wait_ms": {
+                "mean": round(self.total_wait_ms / self.items, 3) if self.items else 0.0,
+                "p50": percentile(0.5),
+                "p99": percentile(0.99),
+                "max": round(self.max_observed_wait_ms, 3)
+            }
+        }
+
+
+def _dimension_rows(items: List[ItemInput]) -> List[Dict]:
+    rows = [(i.length, i.width, i.height, i.weight, i.quantity, i.fragility) for i in items]
+    return predict_box_dimensions_many(rows)
+
+
+# One batcher per prediction path, both running their batches on the
+# prediction pool
+box_batcher = MicroBatcher(
+    "box",
+    predict_box_sizes,
+    prediction_pool,
+    max_batch_size=settings.BATCH_MAX_SIZE,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS
+)
+dimension_batcher = MicroBatcher(
+    "dimensions",
+    _dimension_rows,
+    prediction_pool,
+    max_batch_size=settings.BATCH_MAX_SIZE,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS
+)
\ No newline at end of file
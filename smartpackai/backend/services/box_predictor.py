@@ -4,7 +4,9 @@ from sklearn.ensemble import RandomForestRegressor
 import joblib
 import os
 from models.item_schema import ItemInput, BoxOutput
-from typing import Dict
+from ml_model.carton_catalog import catalog as carton_catalog
+from services.metrics import stage
+from typing import Dict, List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,10 +15,8 @@ logger = logging.getLogger(__name__)
 class BoxPredictor:
     def __init__(self):
         self.model = self._load_model()
-        self.standard_boxes = [
-            (20, 15, 10), (25, 20, 15), (30, 25, 20),
-            (40, 30, 20), (50, 40, 30)
-        ]
+        self.catalog = carton_catalog
+        self.standard_boxes = self.catalog.cartons
         self.void_fill_materials = {
             "low": "bubble_wrap",
             "medium": "air_cushions",
@@ -35,44 +35,74 @@ class BoxPredictor:
         fragility_factor = 1 + (item.fragility * 0.3)  # 0-30% extra space
         return base_volume * fragility_factor
 
-    def _select_standard_box(self, predicted_volume: float) -> Dict:
-        """Select closest standard box"""
-        best_box = None
-        best_volume_diff = float('inf')
-        
-        for box in self.standard_boxes:
-            box_volume = box[0] * box[1] * box[2]
-            volume_diff = box_volume - predicted_volume
-            
-            if volume_diff >= 0 and volume_diff < best_volume_diff:
-                best_volume_diff = volume_diff
-                best_box = {
-                    "length": box[0],
-                    "width": box[1],
-                    "height": box[2],
-                    "volume": box_volume
-                }
-        
-        return best_box or {
+    def _select_standard_box(self, predicted_volume: float, item: ItemInput) -> Dict:
+        """Select the smallest standard box that holds one unit and the predicted volume"""
+        box = self.catalog.smallest_fit(
+            (item.length, item.width, item.height), item.is_rotatable, predicted_volume
+        )
+        if box is not None:
+            return {
+                "length": box[0],
+                "width": box[1],
+                "height": box[2],
+                "volume": box[0] * box[1] * box[2]
+            }
+
+        return {
             "length": round(np.sqrt(predicted_volume) * 1.2),
             "width": round(np.sqrt(predicted_volume) * 0.8),
             "height": round(np.sqrt(predicted_volume) * 0.6),
             "volume": predicted_volume
         }
 
+    def _predict_volumes(self, items: np.ndarray) -> np.ndarray:
+        """Vectorized _predict_volume over an (N, 5) array of
+        length, width, height, quantity, fragility"""
+        base_volume = items[:, 0] * items[:, 1] * items[:, 2] * items[:, 3]
+        return base_volume * (1 + items[:, 4] * 0.3)
+
+    def _select_standard_boxes(self, predicted_volumes: np.ndarray, features: np.ndarray,
+                               rotatable: np.ndarray) -> np.ndarray:
+        """Vectorized _select_standard_box; returns (N, 4) length, width, height, volume"""
+        result = np.empty((predicted_volumes.shape[0], 4), dtype=np.float64)
+        result[:, :3] = self.catalog.smallest_fit_many(features[:, :3], rotatable, predicted_volumes)
+        fits = ~np.isnan(result[:, 0])
+        result[fits, 3] = result[fits, :3].prod(axis=1)
+
+        custom = predicted_volumes[~fits]
+        side = np.sqrt(custom)
+        result[~fits, 0] = np.round(side * 1.2)
+        result[~fits, 1] = np.round(side * 0.8)
+        result[~fits, 2] = np.round(side * 0.6)
+        result[~fits, 3] = custom
+        return result
+
+    def select_void_fills(self, fragility: np.ndarray) -> np.ndarray:
+        """Vectorized select_void_fill"""
+        materials = np.array([
+            self.void_fill_materials["low"],
+            self.void_fill_materials["medium"],
+            self.void_fill_materials["high"]
+        ], dtype=object)
+        return materials[np.searchsorted([0.3, 0.7], fragility, side="right")]
+
+    def select_void_fill(self, fragility: float) -> str:
+        """Determine void fill material based on fragility"""
+        if fragility < 0.3:
+            return self.void_fill_materials["low"]
+        elif fragility < 0.7:
+            return self.void_fill_materials["medium"]
+        return self.void_fill_materials["high"]
+
     def predict(self, item: ItemInput) -> BoxOutput:
         """Main prediction method"""
         try:
-            predicted_volume = self._predict_volume(item)
-            box = self._select_standard_box(predicted_volume)
+            with stage("predict_volume"):
+                predicted_volume = self._predict_volume(item)
+            with stage("select_box"):
+                box = self._select_standard_box(predicted_volume, item)
             
-            # Determine void fill material based on fragility
-            if item.fragility < 0.3:
-                void_fill = self.void_fill_materials["low"]
-            elif item.fragility < 0.7:
-                void_fill = self.void_fill_materials["medium"]
-            else:
-                void_fill = self.void_fill_materials["high"]
+            void_fill = self.select_void_fill(item.fragility)
             
             return BoxOutput(
                 length=box["length"],
@@ -86,9 +116,39 @@ class BoxPredictor:
             logger.error(f"Prediction failed: {str(e)}")
             raise
 
+    def predict_batch(self, items: List[ItemInput]) -> List[BoxOutput]:
+        """Predict boxes for a whole wave of items in one vectorized pass"""
+        try:
+            if not items:
+                return []
+            features = np.array(
+                [(i.length, i.width, i.height, i.quantity, i.fragility) for i in items],
+                dtype=np.float64
+            )
+            rotatable = np.array([i.is_rotatable for i in items], dtype=bool)
+            with stage("predict_volume"):
+                volumes = self._predict_volumes(features)
+            with stage("select_box"):
+                boxes = self._select_standard_boxes(volumes, features, rotatable).tolist()
+            void_fills = self.select_void_fills(features[:, 4]).tolist()
+
+            # Fields come from validated inputs, so skip re-validating each output
+            return [
+                BoxOutput.construct(length=l, width=w, height=h, volume=v, recommended_void_fill=fill)
+                for (l, w, h, v), fill in zip(boxes, void_fills)
+            ]
+
+        except Exception as e:
+            logger.error(f"Batch prediction failed: {str(e)}")
+            raise
+
 # Singleton predictor instance
 predictor = BoxPredictor()
 
 def predict_box_size(item: ItemInput) -> BoxOutput:
     """Public interface for box prediction"""
-    return predictor.predict(item)
\ No newline at end of file
+    return predictor.predict(item)
+
+def predict_box_sizes(items: List[ItemInput]) -> List[BoxOutput]:
+    """Public interface for batched box prediction"""
+    return predictor.predict_batch(items)
\ No newline at end of file
@@ -0,0 +1,204 @@
+# backend/services/bulk_packing.py
+from typing import AsyncIterator, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import asyncio
+import csv
+import json
+import time
+from starlette.concurrency import run_in_threadpool
+from models.item_schema import ItemInput, BoxOutput, PackingPlan
+from services.pack_optimizer import optimizer
+from services.carton_splitter import split_into_cartons
+from services.plan_cache import plan_cache, plan_variant
+from services.executor import WorkerPool, packing_pool, PoolSaturated, DeadlineExceeded
+from services.metrics import metrics
+from services.serialization import dumps
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+BOX_COLUMNS = ("box_length", "box_width", "box_height")
+
+BULK_ORDERS = metrics.counter(
+    "smartpack_bulk_orders_total", "Orders packed by the bulk endpoint", ("status",)
+)
+
+
+class BulkOrder(NamedTuple):
+    """One parsed order; ``error`` is set instead of items when it did not parse"""
+    order_id: str
+    items: List[ItemInput]
+    box: Optional[BoxOutput] = None
+    error: Optional[str] = None
+
+
+def _box(length: float, width: float, height: float, void_fill: Optional[str] = None) -> BoxOutput:
+    return BoxOutput(length=length, width=width, height=height, volume=length * width * height,
+                     recommended_void_fill=void_fill or "bubble_wrap")
+
+
+def orders_from_ndjson(lines: Iterable[str]) -> Iterator[BulkOrder]:
+    """Parse one order per line: {"order_id": ..., "items": [...], "box": {...}}
+
+    ``box`` is optional; orders without one are split across standard cartons.
+    """
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        order_id = str(lineno)
+        try:
+            record = json.loads(line)
+            order_id = str(record.get("order_id", order_id))
+            items = [ItemInput(**item) for item in record["items"]]
+            box = record.get("box")
+            if box is not None:
+                box = _box(float(box["length"]), float(box["width"]), float(box["height"]),
+                           box.get("recommended_void_fill"))
+            yield BulkOrder(order_id, items, box)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            yield BulkOrder(order_id, [], error=f"line {lineno}: {str(e)}")
+
+
+def _item_from_row(values: dict) -> ItemInput:
+    if "is_rotatable" in values:
+        values["is_rotatable"] = values["is_rotatable"].strip().lower() in ("1", "true", "yes")
+    return ItemInput(**{k: values[k] for k in ItemInput.__fields__ if k in values})
+
+
+def orders_from_csv(lines: Iterable[str]) -> Iterator[BulkOrder]:
+    """Parse CSV with one row per order line, rows of an order next to each other
+
+    Columns are order_id plus the ItemInput fields; box_length, box_width and
+    box_height (and box_void_fill), when set on an order's first row, pack it
+    into that box instead of splitting it across standard cartons.
+    """
+    order_id, items, box, error = None, [], None, None
+    for lineno, row in enumerate(csv.DictReader(lines), 2):
+        values = {k: v for k, v in row.items() if k and v not in (None, "")}
+        row_order = values.get("order_id", str(lineno))
+        if row_order != order_id:
+            if order_id is not None:
+                yield BulkOrder(order_id, items, box, error)
+            order_id, items, box, error = row_order, [], None, None
+            if all(k in values for k in BOX_COLUMNS):
+                try:
+                    box = _box(*(float(values[k]) for k in BOX_COLUMNS), values.get("box_void_fill"))
+                except ValueError as e:
+                    error = f"line {lineno}: {str(e)}"
+        if error is not None:
+            continue
+        try:
+            items.append(_item_from_row(values))
+        except (ValueError, TypeError) as e:
+            error = f"line {lineno}: {str(e)}"
+            items = []
+    if order_id is not None:
+        yield BulkOrder(order_id, items, box, error)
+
+
+class BulkPacker:
+    """Packs a stream of orders concurrently and yields NDJSON lines as they finish.
+
+    At most ``max_in_flight`` orders are parsed ahead of the results, so
+    memory stays bounded however long the input is. Orders are read and
+    parsed in a thread pool, since the upload is a blocking file and
+    parsing is CPU work. Orders that fail are reported on their own line
+    and do not stop the run; a final summary line reports the throughput.
+    """
+
+    def __init__(self, pool: WorkerPool, max_in_flight: int = 0, retry_ms: float = 50.0,
+                 max_retries: int = 100):
+        self.pool = pool
+        self.max_in_flight = max_in_flight or 2 * pool.max_workers
+        self.retry_ms = retry_ms
+        self.max_retries = max_retries
+
+    async def _run(self, fn, *args, **kwargs):
+        # Interactive traffic shares the pool; back off rather than fail the order
+        for attempt in range(self.max_retries):
+            try:
+                return await self.pool.run(fn, *args, **kwargs)
+            except PoolSaturated:
+                await asyncio.sleep(self.retry_ms / 1000 * min(attempt + 1, 10))
+        return await self.pool.run(fn, *args, **kwargs)
+
+    async def plans_for(self, order: BulkOrder, compact: bool = False,
+                        deadline_ms: Optional[float] = None) -> List[PackingPlan]:
+        """Plans for one order: into its own box if it has one, else across standard cartons"""
+        if order.error is not None:
+            raise ValueError(order.error)
+        if not order.items:
+            raise ValueError("Order has no items")
+        if order.box is None:
+            return await self._run(split_into_cartons, order.items, "count", compact, deadline_ms=deadline_ms)
+
+        async def pack():
+            return await self._run(optimizer.optimize, order.items, order.box,
+                                   compact=compact, deadline_ms=deadline_ms)
+
+        return [await plan_cache.get_or_compute_async(order.items, order.box, pack,
+                                                      variant=plan_variant(None, compact))]
+
+    @staticmethod
+    def _take(orders: Iterator[BulkOrder], count: int) -> List[BulkOrder]:
+        return [order for _, order in zip(range(count), orders)]
+
+    async def _result(self, order: BulkOrder, compact: bool,
+                      deadline_ms: Optional[float]) -> Tuple[bool, bytes]:
+        try:
+            plans = await self.plans_for(order, compact, deadline_ms)
+            BULK_ORDERS.inc(status="packed")
+            return True, dumps({"order_id": order.order_id, "plans": plans}) + b"\n"
+        except (ValueError, PoolSaturated, DeadlineExceeded) as e:
+            error = str(e)
+        except Exception as e:
+            logger.error(f"Bulk packing of order {order.order_id} failed: {str(e)}")
+            error = str(e)
+        BULK_ORDERS.inc(status="failed")
+        return False, dumps({"order_id": order.order_id, "error": error}) + b"\n"
+
+    async def stream(self, orders: Iterator[BulkOrder], compact: bool = False,
+                     deadline_ms: Optional[float] = None) -> AsyncIterator[bytes]:
+        """NDJSON result lines in completion order, then a summary line"""
+        started = time.perf_counter()
+        packed = failed = 0
+        pending = set()
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                wanted = self.max_in_flight - len(pending)
+                if not exhausted and wanted > 0:
+                    taken = await run_in_threadpool(self._take, orders, wanted)
+                    exhausted = len(taken) < wanted
+                    pending.update(asyncio.ensure_future(self._result(order, compact, deadline_ms))
+                                   for order in taken)
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    ok, line = task.result()
+                    if ok:
+                        packed += 1
+                    else:
+                        failed += 1
+                    yield line
+        finally:
+            # Client went away: stop packing what is left
+            for task in pending:
+                task.cancel()
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "orders": packed + failed,
+            "packed": packed,
+            "failed": failed,
+            "elapsed_s": round(elapsed, 3),
+            "orders_per_second": round((packed + failed) / elapsed, 2) if elapsed > 0 else 0.0
+        }
+        logger.info(f"Bulk packing finished: {summary}")
+        yield dumps({"summary": summary}) + b"\n"
+
+
+# Shared packer; 0 in-flight orders means twice the packing workers
+bulk_packer = BulkPacker(packing_pool, max_in_flight=settings.BULK_MAX_IN_FLIGHT)
\ No newline at end of file
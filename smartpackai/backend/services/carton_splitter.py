@@ -0,0 +1,228 @@
+# backend/services/carton_splitter.py
+from typing import List, Optional, Tuple
+import math
+import time
+import numpy as np
+from models.item_schema import ItemInput, BoxOutput, PackingPlan
+from services.box_predictor import predictor as box_predictor
+from services.pack_optimizer import optimizer as pack_optimizer, ExtremePointPacker
+from services.spatial_index import EPSILON
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Carton contents as (index into the sorted item list, unit count)
+Contents = List[Tuple[int, int]]
+
+
+class CartonSplitter:
+    """Split an order across several cartons from the standard catalog.
+
+    Runs first-fit-decreasing over a few unit orderings, then shrinks each
+    carton to the smallest catalog size its contents still fit in. Volume
+    and per-axis lower bounds prune the catalog at every step, and the
+    search stops early once the carton-count lower bound is reached.
+
+    The time budget is checked between units, not just between passes:
+    once it runs out, a later ordering is abandoned in favour of the best
+    split so far, the first one only tries its newest cartons, and
+    shrinking only keeps layouts that already fit a smaller carton instead
+    of repacking.
+    """
+
+    # Open cartons still tried per unit once the time budget is spent
+    late_cartons = 4
+
+    def __init__(self, max_time_ms: float = 50.0):
+        self.max_time_ms = max_time_ms
+        # Orderings tried by the first-fit-decreasing pass, best first
+        self.orderings = [
+            lambda i: (i.length * i.width * i.height, i.weight),
+            lambda i: (max(i.length, i.width, i.height), i.length * i.width * i.height),
+            lambda i: (sorted((i.length, i.width, i.height))[1] * max(i.length, i.width, i.height), i.weight),
+        ]
+
+    def _catalog(self) -> List[Tuple[float, float, float]]:
+        """Standard cartons ordered by volume (smallest first)"""
+        return box_predictor.catalog.cartons
+
+    def _unit_dims(self, item: ItemInput) -> Tuple[float, float, float]:
+        """Unit size with padding; a carton holding a fragile unit always gets the fill chosen for it"""
+        return pack_optimizer.unit_dims(item, box_predictor.select_void_fill(item.fragility))
+
+    def _fits_unit(self, box: Tuple[float, float, float], item: ItemInput) -> bool:
+        """Whether one unit of ``item`` fits an empty carton in some allowed orientation"""
+        dims = self._unit_dims(item)
+        if item.is_rotatable:
+            return all(u <= b for u, b in zip(sorted(dims), sorted(box)))
+        return all(u <= b for u, b in zip(dims, box))
+
+    def _fill(self, box: Tuple[float, float, float], contents: Contents,
+              items: List[ItemInput], deadline: float) -> Optional[ExtremePointPacker]:
+        """Pack ``contents`` into an empty carton; None if anything is left over or time runs out"""
+        packer = pack_optimizer.new_packer(box[0], box[1], box[2], [items[i] for i, _ in contents])
+        for item_index, count in contents:
+            if time.perf_counter() > deadline:
+                return None
+            item = items[item_index]
+            dims = self._unit_dims(item)
+            if packer.place_run(dims, item.is_rotatable, count, item_index) < count:
+                return None
+        return packer
+
+    @staticmethod
+    def _ruled_out(failed: List[Tuple[Tuple[float, float, float], bool]],
+                   dims: Tuple[float, float, float], rotatable: bool) -> bool:
+        """Whether a unit is at least as large as one the carton already turned away
+
+        Cartons only get fuller, so a unit that contains a rejected one in
+        every allowed orientation cannot fit either.
+        """
+        for rejected, rejected_rotatable in failed:
+            if rejected_rotatable:
+                if all(u >= r - EPSILON for u, r in zip(sorted(dims), rejected)):
+                    return True
+            elif not rotatable and all(u >= r - EPSILON for u, r in zip(dims, rejected)):
+                return True
+        return False
+
+    def _first_fit(self, items: List[ItemInput], largest: Tuple[float, float, float],
+                   deadline: float, required: bool) -> Optional[List[Tuple[Contents, ExtremePointPacker]]]:
+        """First-fit-decreasing assignment of units to cartons of the largest size
+
+        Past ``deadline`` the pass is abandoned (None) unless it is
+        ``required``, in which case only the newest few cartons are tried.
+        """
+        packers: List[ExtremePointPacker] = []
+        cartons: List[Contents] = []
+        # Unit shapes each carton turned away, as (dims, rotatable); sorted dims if rotatable
+        failed: List[List[Tuple[Tuple[float, float, float], bool]]] = []
+        for item_index, item in enumerate(items):
+            out_of_time = time.perf_counter() > deadline
+            if out_of_time and not required:
+                return None
+            dims = self._unit_dims(item)
+            key = (tuple(sorted(dims)) if item.is_rotatable else dims, item.is_rotatable)
+            remaining = item.quantity
+            unit_volume = dims[0] * dims[1] * dims[2]
+            open_cartons = list(zip(packers, cartons, failed))
+            for packer, contents, turned_away in open_cartons[-self.late_cartons:] if out_of_time else open_cartons:
+                # Skip cartons whose free volume cannot take even one more
+                # unit, or that already turned away a unit no larger
+                if packer.free_volume < unit_volume - EPSILON or self._ruled_out(turned_away, dims, item.is_rotatable):
+                    continue
+                placed = packer.place_run(dims, item.is_rotatable, remaining, item_index)
+                if placed:
+                    contents.append((item_index, placed))
+                    remaining -= placed
+                if not remaining:
+                    break
+                turned_away.append(key)
+            while remaining:
+                packer = pack_optimizer.new_packer(largest[0], largest[1], largest[2], items[item_index:])
+                placed = packer.place_run(dims, item.is_rotatable, remaining, item_index)
+                if not placed:
+                    raise ValueError(f"Item {dims} does not fit the largest standard box {largest}")
+                packers.append(packer)
+                cartons.append([(item_index, placed)])
+                failed.append([key] if placed < remaining else [])
+                remaining -= placed
+        return list(zip(cartons, packers))
+
+    def _shrink(self, contents: Contents, packer: ExtremePointPacker, items: List[ItemInput],
+                catalog: List[Tuple[float, float, float]], deadline: float) -> Tuple[Tuple[float, float, float], ExtremePointPacker]:
+        """Smallest catalog carton that still holds ``contents``, packed in ``packer``"""
+        volume = sum(np.prod(self._unit_dims(items[i])) * n for i, n in contents)
+        # The corner of the layout furthest from the origin
+        used = packer.state.hi[:packer.state.size].max(axis=0)
+        # Catalog is volume ordered, so bisect past sizes that are too small
+        volumes = box_predictor.catalog.boxes.prod(axis=1)
+        start = int(np.searchsorted(volumes, volume - EPSILON))
+        for box in catalog[start:]:
+            # The current layout already fits: nothing to repack
+            if (used <= np.array(box) + EPSILON).all():
+                return box, packer
+            # Prune sizes that cannot work before trying a repack, and only
+            # repack while there is time
+            if time.perf_counter() > deadline:
+                continue
+            if not all(self._fits_unit(box, items[i]) for i, _ in contents):
+                continue
+            filled = self._fill(box, contents, items, deadline)
+            if filled is not None:
+                return box, filled
+        raise ValueError("Carton contents no longer fit any standard box")
+
+    def split(self, items: List[ItemInput], objective: str = "count",
+              compact: bool = False) -> List[PackingPlan]:
+        """Pack ``items`` into as few (or as little total volume of) standard cartons as possible"""
+        try:
+            if objective not in ("count", "volume"):
+                raise ValueError(f"Unknown objective: {objective}. Choose 'count' or 'volume'")
+            started = time.perf_counter()
+            deadline = started + self.max_time_ms / 1000
+            catalog = self._catalog()
+            largest = max(catalog, key=lambda b: b[0] * b[1] * b[2])
+
+            oversized = [i for i in items if not self._fits_unit(largest, i)]
+            shippable = [i for i in items if self._fits_unit(largest, i)]
+            if not shippable:
+                raise ValueError(f"No item fits the largest standard box {largest}")
+            total_volume = sum(i.length * i.width * i.height * i.quantity for i in shippable)
+            lower_bound = math.ceil(total_volume / (largest[0] * largest[1] * largest[2]))
+
+            best = None
+            best_items = None
+            for ordering in self.orderings:
+                sorted_items = sorted(shippable, key=ordering, reverse=True)
+                assigned = self._first_fit(sorted_items, largest, deadline, required=best is None)
+                if assigned is None:
+                    break
+                cartons = [self._shrink(c, packer, sorted_items, catalog, deadline) for c, packer in assigned]
+                count = len(cartons)
+                volume = sum(b[0] * b[1] * b[2] for b, _ in cartons)
+                score = (count, volume) if objective == "count" else (volume, count)
+                if best is None or score < best[0]:
+                    best = (score, cartons)
+                    best_items = sorted_items
+                if (objective == "count" and count <= lower_bound) or time.perf_counter() > deadline:
+                    break
+
+            placement_time_ms = (time.perf_counter() - started) * 1000
+            plans = []
+            for box, packer in best[1]:
+                present = [best_items[i] for i in np.unique(packer.state.item_index[:packer.state.size])]
+                box_output = BoxOutput(
+                    length=box[0],
+                    width=box[1],
+                    height=box[2],
+                    volume=box[0] * box[1] * box[2],
+                    recommended_void_fill=box_predictor.select_void_fill(max(i.fragility for i in present))
+                )
+                plans.append(pack_optimizer.build_plan(box_output, packer, best_items, [], placement_time_ms, compact))
+
+            if oversized:
+                logger.warning(f"{len(oversized)} line(s) exceed the largest standard box")
+                if compact:
+                    plans[-1].unpacked_items.extend(oversized)
+                else:
+                    plans[-1].unpacked_items.extend(u for i in oversized for u in [i] * i.quantity)
+                plans[-1].packing_instructions.insert(
+                    len(plans[-1].packing_instructions) - 1,
+                    f"{sum(i.quantity for i in oversized)} unit(s) exceed every standard box - ship separately"
+                )
+
+            logger.debug(f"Split order into {len(plans)} carton(s) in {placement_time_ms:.2f} ms")
+            return plans
+
+        except Exception as e:
+            logger.error(f"Carton splitting failed: {str(e)}")
+            raise
+
+# Singleton splitter instance
+splitter = CartonSplitter()
+
+def split_into_cartons(items: List[ItemInput], objective: str = "count",
+                       compact: bool = False) -> List[PackingPlan]:
+    """Public interface for multi-carton packing"""
+    return splitter.split(items, objective, compact)
\ No newline at end of file
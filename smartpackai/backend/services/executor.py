@@ -0,0 +1,144 @@
+# backend/services/executor.py
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import os
+import threading
+import time
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Raised when a pool's workers and queue are all taken"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a task does not finish before its deadline"""
+
+
+def _run_before_deadline(deadline: float, fn: Callable, args: tuple, kwargs: dict):
+    """Skip work whose deadline already passed while it waited in the queue"""
+    if time.time() > deadline:
+        raise DeadlineExceeded("Deadline passed before the task started")
+    return fn(*args, **kwargs)
+
+
+class WorkerPool:
+    """Bounded executor for CPU-bound calls made from async endpoints.
+
+    At most ``max_workers`` tasks run and ``max_queue`` more wait; further
+    submissions fail fast with PoolSaturated instead of piling up. Every
+    task carries a deadline: it is dropped if still queued when the
+    deadline passes, and the caller stops waiting for it at that point.
+    The underlying executor is created on first use.
+    """
+
+    def __init__(self, name: str, kind: str = "thread", max_workers: Optional[int] = None,
+                 max_queue: int = 64, default_deadline_ms: float = 10000.0):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind: {kind}. Choose 'thread' or 'process'")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.default_deadline_ms = default_deadline_ms
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=self.name)
+        return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.name} pool is saturated ({self.in_flight} tasks in flight)")
+            self.in_flight += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable, *args, deadline_ms: Optional[float] = None, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result"""
+        timeout = (deadline_ms or self.default_deadline_ms) / 1000
+        self._acquire()
+        try:
+            future = self._get_executor().submit(
+                _run_before_deadline, time.time() + timeout, fn, args, kwargs
+            )
+        except Exception:
+            self._release()
+            raise
+        # The slot stays taken until the worker really finishes, even if
+        # the caller gave up, so saturation reflects actual load
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise DeadlineExceeded(f"{self.name} task exceeded its {timeout * 1000:.0f} ms deadline")
+        except DeadlineExceeded:
+            with self._lock:
+                self.timed_out += 1
+            raise
+
+    def stats(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Packing is CPU heavy, so it gets its own processes by default; box
+# prediction is cheap and stays on threads
+packing_pool = WorkerPool(
+    "packing",
+    kind=settings.PACKING_POOL_KIND,
+    max_workers=settings.PACKING_POOL_WORKERS or None,
+    max_queue=settings.PACKING_POOL_QUEUE,
+    default_deadline_ms=settings.PACKING_DEADLINE_MS
+)
+prediction_pool = WorkerPool(
+    "prediction",
+    kind="thread",
+    max_workers=settings.PREDICTION_POOL_WORKERS,
+    max_queue=settings.PREDICTION_POOL_QUEUE,
+    default_deadline_ms=settings.PREDICTION_DEADLINE_MS
+)
+# OpenCV and MediaPipe release the GIL, so measurement runs on threads,
+# each with its own pooled detectors
+vision_pool = WorkerPool(
+    "vision",
+    kind="thread",
+    max_workers=settings.VISION_POOL_WORKERS,
+    max_queue=settings.VISION_POOL_QUEUE,
+    default_deadline_ms=settings.VISION_DEADLINE_MS
+)
\ No newline at end of file
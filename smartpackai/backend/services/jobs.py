@@ -0,0 +1,351 @@
+# backend/services/jobs.py
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from starlette.concurrency import run_in_threadpool
+from models.item_schema import ItemInput, BoxOutput, JobInfo
+from services.box_predictor import predict_box_sizes
+from services.bulk_packing import BulkOrder, bulk_packer
+from services.executor import packing_pool, prediction_pool, PoolSaturated, DeadlineExceeded
+from services.metrics import metrics
+from services.serialization import dumps
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Items per prediction call in predict-box jobs; progress is reported per chunk
+PREDICT_CHUNK = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    result BLOB,
+    error TEXT,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_priority ON jobs (status, priority DESC, seq);
+"""
+_INFO_COLUMNS = "id, kind, status, priority, done, total, error, created_at, started_at, finished_at"
+
+# Progress callback handed to runners: await progress(done, total)
+Progress = Callable[[int, int], Awaitable[None]]
+JobRunner = Callable[[Dict, Progress], Awaitable[Any]]
+
+JOBS = metrics.counter("smartpack_jobs_total", "Background jobs by final status", ("kind", "status"))
+
+
+class JobCancelled(Exception):
+    """The job was cancelled while it ran"""
+
+
+def _info(row: tuple) -> JobInfo:
+    return JobInfo.construct(**dict(zip(("id", "kind", "status", "priority", "done", "total", "error",
+                                         "created_at", "started_at", "finished_at"), row)))
+
+
+class JobQueue:
+    """Persistent priority queue of background jobs, run by async workers.
+
+    Jobs live in SQLite, so queued work survives a restart; jobs that were
+    running when the process stopped are queued again by ``start``. Workers
+    take the highest priority job first (oldest first within a priority)
+    and run it with the runner registered for its kind. ``reserved_workers``
+    only take jobs at ``interactive_priority`` or above, so station requests
+    do not wait behind long batch jobs. The queue is meant for one server
+    process; an empty ``path`` keeps it in memory. ``submit``, ``get`` and
+    ``cancel`` may be called from a thread pool so request handlers keep
+    SQLite off the event loop; the workers run their own store calls in
+    the thread pool too.
+    """
+
+    def __init__(self, path: str = "", workers: int = 1, reserved_workers: int = 1,
+                 interactive_priority: int = 10, poll_seconds: float = 1.0,
+                 retention_seconds: float = 86400.0):
+        self.path = path
+        self.workers = workers
+        self.reserved_workers = reserved_workers
+        self.interactive_priority = interactive_priority
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        self.runners: Dict[str, JobRunner] = {}
+        self._lock = threading.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Future] = {}
+        # Running jobs cancelled through ``cancel`` rather than by shutdown
+        self._cancelled: Set[str] = set()
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._purged_at = 0.0
+        try:
+            self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None)
+            if path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        except Exception as e:
+            logger.error(f"Failed to open job store at {path or ':memory:'}: {str(e)}")
+            raise
+
+    def register(self, kind: str, runner: JobRunner):
+        """Run jobs of ``kind`` with ``await runner(payload, progress)``"""
+        self.runners[kind] = runner
+
+    def submit(self, kind: str, payload: Any, priority: int = 0, total: int = 0) -> JobInfo:
+        """Queue a job; ``payload`` is stored as JSON and handed to the runner"""
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, priority, status, payload, total, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, priority, QUEUED, dumps(payload), total, time.time())
+            )
+        if self._wakeup is not None:
+            self._on_loop(self._wakeup.set)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_INFO_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _info(row) if row else None
+
+    def result(self, job_id: str) -> Optional[bytes]:
+        """JSON result of a succeeded job"""
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[JobInfo]:
+        """Job status once it finishes, or after ``timeout`` seconds"""
+        if timeout <= 0:
+            return await run_in_threadpool(self.get, job_id)
+        # Listen before looking so a job finishing during the lookup still wakes us
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        info = await run_in_threadpool(self.get, job_id)
+        if info is None or info.status in FINISHED:
+            self._notify(job_id)
+            return info
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return await run_in_threadpool(self.get, job_id)
+
+    def cancel(self, job_id: str) -> Optional[JobInfo]:
+        """Cancel a queued or running job; finished jobs are left as they are"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING)
+            )
+        self._on_loop(self._stop_running, job_id)
+        return self.get(job_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "jobs": {status: counts.get(status, 0) for status in (QUEUED, RUNNING) + FINISHED},
+            "workers": self.workers,
+            "reserved_workers": self.reserved_workers,
+            "interactive_priority": self.interactive_priority
+        }
+
+    def purge(self) -> int:
+        """Drop finished jobs older than the retention period"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?",
+                FINISHED + (time.time() - self.retention_seconds,)
+            )
+        self._purged_at = time.time()
+        return cursor.rowcount
+
+    def _claim(self, min_priority: Optional[int]) -> Optional[Tuple[str, str, bytes]]:
+        query = "SELECT seq, id, kind, payload FROM jobs WHERE status = ?"
+        params: tuple = (QUEUED,)
+        if min_priority is not None:
+            query += " AND priority >= ?"
+            params += (min_priority,)
+        query += " ORDER BY priority DESC, seq LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE jobs SET status = ?, started_at = ? WHERE seq = ?",
+                               (RUNNING, time.time(), row[0]))
+        return row[1], row[2], row[3]
+
+    def _report(self, job_id: str, done: int, total: int):
+        with self._lock:
+            cursor = self._conn.execute("UPDATE jobs SET done = ?, total = ? WHERE id = ? AND status = ?",
+                                        (done, total, job_id, RUNNING))
+        if cursor.rowcount == 0:
+            raise JobCancelled(f"Job {job_id} was cancelled")
+
+    def _progress(self, job_id: str) -> Progress:
+        async def report(done: int, total: int):
+            await run_in_threadpool(self._report, job_id, done, total)
+        return report
+
+    def _finish(self, job_id: str, status: str, result: Optional[bytes] = None, error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (status, result, error, time.time(), job_id, RUNNING)
+            )
+        self._on_loop(self._notify, job_id)
+
+    def _on_loop(self, fn: Callable, *args):
+        """Call ``fn`` on the workers' event loop, which may not be the calling thread's"""
+        if self._loop is None:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _stop_running(self, job_id: str):
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+        self._notify(job_id)
+
+    def _notify(self, job_id: str):
+        event = self._finished.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _execute(self, job_id: str, kind: str, payload: bytes):
+        started = time.perf_counter()
+        try:
+            result = await self.runners[kind](json.loads(payload), self._progress(job_id))
+            await run_in_threadpool(self._finish, job_id, SUCCEEDED, dumps(result))
+            status = SUCCEEDED
+        except JobCancelled:
+            status = CANCELLED
+        except asyncio.CancelledError:
+            # ``cancel`` already marked the row; on shutdown it stays running
+            # so the next start queues the job again
+            if job_id in self._cancelled:
+                JOBS.inc(kind=kind, status=CANCELLED)
+                logger.info(f"Job {job_id} ({kind}) {CANCELLED} after {(time.perf_counter() - started):.1f} s")
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {str(e)}")
+            await run_in_threadpool(self._finish, job_id, FAILED, None, str(e))
+            status = FAILED
+        JOBS.inc(kind=kind, status=status)
+        logger.info(f"Job {job_id} ({kind}) {status} after {(time.perf_counter() - started):.1f} s")
+
+    async def _worker(self, min_priority: Optional[int]):
+        while True:
+            job = await run_in_threadpool(self._claim, min_priority)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    if time.time() - self._purged_at > 60:
+                        await run_in_threadpool(self.purge)
+                continue
+            # Run the job as its own task so cancelling it leaves the worker alive
+            task = asyncio.ensure_future(self._execute(*job))
+            self._running[job[0]] = task
+            try:
+                await asyncio.wait({task})
+            finally:
+                self._running.pop(job[0], None)
+                self._cancelled.discard(job[0])
+
+    def _requeue_running(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                                        (QUEUED, RUNNING))
+        return cursor.rowcount
+
+    async def start(self):
+        """Start the workers on the running event loop"""
+        if self._tasks:
+            return
+        requeued = await run_in_threadpool(self._requeue_running)
+        if requeued:
+            logger.info(f"Re-queued {requeued} jobs interrupted by the last shutdown")
+        await run_in_threadpool(self.purge)
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.ensure_future(self._worker(None)) for _ in range(self.workers)]
+        self._tasks += [asyncio.ensure_future(self._worker(self.interactive_priority))
+                        for _ in range(self.reserved_workers)]
+
+    async def stop(self):
+        """Stop the workers; jobs they were running are queued again"""
+        running = list(self._running.values())
+        for task in self._tasks + running:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *running, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        await run_in_threadpool(self._requeue_running)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+async def run_pack_job(payload: Dict, progress: Progress) -> List[Dict]:
+    """Pack each order in turn; an order that fails gets an error entry instead of plans"""
+    orders = [
+        BulkOrder(order.get("order_id") or str(i), [ItemInput(**item) for item in order["items"]],
+                  BoxOutput(**order["box"]) if order.get("box") else None)
+        for i, order in enumerate(payload["orders"], 1)
+    ]
+    results = []
+    for done, order in enumerate(orders, 1):
+        try:
+            plans = await bulk_packer.plans_for(order, payload.get("compact", False),
+                                                deadline_ms=settings.JOB_PACKING_DEADLINE_MS)
+            results.append({"order_id": order.order_id, "plans": plans})
+        except (ValueError, PoolSaturated, DeadlineExceeded) as e:
+            results.append({"order_id": order.order_id, "error": str(e)})
+        await progress(done, len(orders))
+    return results
+
+
+async def run_predict_job(payload: Dict, progress: Progress) -> List[BoxOutput]:
+    """Recommend a box per item, PREDICT_CHUNK items at a time"""
+    items = [ItemInput(**item) for item in payload["items"]]
+    boxes: List[BoxOutput] = []
+    for start in range(0, len(items), PREDICT_CHUNK):
+        boxes.extend(await prediction_pool.run(predict_box_sizes, items[start:start + PREDICT_CHUNK]))
+        await progress(len(boxes), len(items))
+    return boxes
+
+
+# Shared queue; empty JOB_STORE_PATH keeps jobs in memory, 0 workers means one per packing worker
+job_queue = JobQueue(
+    path=settings.JOB_STORE_PATH,
+    workers=settings.JOB_WORKERS or packing_pool.max_workers,
+    reserved_workers=settings.JOB_RESERVED_WORKERS,
+    interactive_priority=settings.JOB_INTERACTIVE_PRIORITY,
+    retention_seconds=settings.JOB_RETENTION_SECONDS
+)
+job_queue.register("pack", run_pack_job)
+job_queue.register("predict-box", run_predict_job)
\ No newline at end of file
@@ -0,0 +1,255 @@
+# backend/services/measurement.py
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+import queue
+import threading
+import time
+import numpy as np
+from camera_vision.dimension_fusion import DimensionFusion, FusedEstimate
+from camera_vision.pipeline import measure_frame
+from services.executor import WorkerPool, PoolSaturated, vision_pool
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import cv2
+    from camera_vision.reference_detection import ReferenceDetector
+    from camera_vision.objectron_infer import ObjectronDetector, MEDIAPIPE_AVAILABLE
+    from camera_vision.dimension_estimator import DimensionEstimator
+    VISION_AVAILABLE = MEDIAPIPE_AVAILABLE
+except ImportError:
+    cv2 = None
+    VISION_AVAILABLE = False
+
+# Raw frame layouts accepted by raw_frames
+PIXEL_FORMATS = ("bgr24", "rgb24")
+
+
+class VisionUnavailable(Exception):
+    """OpenCV or MediaPipe is not installed"""
+
+
+class DetectorKit(NamedTuple):
+    """One set of detectors; a kit is used by one measurement at a time"""
+    reference: object
+    objectron: object
+    # Reference type -> DimensionEstimator calibrated for it
+    estimators: Dict[str, object]
+
+
+def build_kit(objectron_model: str = "Shoe") -> DetectorKit:
+    """Detectors for server-side measurement; building the MediaPipe graph is the slow part"""
+    if not VISION_AVAILABLE:
+        raise VisionUnavailable("Measurement needs OpenCV and MediaPipe. Run: pip install opencv-python mediapipe")
+    # Frames of one request come from one station; tracking is reset between requests
+    reference = ReferenceDetector(tracking=True)
+    estimators = {
+        name: DimensionEstimator(max(ref["width"], ref["height"]), min(ref["width"], ref["height"]))
+        for name, ref in reference.reference_objects.items()
+    }
+    # Uploads are unrelated stills, so detect in each instead of tracking across them
+    return DetectorKit(reference, ObjectronDetector(objectron_model, static_image_mode=True), estimators)
+
+
+class DetectorPool:
+    """Pre-initialised detector kits, checked out for one measurement at a time.
+
+    Kits are built on first use or by ``warm_up``, up to ``size`` of them;
+    size it to the workers of the pool measurements run on so a kit is
+    always free for a running task.
+    """
+
+    def __init__(self, size: int, factory: Callable[[], DetectorKit]):
+        self.size = size
+        self.factory = factory
+        self._free: "queue.Queue[DetectorKit]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def _build(self) -> bool:
+        with self._lock:
+            if self.created >= self.size:
+                return False
+            self.created += 1
+        try:
+            self._free.put(self.factory())
+        except Exception:
+            with self._lock:
+                self.created -= 1
+            raise
+        return True
+
+    def warm_up(self):
+        """Build every kit up front"""
+        while self._build():
+            pass
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator[DetectorKit]:
+        """Borrow a kit, waiting up to ``timeout`` seconds; PoolSaturated if none frees up"""
+        try:
+            kit = self._free.get_nowait()
+        except queue.Empty:
+            if not self._build():
+                logger.warning("All detector kits are busy; waiting for one")
+            try:
+                kit = self._free.get(timeout=timeout)
+            except queue.Empty:
+                raise PoolSaturated(f"All {self.size} detector kits stayed busy for {timeout:.1f} s")
+        try:
+            yield kit
+        finally:
+            self._free.put(kit)
+
+    def stats(self) -> Dict:
+        return {"size": self.size, "created": self.created, "free": self._free.qsize()}
+
+
+def decode_image(data) -> np.ndarray:
+    """
+    Decode a JPEG or PNG straight from the request buffer
+
+    The bytes are wrapped, not copied, before OpenCV decodes them.
+    """
+    if cv2 is None:
+        raise VisionUnavailable("Decoding images needs OpenCV. Run: pip install opencv-python")
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode image; send JPEG or PNG")
+    return frame
+
+
+def raw_frames(data, width: int, height: int, pixel_format: str = "bgr24") -> np.ndarray:
+    """
+    View a buffer of back-to-back raw frames as a (frames, height, width, 3) array
+
+    bgr24 frames are used in place; rgb24 ones take one copy to reorder the channels.
+    """
+    if pixel_format not in PIXEL_FORMATS:
+        raise ValueError(f"Unknown pixel format: {pixel_format}. Choose {' or '.join(PIXEL_FORMATS)}")
+    frame_size = width * height * 3
+    if frame_size == 0 or len(data) == 0 or len(data) % frame_size:
+        raise ValueError(f"Raw body of {len(data)} bytes is not a whole number of {width}x{height} frames")
+    frames = np.frombuffer(data, dtype=np.uint8).reshape(-1, height, width, 3)
+    if pixel_format == "rgb24":
+        frames = np.ascontiguousarray(frames[..., ::-1])
+    return frames
+
+
+async def read_raw_frames(chunks: AsyncIterator[bytes], width: int, height: int,
+                          max_frames: int) -> List[np.ndarray]:
+    """
+    Cut a stream of back-to-back raw frames into (height, width, 3) arrays as it arrives
+
+    Each chunk is copied straight into the frame it belongs to, so the body
+    is never buffered whole, and a stream of more than ``max_frames`` is
+    refused as soon as the extra frame starts.
+    """
+    frame_size = width * height * 3
+    frames: List[np.ndarray] = []
+    frame: Optional[np.ndarray] = None
+    filled = received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        while data.size:
+            if frame is None:
+                if len(frames) == max_frames:
+                    raise ValueError(f"Send at most {max_frames} frames")
+                frame, filled = np.empty(frame_size, dtype=np.uint8), 0
+            take = min(frame_size - filled, data.size)
+            frame[filled:filled + take] = data[:take]
+            filled += take
+            data = data[take:]
+            if filled == frame_size:
+                frames.append(frame.reshape(height, width, 3))
+                frame = None
+    if frame is not None:
+        raise ValueError(f"Raw body of {received} bytes is not a whole number of {width}x{height} frames")
+    return frames
+
+
+def to_bgr(frames: List[np.ndarray], pixel_format: str = "bgr24") -> List[np.ndarray]:
+    """Frames from read_raw_frames in OpenCV's channel order"""
+    if pixel_format not in PIXEL_FORMATS:
+        raise ValueError(f"Unknown pixel format: {pixel_format}. Choose {' or '.join(PIXEL_FORMATS)}")
+    if pixel_format == "rgb24":
+        return [np.ascontiguousarray(frame[..., ::-1]) for frame in frames]
+    return frames
+
+
+class MeasurementService:
+    """Measures items in camera frames on a worker pool, with pooled detectors"""
+
+    def __init__(self, pool: WorkerPool, detectors: DetectorPool, max_frames: int = 30,
+                 distance_cm: float = 60.0):
+        self.pool = pool
+        self.detectors = detectors
+        self.max_frames = max_frames
+        self.distance_cm = distance_cm
+
+    def _measure(self, decode: Callable[[], Sequence[np.ndarray]], reference_type: str,
+                 distance_cm: float, submitted: float) -> Dict:
+        timings = {"queue": time.perf_counter() - submitted}
+
+        started = time.perf_counter()
+        frames = decode()
+        timings["decode"] = time.perf_counter() - started
+        if len(frames) > self.max_frames:
+            raise ValueError(f"Send at most {self.max_frames} frames per measurement")
+
+        fusion = DimensionFusion(window=max(len(frames), 1), min_frames=min(len(frames), 5))
+        estimate: Optional[FusedEstimate] = None
+        references = detections = 0
+        for name in ("reference", "detect", "estimate"):
+            timings[name] = 0.0
+        with self.detectors.checkout(timeout=self.pool.default_deadline_ms / 1000) as kit:
+            # Tracking state from another station's frames would only mislead
+            kit.reference.reset_tracking()
+            estimator = kit.estimators[reference_type]
+            for frame in frames:
+                t0 = time.perf_counter()
+                reference = kit.reference.detect_reference(frame, reference_type)
+                t1 = time.perf_counter()
+                detection = kit.objectron.detect_object(frame)
+                t2 = time.perf_counter()
+                dimensions = measure_frame(reference, detection, frame.shape, estimator, distance_cm)
+                if dimensions is not None:
+                    estimate = fusion.update(dimensions)
+                t3 = time.perf_counter()
+                timings["reference"] += t1 - t0
+                timings["detect"] += t2 - t1
+                timings["estimate"] += t3 - t2
+                references += reference is not None
+                detections += detection is not None
+
+        return {
+            "estimate": estimate,
+            "frames": len(frames),
+            "references_found": references,
+            "objects_found": detections,
+            "timings": timings
+        }
+
+    async def measure(self, decode: Callable[[], Sequence[np.ndarray]], reference_type: str = "a4",
+                      distance_cm: Optional[float] = None, deadline_ms: Optional[float] = None) -> Dict:
+        """
+        Decode frames and measure the item in them on the worker pool
+
+        ``decode`` runs on the worker too, so large uploads don't block the
+        event loop. The result holds the fused estimate (None when nothing
+        was measured), detection counts and per-stage timings in seconds.
+        """
+        return await self.pool.run(self._measure, decode, reference_type, distance_cm or self.distance_cm,
+                                   time.perf_counter(), deadline_ms=deadline_ms)
+
+
+# Shared service; one detector kit per vision worker
+measurement_service = MeasurementService(
+    vision_pool,
+    DetectorPool(vision_pool.max_workers, lambda: build_kit(settings.VISION_OBJECTRON_MODEL)),
+    max_frames=settings.VISION_MAX_FRAMES,
+    distance_cm=settings.VISION_CAMERA_DISTANCE_CM
+)
\ No newline at end of file
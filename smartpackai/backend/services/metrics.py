@@ -0,0 +1,329 @@
+# backend/services/metrics.py
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import functools
+import json
+import math
+import random
+import threading
+import time
+from fastapi.routing import APIRoute
+import logging
+
+logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("smartpack.access")
+
+# Seconds; spans sub-millisecond predictions up to long packing searches
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+                for key, v in sorted(values.items())]
+
+
+class Histogram:
+    """Bucketed distribution with optional labels, rendered with cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[n]) for n in self.labelnames))
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            snapshot = {key: (list(s[0]), s[1], s[2]) for key, s in self._series.items()}
+        lines = []
+        for key, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter read from existing stats when scraped"""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: Sequence[str],
+                 read: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.read = read
+
+    def samples(self) -> List[str]:
+        try:
+            values = self.read()
+        except Exception as e:
+            logger.error(f"Reading metric {self.name} failed: {str(e)}")
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+                for key, v in sorted(values.items())]
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, read: Callable[[], Dict[Tuple, float]],
+                 labelnames: Sequence[str] = (), kind: str = "gauge") -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, kind, labelnames, read))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    "smartpack_stage_duration_seconds", "Time spent in each request stage", ("stage",)
+)
+REQUEST_SECONDS = metrics.histogram(
+    "smartpack_request_duration_seconds", "End-to-end request latency", ("route", "method", "status")
+)
+REQUESTS = metrics.counter(
+    "smartpack_requests_total", "Requests served", ("route", "method", "status")
+)
+
+
+class RequestTimings:
+    """Stage timings of the request being served"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.route: Optional[str] = None
+        self.handler_started: Optional[float] = None
+        self.handler_done: Optional[float] = None
+        self.response_started: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_current_request: ContextVar[Optional[RequestTimings]] = ContextVar("smartpack_request", default=None)
+
+
+def observe_stage(name: str, seconds: float):
+    """Record ``seconds`` spent in stage ``name``"""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = _current_request.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as stage ``name``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    def begin() -> Optional[RequestTimings]:
+        timings = _current_request.get()
+        if timings is not None:
+            timings.handler_started = time.perf_counter()
+        return timings
+
+    def end(timings: Optional[RequestTimings]):
+        if timings is not None:
+            timings.handler_done = time.perf_counter()
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            timings = begin()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                end(timings)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            timings = begin()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                end(timings)
+    return wrapper
+
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute that marks when its endpoint starts and finishes.
+
+    Everything before the endpoint starts (reading the body, validation)
+    counts as the parse stage, everything after it finishes until the
+    response starts as the serialize stage.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def labelled_handler(request):
+            # Label the request before validation, so 422s carry the route too
+            timings = _current_request.get()
+            if timings is not None:
+                timings.route = route
+            return await handler(request)
+
+        return labelled_handler
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency, stage timings and sampled access logs.
+
+    One in ``1 / log_sample_rate`` requests is logged as a JSON line on the
+    smartpack.access logger; server errors and requests slower than
+    ``slow_request_ms`` are always logged.
+    """
+
+    def __init__(self, app, log_sample_rate: float = 0.01, slow_request_ms: float = 1000.0):
+        self.app = app
+        self.log_sample_rate = log_sample_rate
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _current_request.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timings.response_started = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            self._record(scope, timings, status)
+
+    @staticmethod
+    def _observe(timings: RequestTimings, name: str, seconds: float):
+        # The request's context is gone by now, so record on it directly
+        STAGE_SECONDS.observe(seconds, stage=name)
+        timings.add(name, seconds)
+
+    def _record(self, scope, timings: RequestTimings, status: int):
+        elapsed = time.perf_counter() - timings.started
+        route = timings.route or "unmatched"
+        method = scope.get("method", "")
+        if timings.handler_started is not None:
+            self._observe(timings, "parse", timings.handler_started - timings.started)
+        if timings.handler_done is not None and timings.response_started is not None:
+            self._observe(timings, "serialize", timings.response_started - timings.handler_done)
+        REQUEST_SECONDS.observe(elapsed, route=route, method=method, status=status)
+        REQUESTS.inc(route=route, method=method, status=status)
+
+        elapsed_ms = elapsed * 1000
+        if status >= 500 or elapsed_ms >= self.slow_request_ms or random.random() < self.log_sample_rate:
+            access_logger.info(json.dumps({
+                "route": route,
+                "path": scope.get("path"),
+                "method": method,
+                "status": status,
+                "duration_ms": round(elapsed_ms, 3),
+                "stages_ms": {k: round(v * 1000, 3) for k, v in timings.stages.items()}
+            }))
\ No newline at end of file
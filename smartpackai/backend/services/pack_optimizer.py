@@ -1,13 +1,532 @@
 # backend/services/pack_optimizer.py
-from typing import List, Dict
+from typing import List, Dict, NamedTuple, Optional, Sequence, Tuple
+import itertools
+import random
+import time
 import numpy as np
-from models.item_schema import ItemInput, BoxOutput, PackingPlan, PackedItem, Position, Rotation
+from models.item_schema import (
+    ItemInput, BoxOutput, PackingPlan, PackedItem, PackedBlock, Position, Rotation, UtilizationSample
+)
+from services.spatial_index import SpatialGrid, EPSILON
+from services.placement_state import PlacementState, clip_free_run
+from services.plan_cache import plan_cache, plan_variant
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Axis permutations of (length, width, height) and the rotation (degrees,
+# applied about z, then y, then x) that produces each of them
+ORIENTATIONS = [
+    ((0, 1, 2), (0, 0, 0)),
+    ((1, 0, 2), (0, 0, 90)),
+    ((0, 2, 1), (90, 0, 0)),
+    ((2, 1, 0), (0, 90, 0)),
+    ((1, 2, 0), (90, 0, 90)),
+    ((2, 0, 1), (90, 90, 0)),
+]
+
+# Units above this fragility are wrapped in padding before they are placed
+FRAGILE_THRESHOLD = 0.7
+
+# Grid cell key (ix, iy, iz)
+Cell = Tuple[int, int, int]
+
+
+class PlanLayout(NamedTuple):
+    """Placed blocks of a plan as arrays, one row per block
+
+    ``line`` indexes ``items``. Units sit ``inset`` in from their padded
+    slots, so a unit's position is its slot origin plus the inset.
+    """
+    items: List[ItemInput]
+    line: np.ndarray
+    origin: np.ndarray
+    inset: np.ndarray
+    pitch: np.ndarray
+    counts: np.ndarray
+    orientation: np.ndarray
+
+
+class ExtremePointPacker:
+    """Extreme-point placement engine for a single box.
+
+    Placed blocks live in a PlacementState, one row per block, indexed by a
+    SpatialGrid, so collision and support checks only look at the boxes
+    around a candidate point. Each placement test is a vectorized check of every allowed
+    orientation at once, and runs of identical units are laid down as whole
+    rows/layers per search.
+
+    Extreme points keep a stable slot for their lifetime and are filed
+    under the grid cell they sit in. Every cell keeps an upper bound on the
+    free runs and support area of its points, so a search only gathers the
+    points of cells that can hold some orientation of the block and sorts
+    just those by (z, y, x). Committing a block only visits the cells
+    around it.
+    """
+
+    # Upper bound on units tested in one vectorized block check
+    max_block_units = 4096
+    # Below this many (query, placed box) pairs a brute-force vectorized
+    # check beats walking the grid cells in Python
+    brute_force_pairs = 2048
+    # Points gathered from whole cell layers before a search batch is tested
+    search_batch = 256
+
+    def __init__(self, length: float, width: float, height: float,
+                 cell_size: float, min_support: float = 0.75, capacity: int = 64):
+        self.bounds = np.array([length, width, height], dtype=np.float64)
+        self.min_support = min_support
+        self.cell_size = cell_size
+        self.index = SpatialGrid(cell_size)
+        self.state = PlacementState(capacity)
+        self.packed_volume = 0.0
+
+        # Extreme points by slot: position, free run along +x/+y/+z and
+        # whether the point is still live. Dead slots are never reused.
+        slots = max(2 * int(capacity) + 1, 8)
+        self._points = np.empty((slots, 3), dtype=np.float64)
+        self._runs = np.empty((slots, 3), dtype=np.float64)
+        self._alive = np.zeros(slots, dtype=bool)
+        # A placed box known to collide with small boxes anchored at the
+        # point. Boxes are never removed, so it keeps rejecting any shape
+        # that reaches it without another collision query.
+        self._blocker_lo = np.empty((slots, 3), dtype=np.float64)
+        self._blocker_hi = np.empty((slots, 3), dtype=np.float64)
+        # Most a raised point can be supported: the top faces level with it
+        # within its free runs. Free runs only shrink, so adding the faces
+        # of new boxes keeps this a bound without recomputing it.
+        self._support = np.empty(slots, dtype=np.float64)
+        # Boxes only get fuller, so a point that rejected a unit shape keeps
+        # rejecting it; points remember the last shape they rejected, which
+        # makes runs of identical units cheap
+        self._rejected = np.full(slots, -1, dtype=np.int64)
+        self._shape_key: Optional[Tuple] = None
+        self._shape_id = 0
+        self._slots = 0
+        # Rows by the level of their top face, and point slots by level
+        self._surfaces: Dict[int, List[int]] = {}
+        self._level_points: Dict[int, List[int]] = {}
+
+        # Live point slots by grid cell. Cells get a stable index on first
+        # use, and per index an upper bound on (run x, run y, run z, support)
+        # of their points, the id of the last shape all of them rejected and
+        # the z index of the cell; empty cells have a bound of -inf
+        self._cell_ids: Dict[Cell, int] = {}
+        self._cell_slots: List[List[int]] = []
+        self._cell_bound = np.full((16, 4), -np.inf)
+        self._cell_rejected = np.full(16, -1, dtype=np.int64)
+        self._cell_layer = np.zeros(16, dtype=np.int64)
+        self._slot_cell = np.zeros(slots, dtype=np.int64)
+        self._shapes: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+        self._add_points(np.zeros((1, 3)), self.bounds[None, :].copy())
+
+    @property
+    def free_volume(self) -> float:
+        """Container volume not yet taken by placed units"""
+        return float(np.prod(self.bounds)) - self.packed_volume
+
+    @property
+    def points(self) -> np.ndarray:
+        """Live extreme points (P, 3)"""
+        return self._points[:self._slots][self._alive[:self._slots]]
+
+    def _add_points(self, points: np.ndarray, runs: np.ndarray):
+        count = points.shape[0]
+        while self._slots + count > self._points.shape[0]:
+            capacity = self._points.shape[0] * 2
+            for name in ("_points", "_runs", "_alive", "_blocker_lo", "_blocker_hi", "_support", "_rejected",
+                         "_slot_cell"):
+                old = getattr(self, name)
+                new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+                new[:self._slots] = old[:self._slots]
+                setattr(self, name, new)
+        slots = np.arange(self._slots, self._slots + count)
+        self._points[slots] = points
+        self._runs[slots] = runs
+        self._alive[slots] = True
+        self._blocker_lo[slots] = np.inf
+        self._blocker_hi[slots] = -np.inf
+        self._rejected[slots] = -1
+        self._support[slots] = np.inf
+        self._slots += count
+        for slot, point in zip(slots.tolist(), points.tolist()):
+            if point[2] > EPSILON:
+                level = self._level(point[2])
+                self._level_points.setdefault(level, []).append(slot)
+                self._support[slot] = self._surface_area(self._level_rows(self._surfaces, level),
+                                                         np.array([slot]))[0]
+            self._slot_cell[slot] = cell = self._file(slot, point)
+        cells = self._slot_cell[slots]
+        np.maximum.at(self._cell_bound, cells, np.column_stack([runs, self._support[slots]]))
+        self._cell_rejected[cells] = -1
+
+    def _file(self, slot: int, point: List[float]) -> int:
+        """Put a live point in the cell it sits in; returns the cell index"""
+        size = self.cell_size
+        key = (int(point[0] // size), int(point[1] // size), int(point[2] // size))
+        cell = self._cell_ids.get(key)
+        if cell is None:
+            cell = self._cell_ids[key] = len(self._cell_slots)
+            self._cell_slots.append([])
+            if cell == self._cell_bound.shape[0]:
+                self._cell_bound = np.concatenate([self._cell_bound, np.full_like(self._cell_bound, -np.inf)])
+                self._cell_rejected = np.concatenate([self._cell_rejected, np.full_like(self._cell_rejected, -1)])
+                self._cell_layer = np.concatenate([self._cell_layer, np.zeros_like(self._cell_layer)])
+            self._cell_layer[cell] = key[2]
+        self._cell_slots[cell].append(slot)
+        return cell
+
+    def _drop(self, slots: np.ndarray):
+        """Retire points and take them out of their cells"""
+        slots = np.unique(slots[self._alive[slots]])
+        self._alive[slots] = False
+        for slot, cell in zip(slots.tolist(), self._slot_cell[slots].tolist()):
+            members = self._cell_slots[cell]
+            members.remove(slot)
+            if not members:
+                self._cell_bound[cell] = -np.inf
+
+    def _tighten(self, cells: np.ndarray, slots: np.ndarray, sizes: np.ndarray):
+        """Reset the bounds of ``cells`` to those of the points they hold
+
+        ``slots`` lists the points of each cell in turn, ``sizes`` per cell.
+        """
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        self._cell_bound[cells, :3] = np.maximum.reduceat(self._runs[slots], starts, axis=0)
+        self._cell_bound[cells, 3] = np.maximum.reduceat(self._support[slots], starts)
+
+    def _points_in(self, lo, hi) -> np.ndarray:
+        """Live point slots filed in cells touching the region [lo, hi]"""
+        size = self.cell_size
+        x0, y0, z0 = (int((v - EPSILON) // size) for v in lo)
+        x1, y1, z1 = (int((v + EPSILON) // size) for v in hi)
+        found: List[int] = []
+        for key in itertools.product(range(x0, x1 + 1), range(y0, y1 + 1), range(z0, z1 + 1)):
+            cell = self._cell_ids.get(key)
+            if cell is not None:
+                found.extend(self._cell_slots[cell])
+        return np.array(found, dtype=np.int64)
+
+    @staticmethod
+    def _level(z: float) -> int:
+        # Heights within EPSILON of each other land in the same or adjacent levels
+        return int(np.floor(z / (2 * EPSILON)))
+
+    @staticmethod
+    def _level_rows(table: Dict[int, List[int]], level: int) -> np.ndarray:
+        return np.array([i for key in (level - 1, level, level + 1) for i in table.get(key, ())], dtype=np.int64)
+
+    def _surface_area(self, rows: np.ndarray, slots: np.ndarray) -> np.ndarray:
+        """Area of the top faces of ``rows`` level with each point and inside its free runs"""
+        if rows.size == 0:
+            return np.zeros(slots.size)
+        points = self._points[slots]
+        reach = points + self._runs[slots] + EPSILON
+        row_lo = self.state.lo[rows]
+        row_hi = self.state.hi[rows]
+        level = np.abs(row_hi[None, :, 2] - points[:, None, 2]) <= EPSILON
+        dx = np.minimum(reach[:, None, 0], row_hi[None, :, 0]) - np.maximum(points[:, None, 0], row_lo[None, :, 0])
+        dy = np.minimum(reach[:, None, 1], row_hi[None, :, 1]) - np.maximum(points[:, None, 1], row_lo[None, :, 1])
+        return np.where(level & (dx > 0) & (dy > 0), dx * dy, 0.0).sum(axis=1)
+
+    def _shape(self, dims: Tuple[float, float, float], rotatable: bool,
+               orientation: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Distinct oriented extents (K, 3) and their orientation indices"""
+        key = (dims, rotatable, orientation)
+        if key not in self._shapes:
+            if orientation is not None:
+                allowed = [orientation] if rotatable else [0]
+            else:
+                allowed = range(len(ORIENTATIONS) if rotatable else 1)
+            seen = {}
+            for o in allowed:
+                seen.setdefault(tuple(dims[a] for a in ORIENTATIONS[o][0]), o)
+            self._shapes[key] = (
+                np.array(list(seen.keys()), dtype=np.float64),
+                np.array(list(seen.values()), dtype=np.int8)
+            )
+        return self._shapes[key]
+
+    def place(self, dims: Tuple[float, float, float], rotatable: bool = True,
+              item_index: int = -1, orientation: Optional[int] = None) -> Optional[Tuple[Tuple[float, float, float], int]]:
+        """Place one unit; returns ((x, y, z), orientation index) or None
+
+        ``orientation`` pins a rotatable unit to one ORIENTATIONS entry.
+        """
+        placed = self._place_block(dims, rotatable, 1, item_index, orientation)
+        if placed is None:
+            return None
+        _, origin, orientation = placed
+        return origin, orientation
+
+    def place_run(self, dims: Tuple[float, float, float], rotatable: bool,
+                  count: int, item_index: int = -1, orientation: Optional[int] = None) -> int:
+        """Place up to ``count`` identical units; returns how many were placed"""
+        remaining = count
+        while remaining > 0:
+            placed = self._place_block(dims, rotatable, remaining, item_index, orientation)
+            if placed is None:
+                break
+            remaining -= placed[0]
+        return count - remaining
+
+    def _place_block(self, dims: Tuple[float, float, float], rotatable: bool, count: int,
+                     item_index: int, orientation: Optional[int] = None) -> Optional[Tuple[int, Tuple[float, float, float], int]]:
+        """Find the lowest, then back-most, then left-most feasible point and fill a block there"""
+        key = (dims, rotatable, orientation)
+        extents, orientations = self._shape(dims, rotatable, orientation)
+        if key != self._shape_key:
+            self._shape_key = key
+            self._shape_id += 1
+        # Only cells whose bound admits some orientation can hold the block
+        bound = self._cell_bound[:len(self._cell_slots)]
+        admits = ((extents[None, :, :] <= bound[:, None, :3] + EPSILON).all(axis=2) &
+                  ((extents[:, 0] * extents[:, 1] * self.min_support)[None, :] <= bound[:, None, 3] + EPSILON))
+        cells = np.flatnonzero(admits.any(axis=1) & (self._cell_rejected[:bound.shape[0]] != self._shape_id))
+        if cells.size == 0:
+            return None
+
+        # Layers of cells hold points at increasing heights, so searching
+        # whole layers bottom-up finds the lowest feasible point first.
+        # Layers are searched together until enough points are gathered.
+        cells = cells[np.argsort(self._cell_layer[cells], kind="stable")]
+        members = [self._cell_slots[cell] for cell in cells.tolist()]
+        sizes = np.fromiter(map(len, members), dtype=np.int64, count=cells.size)
+        layers = self._cell_layer[cells]
+        ends = np.append(np.flatnonzero(layers[1:] != layers[:-1]) + 1, cells.size)
+        first = 0
+        while first < cells.size:
+            # Up to the end of the layer in which the batch fills up
+            filled = first + min(int(np.searchsorted(np.cumsum(sizes[first:]), self.search_batch)), cells.size - first - 1)
+            last = int(ends[np.searchsorted(ends, filled, side="right")])
+            batch = cells[first:last]
+            slots = np.fromiter(itertools.chain.from_iterable(members[first:last]), dtype=np.int64,
+                                count=int(sizes[first:last].sum()))
+            # Bounds only grow as points are filed; bring the gathered cells
+            # back down to what their points can hold today
+            self._tighten(batch, slots, sizes[first:last])
+            placed = self._place_in(slots, extents, orientations, count, item_index)
+            if placed is not None:
+                return placed
+            self._cell_rejected[batch] = self._shape_id
+            first = last
+        return None
+
+    def _place_in(self, slots: np.ndarray, extents: np.ndarray, orientations: np.ndarray,
+                  count: int, item_index: int) -> Optional[Tuple[int, Tuple[float, float, float], int]]:
+        """First feasible point among ``slots`` in (z, y, x) order, filled with a block"""
+        points = self._points[slots]
+        # Free runs along each axis bound what fits at a point, and a known
+        # blocker rejects what reaches it, so this filters out most
+        # candidates before any collision query
+        hi = points[:, None, :] + extents[None, :, :]
+        in_bounds = (extents[None, :, :] <= self._runs[slots][:, None, :] + EPSILON).all(axis=2)
+        in_bounds &= (extents[:, 0] * extents[:, 1] * self.min_support)[None, :] <= self._support[slots][:, None] + EPSILON
+        in_bounds &= ~((self._blocker_lo[slots][:, None, :] < hi - EPSILON).all(axis=2) &
+                       (points < self._blocker_hi[slots] - EPSILON).all(axis=1)[:, None])
+        candidates = np.flatnonzero(in_bounds.any(axis=1) & (self._rejected[slots] != self._shape_id))
+        if candidates.size == 0:
+            return None
+        candidates = candidates[np.lexsort((points[candidates, 0], points[candidates, 1], points[candidates, 2]))]
+        order, points, in_bounds = slots[candidates], points[candidates], in_bounds[candidates]
+
+        # Test candidate points in growing chunks: the first point usually
+        # wins, and when it does not, later points are checked together
+        start, chunk = 0, 1
+        while start < order.size:
+            batch = slice(start, start + chunk)
+            pair_point, pair_shape = np.nonzero(in_bounds[batch])
+            lo = points[batch][pair_point]
+            # Query the grid once per point over the union of its orientations
+            reach = np.where(in_bounds[batch][:, :, None], extents[None, :, :], 0.0).max(axis=1)
+            nearby = self._nearby(points[batch], points[batch] + reach, lo.shape[0])
+            # and once per point for the surfaces under all its orientations
+            base_lo = points[batch] - (0.0, 0.0, self.cell_size)
+            base_hi = points[batch] + reach * (1.0, 1.0, 0.0)
+            below = self._nearby(base_lo, base_hi, lo.shape[0])
+            free, blockers = self._free_mask(lo, lo + extents[pair_shape], nearby, below)
+
+            if free.any():
+                winner = pair_point[free].min()
+                point = points[start + winner]
+                # Prefer the orientation that keeps the pile lowest and tightest
+                options = pair_shape[free & (pair_point == winner)]
+                best = options[0]
+                if options.size > 1:
+                    tops = point + extents[options]
+                    best = options[np.lexsort((tops[:, 0], tops[:, 1], tops[:, 2]))[0]]
+                counts = self._block_counts(point, extents[best], count)
+                self._commit(int(order[start + winner]), extents[best], counts, int(orientations[best]), item_index)
+                x, y, z = point.tolist()
+                return int(np.prod(counts)), (x, y, z), int(orientations[best])
+
+            self._remember_blockers(order[batch], pair_point, lo, blockers)
+            self._rejected[order[batch]] = self._shape_id
+            start += chunk
+            chunk = min(chunk * 2, 16)
+        return None
+
+    def _remember_blockers(self, slots: np.ndarray, pair_point: np.ndarray, lo: np.ndarray,
+                           blockers: np.ndarray):
+        """Keep, per point, the colliding box closest to it"""
+        hit = blockers >= 0
+        if not hit.any():
+            return
+        # A box close to the point on every axis blocks the most shapes
+        reach = np.maximum(self.state.lo[blockers[hit]] - lo[hit], 0.0).max(axis=1)
+        pair_point = pair_point[hit]
+        best = np.lexsort((reach, pair_point))
+        first = np.ones(best.size, dtype=bool)
+        first[1:] = pair_point[best][1:] != pair_point[best][:-1]
+        chosen = best[first]
+        targets = slots[pair_point[chosen]]
+        rows = blockers[hit][chosen]
+        self._blocker_lo[targets] = self.state.lo[rows]
+        self._blocker_hi[targets] = self.state.hi[rows]
+
+    def _nearby(self, lo, hi, queries: Optional[int] = None) -> np.ndarray:
+        """Rows that may touch any of the query regions [lo, hi) of shape (Q, 3)"""
+        lo = np.atleast_2d(np.asarray(lo, dtype=np.float64))
+        hi = np.atleast_2d(np.asarray(hi, dtype=np.float64))
+        queries = lo.shape[0] if queries is None else queries
+        if self.state.size * queries <= self.brute_force_pairs:
+            return np.arange(self.state.size)
+        return self.index.candidates_many(lo, hi)
+
+    def _free_mask(self, lo: np.ndarray, hi: np.ndarray, nearby: Optional[np.ndarray] = None,
+                   below: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Collision and support mask for candidate boxes [lo, hi) of shape (Q, 3)
+
+        ``nearby`` and ``below`` are the rows around the boxes and under
+        their footprints, looked up when not given. Also returns, per
+        candidate, the row it collides with (-1 if none).
+        """
+        if nearby is None:
+            nearby = self._nearby(lo, hi)
+        blockers = self.state.nearest_overlap(nearby, lo, hi)
+        free = blockers < 0
+        raised = free & (lo[:, 2] > EPSILON)
+        if raised.any():
+            if below is None:
+                base_lo = lo[raised].copy()
+                base_hi = hi[raised].copy()
+                base_hi[:, 2] = base_lo[:, 2]
+                base_lo[:, 2] -= self.cell_size
+                below = self._nearby(base_lo, base_hi)
+            extent = hi[raised] - lo[raised]
+            supported = self.state.supported_area(below, lo[raised], hi[raised])
+            free[raised] = supported >= extent[:, 0] * extent[:, 1] * self.min_support - EPSILON
+        return free, blockers
+
+    def _block_counts(self, point: np.ndarray, extent: np.ndarray, count: int) -> np.ndarray:
+        """Largest collision-free grid of whole rows/layers (nx, ny, nz) at ``point``"""
+        if count == 1:
+            return np.ones(3, dtype=np.int64)
+        fit = np.floor((self.bounds - point + EPSILON) / extent).astype(np.int64)
+        nx = int(min(fit[0], count, self.max_block_units))
+        ny = int(min(fit[1], count // nx, self.max_block_units // nx))
+        nz = int(min(fit[2], count // (nx * ny), self.max_block_units // (nx * ny)))
+
+        grid = np.stack(np.meshgrid(np.arange(nx), np.arange(ny), np.arange(nz), indexing="ij"), axis=-1)
+        lo = point + grid.reshape(-1, 3) * extent
+        hi = lo + extent
+        ids = self._nearby(point, point + extent * (nx, ny, nz), queries=lo.shape[0])
+        free = ~self.state.overlaps(ids, lo, hi)
+        if point[2] > EPSILON:
+            # Only the bottom layer rests on existing boxes; upper layers
+            # sit on the block itself
+            bottom = grid.reshape(-1, 3)[:, 2] == 0
+            below = self._nearby(
+                (point[0], point[1], point[2] - self.cell_size),
+                (point[0] + extent[0] * nx, point[1] + extent[1] * ny, point[2]),
+                queries=int(bottom.sum())
+            )
+            supported = self.state.supported_area(below, lo[bottom], hi[bottom])
+            free[bottom] &= supported >= extent[0] * extent[1] * self.min_support - EPSILON
+        free = free.reshape(nx, ny, nz)
+
+        # Shrink to the largest free prefix: first along x, then whole rows, then whole layers
+        nx = int(np.cumprod(free[:, 0, 0]).sum())
+        ny = int(np.cumprod(free[:nx, :, 0].all(axis=0)).sum())
+        nz = int(np.cumprod(free[:nx, :ny, :].all(axis=(0, 1))).sum())
+        return np.array([nx, ny, nz], dtype=np.int64)
+
+    def _commit(self, slot: int, extent: np.ndarray, counts: np.ndarray,
+                orientation: int, item_index: int):
+        """Register a placed block of units as one row and spawn its extreme points"""
+        origin = self._points[slot].copy()
+        top = origin + extent * counts
+        row = self.state.add(origin, extent, orientation, item_index, counts)
+        self.packed_volume += float(np.prod(top - origin))
+        self.index.insert(row, origin.tolist(), top.tolist())
+
+        # The new top face raises the support bound of points level with it
+        level = self._level(top[2])
+        self._surfaces.setdefault(level, []).append(row)
+        slots = [s for key in (level - 1, level, level + 1) for s in self._prune_level(key)]
+        if slots:
+            slots = np.array(slots, dtype=np.int64)
+            self._support[slots] += self._surface_area(np.array([row]), slots)
+            np.maximum.at(self._cell_bound[:, 3], self._slot_cell[slots], self._support[slots])
+
+        # Drop the used point and any points swallowed by the new block
+        inside = self._points_in(origin.tolist(), top.tolist())
+        inside = inside[((self._points[inside] >= origin - EPSILON) &
+                         (self._points[inside] < top - EPSILON)).all(axis=1)]
+        self._drop(np.append(inside, slot))
+
+        # Only points whose +x, +y or +z ray can reach the block lie in its
+        # shadow along that axis; shorten their free runs
+        shaded = np.unique(np.concatenate([
+            self._points_in([0.0 if a == axis else origin[a] for a in range(3)], top.tolist())
+            for axis in range(3)
+        ]))
+        if shaded.size:
+            self._runs[shaded] = clip_free_run(self._points[shaded], self._runs[shaded], origin, top)
+
+        # Lateral points fall onto whatever surface lies beneath them
+        spawned = np.array([
+            (top[0], origin[1], origin[2]),
+            (origin[0], top[1], origin[2]),
+            (origin[0], origin[1], top[2]),
+        ])
+        column = self._nearby(
+            (origin[0], origin[1], 0.0),
+            (top[0] + EPSILON * 2, top[1] + EPSILON * 2, origin[2] + EPSILON),
+            queries=2
+        )
+        spawned[:2, 2] = self.state.surface_below(column, spawned[:2])
+
+        valid = (spawned < self.bounds - EPSILON).all(axis=1)
+        for i, point in enumerate(spawned.tolist()):
+            existing = self._points_in(point, point)
+            if valid[i] and existing.size:
+                valid[i] = not (np.abs(self._points[existing] - point) <= EPSILON).all(axis=1).any()
+        valid &= ~self.state.contains(
+            self._nearby(spawned, spawned + EPSILON * 2), spawned
+        )
+        fresh = spawned[valid]
+        if fresh.size:
+            # Each ray only meets the boxes along its own line of cells
+            ray_lo = np.repeat(fresh, 3, axis=0)
+            ray_hi = ray_lo + EPSILON * 2
+            axes = np.tile(np.arange(3), fresh.shape[0])
+            ray_hi[np.arange(ray_hi.shape[0]), axes] = self.bounds[axes]
+            self._add_points(fresh, self.state.free_run(self._nearby(ray_lo, ray_hi), fresh, self.bounds))
+
+    def _prune_level(self, level: int) -> List[int]:
+        """Live point slots at ``level``, forgetting the retired ones"""
+        slots = self._level_points.get(level)
+        if not slots:
+            return []
+        alive = self._alive
+        slots[:] = [s for s in slots if alive[s]]
+        return slots
+
+
 class PackingOptimizer:
-    def __init__(self):
+    def __init__(self, min_support: float = 0.75):
+        self.min_support = min_support
         self.padding_thickness = {
             "bubble_wrap": 2.0,
             "air_cushions": 3.0,
@@ -19,68 +538,262 @@ class PackingOptimizer:
         base_thickness = self.padding_thickness.get(void_fill, 2.0)
         return base_thickness * (1 + fragility)
 
-    def optimize(self, items: List[ItemInput], box: BoxOutput) -> PackingPlan:
-        """Optimize packing arrangement (simplified implementation)"""
+    def unit_padding(self, item: ItemInput, void_fill: str) -> float:
+        """Padding added to every edge of a fragile unit (half on each face); zero otherwise"""
+        if item.fragility <= FRAGILE_THRESHOLD:
+            return 0.0
+        return self._calculate_padding(item.fragility, void_fill)
+
+    def unit_dims(self, item: ItemInput, void_fill: str) -> Tuple[float, float, float]:
+        """Space one unit of ``item`` takes up in the box, padding included"""
+        padding = self.unit_padding(item, void_fill)
+        return item.length + padding, item.width + padding, item.height + padding
+
+    def _grid_cell_size(self, items: List[ItemInput], bounds: Tuple[float, float, float]) -> float:
+        """Pick a grid resolution close to the typical item edge"""
+        dims = [d for i in items for d in (i.length, i.width, i.height)]
+        floor = max(bounds) / 64
+        return max(float(np.median(dims)) if dims else floor, floor)
+
+    def sort_items(self, items: List[ItemInput]) -> List[ItemInput]:
+        """Order lines by unit volume (largest first), heavier first on ties"""
+        return sorted(
+            items,
+            key=lambda x: (x.length * x.width * x.height, x.weight),
+            reverse=True
+        )
+
+    def new_packer(self, length: float, width: float, height: float,
+                   items: List[ItemInput]) -> ExtremePointPacker:
+        """Create an empty placement engine sized for ``items``"""
+        total_units = sum(i.quantity for i in items)
+        return ExtremePointPacker(
+            length, width, height,
+            cell_size=self._grid_cell_size(items, (length, width, height)),
+            min_support=self.min_support,
+            capacity=min(total_units, 65536)
+        )
+
+    def _pack_sequence(self, box: BoxOutput, sorted_items: List[ItemInput],
+                       sequence: Sequence) -> Tuple[ExtremePointPacker, List[ItemInput]]:
+        """Pack lines in ``sequence`` order; entries are (item index, pinned orientation or None)"""
+        packer = self.new_packer(box.length, box.width, box.height, sorted_items)
+        unpacked_items = []
+        for item_index, orientation in sequence:
+            item = sorted_items[item_index]
+            dims = self.unit_dims(item, box.recommended_void_fill)
+            placed = packer.place_run(dims, item.is_rotatable, item.quantity, item_index, orientation)
+            unpacked_items.extend([item] * (item.quantity - placed))
+        return packer, unpacked_items
+
+    def _score(self, packer: ExtremePointPacker) -> Tuple[float, float]:
+        """Plan quality: packed volume first, then the lowest stack"""
+        state = packer.state
+        height = float(state.hi[:state.size, 2].max()) if state.size else 0.0
+        return round(packer.packed_volume, 6), -height
+
+    def _perturb(self, sequence: List[Tuple[int, Optional[int]]], sorted_items: List[ItemInput],
+                 rng: random.Random) -> List[Tuple[int, Optional[int]]]:
+        """Neighbouring sequence: swap two lines, move one earlier, or re-orient one"""
+        sequence = list(sequence)
+        move = rng.random()
+        position = rng.randrange(len(sequence))
+        if move < 0.4 and len(sequence) > 1:
+            other = rng.randrange(len(sequence))
+            sequence[position], sequence[other] = sequence[other], sequence[position]
+        elif move < 0.7 and position > 0:
+            sequence.insert(rng.randrange(position), sequence.pop(position))
+        else:
+            item_index, orientation = sequence[position]
+            if sorted_items[item_index].is_rotatable:
+                choices = [None] + [o for o in range(len(ORIENTATIONS)) if o != orientation]
+                sequence[position] = (item_index, rng.choice(choices))
+        return sequence
+
+    def optimize(self, items: List[ItemInput], box: BoxOutput, deadline_ms: Optional[float] = None,
+                 seed: int = 0, compact: bool = False) -> PackingPlan:
+        """Optimize packing arrangement with extreme-point placement
+
+        The volume-sorted greedy plan is built first. With ``deadline_ms``
+        set, local search over the line order and orientations then keeps
+        improving it until the budget is spent, and the best plan found is
+        returned (anytime behaviour). ``compact`` reports placements as
+        blocks of identical units instead of one entry per unit.
+        """
         try:
-            # Sort items by volume (largest first)
-            sorted_items = sorted(
-                items,
-                key=lambda x: x.length * x.width * x.height * x.quantity,
-                reverse=True
-            )
+            started = time.perf_counter()
+            stop_at = started + (deadline_ms or 0) / 1000
 
-            packed_items = []
-            z_position = 0
-            
-            for item in sorted_items:
-                # Simple packing logic - place items vertically stacked
-                for _ in range(item.quantity):
-                    packed_items.append(
-                        PackedItem(
-                            item=item,
-                            position=Position(
-                                x=0,
-                                y=0,
-                                z=z_position
-                            ),
-                            rotation=Rotation()
-                        )
-                    )
-                    z_position += item.height + self._calculate_padding(
-                        item.fragility,
-                        box.recommended_void_fill
+            sorted_items = self.sort_items(items)
+            sequence = [(item_index, None) for item_index in range(len(sorted_items))]
+            packer, unpacked_items = self._pack_sequence(box, sorted_items, sequence)
+            best_score = self._score(packer)
+            box_volume = box.length * box.width * box.height
+
+            def sample() -> UtilizationSample:
+                return UtilizationSample(
+                    elapsed_ms=(time.perf_counter() - started) * 1000,
+                    utilization=packer.state.utilization(box_volume),
+                    packed_height=-best_score[1]
+                )
+
+            history = [sample()]
+            iterations = 0
+            searchable = len(sequence) > 1 or any(i.is_rotatable for i in sorted_items)
+            rng = random.Random(seed)
+            last_duration = time.perf_counter() - started
+
+            # Stop early rather than overrun: an iteration costs about as much as the last one
+            while searchable and deadline_ms and time.perf_counter() + last_duration < stop_at:
+                iteration_started = time.perf_counter()
+                candidate = self._perturb(sequence, sorted_items, rng)
+                candidate_packer, candidate_unpacked = self._pack_sequence(box, sorted_items, candidate)
+                score = self._score(candidate_packer)
+                iterations += 1
+                # Accept sideways moves too so the search can cross plateaus
+                if score >= best_score:
+                    improved = score > best_score
+                    sequence, packer, unpacked_items, best_score = (
+                        candidate, candidate_packer, candidate_unpacked, score
                     )
+                    if improved:
+                        history.append(sample())
+                last_duration = time.perf_counter() - iteration_started
 
-            # Calculate space utilization
-            total_item_volume = sum(
-                i.length * i.width * i.height * i.quantity
-                for i in items
-            )
-            utilization = total_item_volume / box.volume
-
-            # Generate packing instructions
-            instructions = [
-                "Place heaviest items at the bottom",
-                f"Use {box.recommended_void_fill.replace('_', ' ')} for padding",
-                "Fill empty spaces with cushioning material",
-                "Seal box with reinforced tape"
-            ]
-
-            if any(i.fragility > 0.7 for i in items):
-                instructions.insert(1, "Extra padding for fragile items")
-
-            return PackingPlan(
-                box=box,
-                items=packed_items,
-                space_utilization=utilization,
-                estimated_cost_saving=self._estimate_cost_saving(utilization),
-                packing_instructions=instructions
-            )
+            placement_time_ms = (time.perf_counter() - started) * 1000
+            plan = self.build_plan(box, packer, sorted_items, unpacked_items, placement_time_ms, compact)
+            plan.search_iterations = iterations
+            plan.utilization_history = history
+            return plan
 
         except Exception as e:
             logger.error(f"Packing optimization failed: {str(e)}")
             raise
 
+    def build_plan(self, box: BoxOutput, packer: ExtremePointPacker, sorted_items: List[ItemInput],
+                   unpacked_items: List[ItemInput], placement_time_ms: float,
+                   compact: bool = False) -> PackingPlan:
+        """Turn a filled placement engine into the API packing plan"""
+        state = packer.state
+        placed_lines = state.item_index[:state.size]
+        # Placed extents include fragile padding; utilization counts the items themselves
+        unit_volumes = np.array([i.length * i.width * i.height for i in sorted_items])
+        packed = float((unit_volumes[placed_lines] * state.unit_counts).sum())
+        utilization = min(packed / (box.length * box.width * box.height), 1.0)
+        # Each unit sits centred in its padded slot
+        insets = np.array([self.unit_padding(i, box.recommended_void_fill) / 2 for i in sorted_items])
+        if compact:
+            packed_items = []
+            packed_blocks = self._to_packed_blocks(state, sorted_items, insets)
+        else:
+            packed_items = self._to_packed_items(state, sorted_items, insets)
+            packed_blocks = []
+        present = [sorted_items[i] for i in np.unique(placed_lines)]
+
+        # Generate packing instructions
+        instructions = [
+            "Place heaviest items at the bottom",
+            f"Use {box.recommended_void_fill.replace('_', ' ')} for padding",
+            "Fill empty spaces with cushioning material",
+            "Seal box with reinforced tape"
+        ]
+
+        if any(i.fragility > FRAGILE_THRESHOLD for i in present + unpacked_items):
+            instructions.insert(1, "Extra padding for fragile items")
+
+        if unpacked_items:
+            instructions.insert(
+                len(instructions) - 1,
+                f"{len(unpacked_items)} unit(s) did not fit - use an additional box"
+            )
+
+        logger.debug(
+            f"Placed {state.units} units ({len(unpacked_items)} unplaced) "
+            f"in {placement_time_ms:.2f} ms"
+        )
+
+        # Every part is already a validated model; validating the plan
+        # would copy each nested item again
+        plan = PackingPlan.construct(
+            box=box,
+            items=packed_items,
+            blocks=packed_blocks,
+            unpacked_items=self.group_units(unpacked_items) if compact else unpacked_items,
+            space_utilization=float(utilization),
+            estimated_cost_saving=float(self._estimate_cost_saving(utilization)),
+            packing_instructions=instructions,
+            placement_time_ms=placement_time_ms,
+            search_iterations=0,
+            utilization_history=[]
+        )
+        plan._layout = PlanLayout(
+            items=sorted_items,
+            line=placed_lines.copy(),
+            origin=state.origins.copy(),
+            inset=insets[placed_lines],
+            pitch=state.pitch,
+            counts=state.counts[:state.size].copy(),
+            orientation=state.orientation[:state.size].copy()
+        )
+        return plan
+
+    def _to_packed_items(self, state: PlacementState, items: List[ItemInput],
+                         insets: np.ndarray) -> List[PackedItem]:
+        """Convert the array-backed placement state into response objects, one per unit"""
+        # Geometry comes straight from the validated engine, so skip
+        # re-validating every nested model
+        rotations = [
+            Rotation.construct(x=rx, y=ry, z=rz)
+            for _, (rx, ry, rz) in ORIENTATIONS
+        ]
+        origins, rows = state.unit_origins()
+        item_index = state.item_index[rows]
+        return [
+            PackedItem.construct(
+                item=items[line],
+                position=Position.construct(x=x, y=y, z=z),
+                rotation=rotations[orientation]
+            )
+            for (x, y, z), orientation, line in zip(
+                (origins + insets[item_index, None]).tolist(),
+                state.orientation[rows].tolist(),
+                item_index.tolist()
+            )
+        ]
+
+    def _to_packed_blocks(self, state: PlacementState, items: List[ItemInput],
+                          insets: np.ndarray) -> List[PackedBlock]:
+        """Describe each placed block by its origin, pitch and unit counts"""
+        rotations = [
+            Rotation.construct(x=rx, y=ry, z=rz)
+            for _, (rx, ry, rz) in ORIENTATIONS
+        ]
+        item_index = state.item_index[:state.size]
+        return [
+            PackedBlock.construct(
+                item=items[line],
+                origin=Position.construct(x=x, y=y, z=z),
+                pitch=Position.construct(x=dx, y=dy, z=dz),
+                counts=tuple(counts),
+                rotation=rotations[orientation]
+            )
+            for (x, y, z), (dx, dy, dz), counts, orientation, line in zip(
+                (state.origins + insets[item_index, None]).tolist(),
+                state.pitch.tolist(),
+                state.counts[:state.size].tolist(),
+                state.orientation[:state.size].tolist(),
+                item_index.tolist()
+            )
+        ]
+
+    def group_units(self, units: List[ItemInput]) -> List[ItemInput]:
+        """Collapse repeated unit entries into one line each with their count as quantity"""
+        counts: Dict[int, List] = {}
+        for unit in units:
+            entry = counts.setdefault(id(unit), [unit, 0])
+            entry[1] += 1
+        return [unit.copy(update={"quantity": count}) for unit, count in counts.values()]
+
     def _estimate_cost_saving(self, utilization: float) -> float:
         """Estimate cost savings based on space utilization"""
         # Simple heuristic - better utilization = higher savings
@@ -90,6 +803,10 @@ class PackingOptimizer:
 # Singleton optimizer instance
 optimizer = PackingOptimizer()
 
-def optimize_packing(items: List[ItemInput], box: BoxOutput) -> PackingPlan:
-    """Public interface for packing optimization"""
-    return optimizer.optimize(items, box)
\ No newline at end of file
+def optimize_packing(items: List[ItemInput], box: BoxOutput,
+                     deadline_ms: Optional[float] = None, compact: bool = False) -> PackingPlan:
+    """Public interface for packing optimization; repeat orders are served from the plan cache"""
+    return plan_cache.get_or_compute(
+        items, box, lambda: optimizer.optimize(items, box, deadline_ms, compact=compact),
+        variant=plan_variant(deadline_ms, compact)
+    )
\ No newline at end of file
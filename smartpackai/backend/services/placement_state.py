@@ -0,0 +1,207 @@
+# backend/services/placement_state.py
+from typing import Optional, Tuple
+import numpy as np
+
+from services.spatial_index import EPSILON
+
+
+class PlacementState:
+    """Structure-of-arrays store for placed boxes.
+
+    Rows hold the lower corner, upper corner, unit counts along x/y/z,
+    orientation index and source item index of each placed block of
+    identical units; a single unit is a block of (1, 1, 1). Units in a block
+    touch, so the block is one solid box to every geometric query and units
+    are only expanded when a plan is written out. Arrays grow geometrically
+    so appends stay amortised O(1), and every geometric query runs as a
+    single vectorized expression over a subset of rows.
+    """
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(int(capacity), 1)
+        self.size = 0
+        self.lo = np.empty((capacity, 3), dtype=np.float64)
+        self.hi = np.empty((capacity, 3), dtype=np.float64)
+        self.counts = np.empty((capacity, 3), dtype=np.int64)
+        self.orientation = np.empty(capacity, dtype=np.int8)
+        self.item_index = np.empty(capacity, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self):
+        capacity = self.lo.shape[0] * 2
+        for name in ("lo", "hi", "counts", "orientation", "item_index"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, origin, extent, orientation: int, item_index: int, counts=(1, 1, 1)) -> int:
+        """Append a block of ``counts`` units of size ``extent`` and return its row id"""
+        if self.size == self.lo.shape[0]:
+            self._grow()
+        row = self.size
+        self.lo[row] = origin
+        self.hi[row] = (origin[0] + extent[0] * counts[0],
+                        origin[1] + extent[1] * counts[1],
+                        origin[2] + extent[2] * counts[2])
+        self.counts[row] = counts
+        self.orientation[row] = orientation
+        self.item_index[row] = item_index
+        self.size += 1
+        return row
+
+    @property
+    def origins(self) -> np.ndarray:
+        return self.lo[:self.size]
+
+    @property
+    def extents(self) -> np.ndarray:
+        return self.hi[:self.size] - self.lo[:self.size]
+
+    @property
+    def pitch(self) -> np.ndarray:
+        """Extent of one unit of each block"""
+        return self.extents / self.counts[:self.size]
+
+    @property
+    def unit_counts(self) -> np.ndarray:
+        """Number of units in each block"""
+        return self.counts[:self.size].prod(axis=1)
+
+    @property
+    def units(self) -> int:
+        return int(self.unit_counts.sum())
+
+    def unit_origins(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Lower corner of every unit (U, 3) and the row it belongs to
+
+        Units of a block are listed in x-major order.
+        """
+        return expand_blocks(self.origins, self.pitch, self.counts[:self.size])
+
+    def overlaps(self, ids: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Overlap mask of K query boxes against rows ``ids``; lo may broadcast"""
+        if ids.size == 0:
+            return np.zeros(hi.shape[0], dtype=bool)
+        row_lo = self.lo[ids]
+        row_hi = self.hi[ids]
+        hit = ((lo[:, None, :] < row_hi[None, :, :] - EPSILON) &
+               (row_lo[None, :, :] < hi[:, None, :] - EPSILON)).all(axis=2)
+        return hit.any(axis=1)
+
+    def nearest_overlap(self, ids: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Per query box, the overlapping row of ``ids`` closest to its lower corner (-1 if none)"""
+        if ids.size == 0:
+            return np.full(hi.shape[0], -1, dtype=np.int64)
+        row_lo = self.lo[ids]
+        row_hi = self.hi[ids]
+        hit = ((lo[:, None, :] < row_hi[None, :, :] - EPSILON) &
+               (row_lo[None, :, :] < hi[:, None, :] - EPSILON)).all(axis=2)
+        nearest = np.full(hi.shape[0], -1, dtype=np.int64)
+        query, row = np.nonzero(hit)
+        if query.size:
+            reach = np.maximum(row_lo[row] - lo[query], 0.0).max(axis=1)
+            order = np.lexsort((reach, query))
+            first = np.ones(order.size, dtype=bool)
+            first[1:] = query[order][1:] != query[order][:-1]
+            nearest[query[order][first]] = np.asarray(ids)[row[order][first]]
+        return nearest
+
+    def supported_area(self, ids: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Area of each query footprint resting on top faces of rows ``ids``"""
+        if ids.size == 0:
+            return np.zeros(hi.shape[0])
+        row_lo = self.lo[ids]
+        row_hi = self.hi[ids]
+        touching = np.abs(row_hi[None, :, 2] - lo[:, None, 2]) <= EPSILON
+        dx = np.minimum(hi[:, None, 0], row_hi[None, :, 0]) - np.maximum(lo[:, None, 0], row_lo[None, :, 0])
+        dy = np.minimum(hi[:, None, 1], row_hi[None, :, 1]) - np.maximum(lo[:, None, 1], row_lo[None, :, 1])
+        area = np.where(touching & (dx > EPSILON) & (dy > EPSILON), dx * dy, 0.0)
+        return area.sum(axis=1)
+
+    def contains(self, ids: np.ndarray, points: np.ndarray) -> np.ndarray:
+        """Mask of points (P, 3) lying inside any of rows ``ids``"""
+        if ids.size == 0 or points.shape[0] == 0:
+            return np.zeros(points.shape[0], dtype=bool)
+        row_lo = self.lo[ids]
+        row_hi = self.hi[ids]
+        inside = ((points[:, None, :] >= row_lo[None, :, :] - EPSILON) &
+                  (points[:, None, :] < row_hi[None, :, :] - EPSILON)).all(axis=2)
+        return inside.any(axis=1)
+
+    def surface_below(self, ids: np.ndarray, points: np.ndarray) -> np.ndarray:
+        """Highest top face at or below each point (P, 3) covering its (x, y) column"""
+        if ids.size == 0:
+            return np.zeros(points.shape[0])
+        row_lo = self.lo[ids]
+        row_hi = self.hi[ids]
+        x = points[:, None, 0]
+        y = points[:, None, 1]
+        covers = ((row_lo[None, :, 0] - EPSILON <= x) & (x < row_hi[None, :, 0] - EPSILON) &
+                  (row_lo[None, :, 1] - EPSILON <= y) & (y < row_hi[None, :, 1] - EPSILON) &
+                  (row_hi[None, :, 2] <= points[:, None, 2] + EPSILON))
+        return np.where(covers, row_hi[None, :, 2], 0.0).max(axis=1)
+
+    def free_run(self, ids: np.ndarray, points: np.ndarray, bounds) -> np.ndarray:
+        """Free distance from each point (P, 3) along +x, +y and +z
+
+        Rays stop at the container walls or the first of rows ``ids`` they
+        hit. This bounds the box that can be anchored at a point, so most
+        infeasible candidates are rejected without a collision query.
+        Pass only the rows along the rays (e.g. from a SpatialGrid query);
+        the cost is proportional to points times ``ids``.
+        """
+        run = np.asarray(bounds, dtype=np.float64) - points
+        if ids.size == 0 or points.shape[0] == 0:
+            return run
+        return clip_free_run(points, run, self.lo[ids], self.hi[ids])
+
+    def within(self, bounds) -> bool:
+        """True if every placed box lies inside the container"""
+        if self.size == 0:
+            return True
+        return bool((self.lo[:self.size] >= -EPSILON).all() and
+                    (self.hi[:self.size] <= np.asarray(bounds) + EPSILON).all())
+
+    def packed_volume(self, rows: Optional[np.ndarray] = None) -> float:
+        """Total volume of the placed boxes (optionally a subset)"""
+        extents = self.extents if rows is None else self.hi[rows] - self.lo[rows]
+        return float(np.prod(extents, axis=1).sum())
+
+    def utilization(self, container_volume: float) -> float:
+        """Fraction of the container volume occupied by placed boxes"""
+        if container_volume <= 0:
+            return 0.0
+        return min(self.packed_volume() / container_volume, 1.0)
+
+
+def expand_blocks(origins: np.ndarray, pitch: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Lower corner of every unit (U, 3) of blocks given by origin, pitch and counts, and its block
+
+    Units of a block are listed in x-major order.
+    """
+    sizes = counts.prod(axis=1)
+    rows = np.repeat(np.arange(len(sizes)), sizes)
+    # Grid step of each unit inside its block, from its rank in the block
+    rank = np.arange(rows.size) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    ny = counts[rows, 1]
+    nz = counts[rows, 2]
+    steps = np.stack([rank // (ny * nz), rank // nz % ny, rank % nz], axis=1)
+    return origins[rows] + steps * pitch[rows], rows
+
+
+def clip_free_run(points: np.ndarray, run: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Shorten the +x/+y/+z free runs of ``points`` at boxes [lo, hi) of shape (N, 3)"""
+    lo = np.atleast_2d(lo)
+    hi = np.atleast_2d(hi)
+    run = run.copy()
+    for axis, (a, b) in enumerate(((1, 2), (0, 2), (0, 1))):
+        hit = ((lo[None, :, a] - EPSILON <= points[:, None, a]) & (points[:, None, a] < hi[None, :, a] - EPSILON) &
+               (lo[None, :, b] - EPSILON <= points[:, None, b]) & (points[:, None, b] < hi[None, :, b] - EPSILON) &
+               (hi[None, :, axis] > points[:, None, axis] + EPSILON))
+        if hit.any():
+            gap = np.where(hit, np.maximum(lo[None, :, axis] - points[:, None, axis], 0.0), np.inf)
+            run[:, axis] = np.minimum(run[:, axis], gap.min(axis=1))
+    return run
\ No newline at end of file
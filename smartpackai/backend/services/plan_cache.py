@@ -0,0 +1,185 @@
+# backend/services/plan_cache.py
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import hashlib
+import math
+import os
+import pickle
+import threading
+import time
+from models.item_schema import ItemInput, BoxOutput, PackingPlan
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_key(items: List[ItemInput], box: BoxOutput, variant: str = "") -> str:
+    """Order-independent cache key for an order packed into ``box``
+
+    ``variant`` separates plans computed differently for the same order,
+    e.g. greedy plans from ones improved by a search budget.
+    """
+    lines = sorted(
+        (i.length, i.width, i.height, i.weight, i.fragility, i.quantity, i.is_rotatable)
+        for i in items
+    )
+    order = (tuple(lines), (box.length, box.width, box.height, box.recommended_void_fill), variant)
+    return hashlib.sha1(repr(order).encode("utf-8")).hexdigest()
+
+
+def plan_variant(deadline_ms: Optional[float] = None, compact: bool = False) -> str:
+    """Cache variant for the options that change the plan an order produces
+
+    Anytime plans are bucketed by the power of two of their search budget,
+    so a plan found in 50 ms is never served to a caller who allowed 2 s.
+    """
+    anytime = f"anytime@{int(math.log2(max(deadline_ms, 1.0)))}" if deadline_ms else ""
+    return "|".join(flag for flag in (anytime, "compact" if compact else "") if flag)
+
+
+class PlanCache:
+    """Bounded LRU cache of packing plans with per-entry TTL.
+
+    Entries expire ``ttl_seconds`` after they were stored (wall-clock, so
+    expiry survives a restart when the cache is persisted). When ``path``
+    is set the cache is reloaded from it on start-up and written back by
+    ``save``.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0,
+                 path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._entries: "OrderedDict[str, Tuple[float, PackingPlan]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[PackingPlan]:
+        """Cached plan for ``key``, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, plan: PackingPlan):
+        """Store ``plan``, evicting least recently used entries past the size limit"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, plan)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def _served(plan: PackingPlan, started: float) -> PackingPlan:
+        """Copy of a cached plan timed by the lookup that served it"""
+        return plan.copy(update={"placement_time_ms": (time.perf_counter() - started) * 1000})
+
+    def get_or_compute(self, items: List[ItemInput], box: BoxOutput,
+                       compute: Callable[[], PackingPlan], variant: str = "") -> PackingPlan:
+        """Return the cached plan for this order or compute and store it
+
+        A cached plan reports the time taken to look it up as its
+        ``placement_time_ms``, not the time it originally took to place.
+        """
+        started = time.perf_counter()
+        key = canonical_key(items, box, variant)
+        plan = self.get(key)
+        if plan is None:
+            plan = compute()
+            self.put(key, plan)
+            return plan
+        return self._served(plan, started)
+
+    async def get_or_compute_async(self, items: List[ItemInput], box: BoxOutput,
+                                   compute: Callable[[], Awaitable[PackingPlan]],
+                                   variant: str = "") -> PackingPlan:
+        """get_or_compute for plans computed off the event loop"""
+        started = time.perf_counter()
+        key = canonical_key(items, box, variant)
+        plan = self.get(key)
+        if plan is None:
+            plan = await compute()
+            self.put(key, plan)
+            return plan
+        return self._served(plan, started)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Counters for the cache, including the hit rate over all lookups"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def load(self):
+        """Load unexpired entries from ``path`` if it exists"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                stored = pickle.load(f)
+            now = time.time()
+            with self._lock:
+                for key, (expires_at, plan) in stored.items():
+                    if expires_at >= now:
+                        self._entries[key] = (expires_at, plan)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            logger.info(f"Loaded {len(self._entries)} cached packing plans from {self.path}")
+        except Exception as e:
+            # A stale or corrupt cache file only costs recomputation
+            logger.error(f"Failed to load plan cache: {str(e)}")
+
+    def save(self):
+        """Write the cache to ``path`` atomically"""
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                snapshot = OrderedDict(self._entries)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            logger.info(f"Saved {len(snapshot)} cached packing plans to {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to save plan cache: {str(e)}")
+
+
+# Shared cache instance
+plan_cache = PlanCache(
+    max_entries=settings.PLAN_CACHE_SIZE,
+    ttl_seconds=settings.PLAN_CACHE_TTL_SECONDS,
+    path=settings.PLAN_CACHE_PATH or None
+)
\ No newline at end of file
@@ -0,0 +1,150 @@
+# backend/services/serialization.py
+from typing import Any, Dict, List, Optional, Union
+import json
+from fastapi.responses import Response
+from pydantic import BaseModel
+import numpy as np
+from models.item_schema import ItemInput, PackingPlan
+from services.pack_optimizer import ORIENTATIONS, PlanLayout
+from services.placement_state import expand_blocks
+from services.metrics import stage
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+# Accept this to get plans as parallel arrays instead of nested objects
+COLUMNAR_MEDIA_TYPE = "application/vnd.smartpack.columnar+json"
+
+# Orientation index -> axis permutation applied to (length, width, height)
+_PERMUTATION_TABLE = np.array([perm for perm, _ in ORIENTATIONS])
+_ROTATION_TABLE = [list(rotation) for _, rotation in ORIENTATIONS]
+_ROTATION_INDEX = {rotation: i for i, (_, rotation) in enumerate(ORIENTATIONS)}
+
+
+def _model_fields(obj: Any) -> Dict:
+    # pydantic v1 keeps exactly the field values in __dict__, in field
+    # order, for validated and constructed models alike
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode API models (and lists/dicts of them) to JSON without re-validating them"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_model_fields, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_model_fields, separators=(",", ":")).encode("utf-8")
+
+
+def _layout_of(plan: PackingPlan) -> PlanLayout:
+    """The engine's block arrays, or ones rebuilt from the models of a plan made elsewhere"""
+    layout = getattr(plan, "_layout", None)
+    if layout is not None:
+        return layout
+    # A unit entry is a block of one
+    placements = [(p.item, p.position, None, (1, 1, 1), p.rotation) for p in plan.items]
+    placements += [(b.item, b.origin, b.pitch, b.counts, b.rotation) for b in plan.blocks]
+    items: List[ItemInput] = []
+    line_of: Dict[int, int] = {}
+    line, origin, pitch, counts, orientation = [], [], [], [], []
+    for item, position, step, count, rotation in placements:
+        if id(item) not in line_of:
+            line_of[id(item)] = len(items)
+            items.append(item)
+        line.append(line_of[id(item)])
+        origin.append((position.x, position.y, position.z))
+        pitch.append((step.x, step.y, step.z) if step is not None else (0.0, 0.0, 0.0))
+        counts.append(count)
+        orientation.append(_ROTATION_INDEX.get((rotation.x, rotation.y, rotation.z), 0))
+    return PlanLayout(
+        items=items,
+        line=np.array(line, dtype=np.int64),
+        origin=np.array(origin, dtype=np.float64).reshape(-1, 3),
+        inset=np.zeros(len(line)),
+        pitch=np.array(pitch, dtype=np.float64).reshape(-1, 3),
+        counts=np.array(counts, dtype=np.int64).reshape(-1, 3),
+        orientation=np.array(orientation, dtype=np.int64)
+    )
+
+
+def plan_to_columns(plan: PackingPlan) -> Dict:
+    """A packing plan as parallel arrays, one entry per unit (and per block)
+
+    ``lines`` holds each distinct order line once; ``units.line`` and
+    ``blocks.line`` index into it, and ``rotation`` columns index into
+    ``rotations``. ``dx``/``dy``/``dz`` are the placed (rotated) extents.
+    Columns come straight from the engine's block arrays, so a plan is
+    never walked unit by unit.
+    """
+    layout = _layout_of(plan)
+    used, line = np.unique(layout.line, return_inverse=True)
+    lines = [layout.items[i] for i in used.tolist()]
+
+    units = {k: [] for k in ("line", "x", "y", "z", "dx", "dy", "dz", "rotation")}
+    blocks = {k: [] for k in ("line", "x", "y", "z", "pitch_x", "pitch_y", "pitch_z", "nx", "ny", "nz", "rotation")}
+    if plan.blocks:
+        for key, column in (("line", line), ("rotation", layout.orientation)):
+            blocks[key] = column.tolist()
+        for axis, name in enumerate("xyz"):
+            blocks[name] = (layout.origin[:, axis] + layout.inset).tolist()
+            blocks[f"pitch_{name}"] = layout.pitch[:, axis].tolist()
+            blocks[f"n{name}"] = layout.counts[:, axis].tolist()
+    elif plan.items:
+        origins, rows = expand_blocks(layout.origin, layout.pitch, layout.counts)
+        dims = np.array([(i.length, i.width, i.height) for i in lines], dtype=np.float64).reshape(-1, 3)
+        orientation = layout.orientation[rows]
+        placed = np.take_along_axis(dims[line[rows]], _PERMUTATION_TABLE[orientation], axis=1)
+        origins += layout.inset[rows, None]
+        units["line"] = line[rows].tolist()
+        units["rotation"] = orientation.tolist()
+        for axis, name in enumerate("xyz"):
+            units[name] = origins[:, axis].tolist()
+            units[f"d{name}"] = placed[:, axis].tolist()
+
+    return {
+        "format": "columnar",
+        "box": plan.box,
+        "lines": lines,
+        "rotations": _ROTATION_TABLE,
+        "units": units,
+        "blocks": blocks,
+        "unpacked_items": plan.unpacked_items,
+        "space_utilization": plan.space_utilization,
+        "estimated_cost_saving": plan.estimated_cost_saving,
+        "packing_instructions": plan.packing_instructions,
+        "placement_time_ms": plan.placement_time_ms,
+        "search_iterations": plan.search_iterations,
+        "utilization_history": plan.utilization_history
+    }
+
+
+def wants_columnar(accept: Optional[str]) -> bool:
+    return bool(accept) and COLUMNAR_MEDIA_TYPE in accept
+
+
+def fast_response(content: Any, status_code: int = 200) -> Response:
+    """JSON response for already-valid models, skipping FastAPI's response_model pass"""
+    with stage("encode"):
+        body = dumps(content)
+    return Response(content=body, status_code=status_code, media_type=JSON_MEDIA_TYPE)
+
+
+def plan_response(plans: Union[PackingPlan, List[PackingPlan]], accept: Optional[str] = None) -> Response:
+    """Encode one plan or a list of them in the format the Accept header asks for"""
+    if not wants_columnar(accept):
+        response = fast_response(plans)
+    else:
+        with stage("encode"):
+            if isinstance(plans, list):
+                body = dumps([plan_to_columns(p) for p in plans])
+            else:
+                body = dumps(plan_to_columns(plans))
+        response = Response(content=body, media_type=COLUMNAR_MEDIA_TYPE)
+    response.headers["Vary"] = "Accept"
+    return response
\ No newline at end of file
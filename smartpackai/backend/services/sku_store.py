@@ -0,0 +1,348 @@
+# backend/services/sku_store.py
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import csv
+import io
+import json
+import re
+import sqlite3
+import threading
+import time
+from models.item_schema import ItemInput, BoxOutput, SkuMeasurement, SkuRecord
+from services.box_predictor import predict_box_sizes
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Column order of the table and of CSV import/export
+SKU_COLUMNS = [
+    "sku", "length", "width", "height", "weight", "fragility", "is_rotatable", "confidence", "source",
+    "box_length", "box_width", "box_height", "box_volume", "void_fill",
+    "measurements", "conflicts", "updated_at"
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS skus (
+    sku TEXT PRIMARY KEY,
+    length REAL NOT NULL,
+    width REAL NOT NULL,
+    height REAL NOT NULL,
+    weight REAL NOT NULL,
+    fragility REAL NOT NULL,
+    is_rotatable INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    source TEXT NOT NULL,
+    box_length REAL,
+    box_width REAL,
+    box_height REAL,
+    box_volume REAL,
+    void_fill TEXT,
+    measurements INTEGER NOT NULL,
+    conflicts INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+_UPSERT = f"INSERT OR REPLACE INTO skus ({', '.join(SKU_COLUMNS)}) VALUES ({', '.join('?' * len(SKU_COLUMNS))})"
+_SELECT = f"SELECT {', '.join(SKU_COLUMNS)} FROM skus"
+
+# Rows written per transaction during bulk import
+IMPORT_BATCH = 5000
+_SPACE = re.compile(r"\s*")
+
+
+def _to_row(record: SkuRecord) -> tuple:
+    box = record.box
+    return (
+        record.sku, record.length, record.width, record.height, record.weight, record.fragility,
+        int(record.is_rotatable), record.confidence, record.source,
+        box.length if box else None, box.width if box else None, box.height if box else None,
+        box.volume if box else None, box.recommended_void_fill if box else None,
+        record.measurements, record.conflicts, record.updated_at
+    )
+
+
+def _from_row(row: tuple) -> SkuRecord:
+    # Rows were validated on the way in, so skip validation on the way out
+    (sku, length, width, height, weight, fragility, is_rotatable, confidence, source,
+     box_length, box_width, box_height, box_volume, void_fill, measurements, conflicts, updated_at) = row
+    box = None
+    if box_length is not None:
+        box = BoxOutput.construct(length=box_length, width=box_width, height=box_height,
+                                  volume=box_volume, recommended_void_fill=void_fill)
+    return SkuRecord.construct(
+        sku=sku, length=length, width=width, height=height, weight=weight, fragility=fragility,
+        is_rotatable=bool(is_rotatable), confidence=confidence, source=source, box=box,
+        measurements=measurements, conflicts=conflicts, updated_at=updated_at, needs_measurement=False
+    )
+
+
+def _unit_item(m: SkuMeasurement) -> ItemInput:
+    return ItemInput(length=m.length, width=m.width, height=m.height, weight=m.weight,
+                     fragility=m.fragility, is_rotatable=m.is_rotatable)
+
+
+def dimensions_agree(a: SkuMeasurement, b: SkuMeasurement, tolerance: float) -> bool:
+    """True if every edge matches within ``tolerance`` (relative), in any orientation"""
+    return all(abs(x - y) <= tolerance * max(x, y)
+               for x, y in zip(sorted((a.length, a.width, a.height)), sorted((b.length, b.width, b.height))))
+
+
+class SkuStore:
+    """Persistent SKU -> dimensions/carton store.
+
+    Records live in SQLite (WAL mode when file backed) with a bounded LRU
+    of recently used records in front, so repeat lookups skip the database.
+    Writes go to both. An empty ``path`` keeps the store in memory.
+
+    Repeat measurements that agree with the stored dimensions (within
+    ``tolerance``) are merged as a confidence-weighted average. One that
+    disagrees replaces them but halves the confidence, so the SKU is
+    re-measured until readings are consistent again.
+    """
+
+    def __init__(self, path: str = "", cache_size: int = 100_000, min_confidence: float = 0.8,
+                 tolerance: float = 0.1, box_fn: Optional[Callable[[List[ItemInput]], List[BoxOutput]]] = None):
+        self.path = path
+        self.cache_size = cache_size
+        self.min_confidence = min_confidence
+        self.tolerance = tolerance
+        self.box_fn = box_fn
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, SkuRecord]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        try:
+            self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+            if path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to open SKU store at {path or ':memory:'}: {str(e)}")
+            raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM skus").fetchone()[0]
+
+    def _remember(self, record: SkuRecord):
+        if self.cache_size <= 0:
+            return
+        self._cache[record.sku] = record
+        self._cache.move_to_end(record.sku)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, sku: str) -> Optional[SkuRecord]:
+        """Stored record for ``sku``, or None"""
+        with self._lock:
+            record = self._cache.get(sku)
+            if record is not None:
+                self._cache.move_to_end(sku)
+                self.hits += 1
+                return record
+            self.misses += 1
+            row = self._conn.execute(f"{_SELECT} WHERE sku = ?", (sku,)).fetchone()
+            if row is None:
+                return None
+            record = _from_row(row)
+            self._remember(record)
+            return record
+
+    def lookup(self, sku: str) -> Optional[SkuRecord]:
+        """``get`` with needs_measurement set when confidence is below ``min_confidence``"""
+        record = self.get(sku)
+        if record is not None and record.confidence < self.min_confidence:
+            return record.copy(update={"needs_measurement": True})
+        return record
+
+    def put(self, record: SkuRecord):
+        with self._lock:
+            self._conn.execute(_UPSERT, _to_row(record))
+            self._conn.commit()
+            self._remember(record)
+
+    def delete(self, sku: str) -> bool:
+        with self._lock:
+            self._cache.pop(sku, None)
+            deleted = self._conn.execute("DELETE FROM skus WHERE sku = ?", (sku,)).rowcount
+            self._conn.commit()
+        return deleted > 0
+
+    def record_measurement(self, sku: str, measurement: SkuMeasurement) -> SkuRecord:
+        """Merge a new measurement into the stored record and return the result
+
+        The read, merge and write run in one write transaction (BEGIN
+        IMMEDIATE), so concurrent measurements of a SKU, from other threads
+        or other processes sharing the file, are merged one after another
+        instead of overwriting each other.
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                row = self._conn.execute(f"{_SELECT} WHERE sku = ?", (sku,)).fetchone()
+                record = self._merge(sku, _from_row(row) if row else None, measurement)
+                self._conn.execute(_UPSERT, _to_row(record))
+            self._remember(record)
+        return record
+
+    def _merge(self, sku: str, existing: Optional[SkuRecord], measurement: SkuMeasurement) -> SkuRecord:
+        fields = measurement.dict()
+        measurements, conflicts = 1, 0
+        if existing is not None and dimensions_agree(existing, measurement, self.tolerance):
+            # Average in the orientation already stored
+            old_weight = existing.confidence * existing.measurements
+            total = old_weight + measurement.confidence
+            if total > 0:
+                ordered = dict(zip(
+                    sorted(("length", "width", "height"), key=lambda k: getattr(existing, k)),
+                    sorted((measurement.length, measurement.width, measurement.height))
+                ))
+                for key in ("length", "width", "height"):
+                    fields[key] = round((getattr(existing, key) * old_weight
+                                         + ordered[key] * measurement.confidence) / total, 2)
+                fields["weight"] = round((existing.weight * old_weight
+                                          + measurement.weight * measurement.confidence) / total, 3)
+            fields["confidence"] = max(existing.confidence, measurement.confidence)
+            measurements, conflicts = existing.measurements + 1, existing.conflicts
+        elif existing is not None:
+            logger.warning(f"SKU {sku} measured at {measurement.length}x{measurement.width}x{measurement.height},"
+                           f" stored as {existing.length}x{existing.width}x{existing.height}")
+            fields["confidence"] = min(existing.confidence, measurement.confidence) / 2
+            conflicts = existing.conflicts + 1
+
+        merged = SkuMeasurement(**fields)
+        box = self.box_fn([_unit_item(merged)])[0] if self.box_fn else None
+        return SkuRecord(sku=sku, box=box, measurements=measurements, conflicts=conflicts,
+                         updated_at=time.time(), **merged.dict())
+
+    def import_records(self, records: Iterable[SkuRecord]) -> int:
+        """Upsert ``records`` in batched transactions; missing boxes are predicted in bulk"""
+        count = 0
+        batch: List[SkuRecord] = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= IMPORT_BATCH:
+                count += self._import_batch(batch)
+                batch = []
+        if batch:
+            count += self._import_batch(batch)
+        return count
+
+    def _import_batch(self, batch: List[SkuRecord]) -> int:
+        missing = [i for i, r in enumerate(batch) if r.box is None]
+        if missing and self.box_fn:
+            boxes = self.box_fn([_unit_item(batch[i]) for i in missing])
+            for i, box in zip(missing, boxes):
+                batch[i] = batch[i].copy(update={"box": box})
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(_UPSERT, [_to_row(r) for r in batch])
+            for record in batch:
+                self._cache.pop(record.sku, None)
+        return len(batch)
+
+    def export_records(self, page_size: int = 5000) -> Iterator[SkuRecord]:
+        """Every record in SKU order, read a page at a time"""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(f"{_SELECT} WHERE sku > ? ORDER BY sku LIMIT ?",
+                                          (last, page_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _from_row(row)
+            last = rows[-1][0]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "records": len(self),
+            "cached": len(self._cache),
+            "cache_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "min_confidence": self.min_confidence
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def records_from_csv(lines: Iterable[str]) -> Iterator[SkuRecord]:
+    """Parse CSV with a header row; only sku and the item dimensions are required"""
+    now = time.time()
+    for row in csv.DictReader(lines):
+        values = {k: v for k, v in row.items() if k and v not in (None, "")}
+        box = None
+        if all(k in values for k in ("box_length", "box_width", "box_height")):
+            dims = [float(values[k]) for k in ("box_length", "box_width", "box_height")]
+            box = BoxOutput(length=dims[0], width=dims[1], height=dims[2],
+                            volume=float(values.get("box_volume", dims[0] * dims[1] * dims[2])),
+                            recommended_void_fill=values.get("void_fill", "bubble_wrap"))
+        if "is_rotatable" in values:
+            values["is_rotatable"] = values["is_rotatable"].strip().lower() in ("1", "true", "yes")
+        fields = {k: values[k] for k in SkuRecord.__fields__ if k in values and k != "box"}
+        fields.setdefault("source", "import")
+        fields.setdefault("updated_at", now)
+        yield SkuRecord(box=box, **fields)
+
+
+def records_from_json(chunks: Iterable[str]) -> Iterator[SkuRecord]:
+    """Parse a JSON list of records, yielding each one as soon as its text has arrived"""
+    decoder = json.JSONDecoder()
+    text, pos, opened = "", 0, False
+    for chunk in chunks:
+        text = text[pos:] + chunk
+        pos = 0
+        while True:
+            pos = _SPACE.match(text, pos).end()
+            if pos == len(text):
+                break
+            if not opened:
+                if text[pos] != "[":
+                    raise ValueError("Expected a JSON list of SKU records")
+                opened, pos = True, pos + 1
+            elif text[pos] == ",":
+                pos += 1
+            elif text[pos] == "]":
+                if text[pos + 1:].strip():
+                    raise ValueError("Unexpected data after the JSON list")
+                return
+            else:
+                try:
+                    record, end = decoder.raw_decode(text, pos)
+                except json.JSONDecodeError:
+                    # The record continues in the next chunk
+                    break
+                yield SkuRecord(**record)
+                pos = end
+    raise ValueError("Truncated JSON list of SKU records")
+
+
+def records_to_csv(records: Iterable[SkuRecord]) -> Iterator[str]:
+    """CSV text in SKU_COLUMNS order, header first, one chunk per record"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(SKU_COLUMNS)
+    for record in records:
+        writer.writerow(["" if v is None else v for v in _to_row(record)])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+# Shared store; empty SKU_STORE_PATH keeps it in memory
+sku_store = SkuStore(
+    path=settings.SKU_STORE_PATH,
+    cache_size=settings.SKU_CACHE_SIZE,
+    min_confidence=settings.SKU_MIN_CONFIDENCE,
+    tolerance=settings.SKU_DIMENSION_TOLERANCE,
+    box_fn=predict_box_sizes
+)
\ No newline at end of file
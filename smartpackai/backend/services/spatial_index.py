@@ -0,0 +1,65 @@
+# backend/services/spatial_index.py
+from typing import Dict, List, Tuple
+import itertools
+import math
+import numpy as np
+
+EPSILON = 1e-6
+
+
+class SpatialGrid:
+    """Uniform 3D hash grid over box ids.
+
+    Every stored box is registered in each cell it touches, so collision and
+    support queries only look at the handful of boxes near the query region
+    instead of scanning every placed item. The grid only tracks ids; the
+    geometry itself lives in a PlacementState.
+    """
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int, int], List[int]] = {}
+
+    def _cell_range(self, lo: float, hi: float) -> range:
+        """Cell indices covered by the half-open interval [lo, hi)"""
+        start = math.floor((lo + EPSILON) / self.cell_size)
+        stop = math.floor((hi - EPSILON) / self.cell_size)
+        return range(start, max(start, stop) + 1)
+
+    def _cells_for(self, lo, hi):
+        return itertools.product(
+            self._cell_range(lo[0], hi[0]),
+            self._cell_range(lo[1], hi[1]),
+            self._cell_range(lo[2], hi[2])
+        )
+
+    def insert(self, box_id: int, lo, hi):
+        """Register a box id over the cells covered by [lo, hi)"""
+        for cell in self._cells_for(lo, hi):
+            self.cells.setdefault(cell, []).append(box_id)
+
+    def candidates(self, lo, hi) -> np.ndarray:
+        """Ids of stored boxes sharing at least one cell with [lo, hi)"""
+        found = set()
+        for cell in self._cells_for(lo, hi):
+            ids = self.cells.get(cell)
+            if ids:
+                found.update(ids)
+        return np.fromiter(found, dtype=np.int64, count=len(found))
+
+    def candidates_many(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Union of candidates for several small queries (Q, 3)
+
+        Cheaper than one query over their bounding region when the queries
+        are spread out, as chunks of extreme points usually are.
+        """
+        found = set()
+        cells = self.cells
+        for box_lo, box_hi in zip(lo.tolist(), hi.tolist()):
+            for cell in self._cells_for(box_lo, box_hi):
+                ids = cells.get(cell)
+                if ids:
+                    found.update(ids)
+        return np.fromiter(found, dtype=np.int64, count=len(found))
\ No newline at end of file
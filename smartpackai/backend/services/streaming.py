@@ -0,0 +1,40 @@
+# backend/services/streaming.py
+from typing import AsyncIterator, Optional
+import asyncio
+import io
+
+
+class RequestBody(io.RawIOBase):
+    """
+    Blocking file view of a request body for parsers running on a worker thread
+
+    Each read pulls the next chunk from the event loop, so the body is never
+    held in memory as a whole. Never read it on the event loop thread itself.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop):
+        self._chunks = chunks
+        self._loop = loop
+        self._chunk = memoryview(b"")
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    async def _next_chunk(self) -> Optional[bytes]:
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk and not self._done:
+            chunk = asyncio.run_coroutine_threadsafe(self._next_chunk(), self._loop).result()
+            if chunk is None:
+                self._done = True
+            else:
+                self._chunk = memoryview(chunk)
+        count = min(len(buffer), len(self._chunk))
+        buffer[:count] = self._chunk[:count]
+        self._chunk = self._chunk[count:]
+        return count
\ No newline at end of file
@@ -0,0 +1,96 @@
+# benchmarks/generators.py
+import random
+from typing import Dict, List, Tuple
+from models.item_schema import ItemInput, BoxOutput
+
+
+class OrderProfile:
+    """Shape of a synthetic order stream.
+
+    lines            -- (min, max) order lines per order
+    quantity         -- "single", "uniform" (1-10) or "bulk" (heavy-tailed, up to max_quantity)
+    fragile_share    -- share of lines with fragility above 0.7
+    size_skew        -- >1 favours small items, <1 large ones, 1 is uniform
+    max_edge         -- longest item edge in cm
+    """
+
+    def __init__(self, lines: Tuple[int, int] = (1, 10), quantity: str = "uniform",
+                 fragile_share: float = 0.2, size_skew: float = 1.0, max_edge: float = 30.0,
+                 max_quantity: int = 500, rotatable_share: float = 0.9):
+        if quantity not in ("single", "uniform", "bulk"):
+            raise ValueError(f"Unknown quantity distribution: {quantity}")
+        self.lines = lines
+        self.quantity = quantity
+        self.fragile_share = fragile_share
+        self.size_skew = size_skew
+        self.max_edge = max_edge
+        self.max_quantity = max_quantity
+        self.rotatable_share = rotatable_share
+
+    def describe(self) -> Dict:
+        return dict(vars(self))
+
+
+# Profiles used by the benchmark runner; keep them stable so saved
+# baselines stay comparable
+SCENARIOS: Dict[str, OrderProfile] = {
+    "single_items": OrderProfile(lines=(1, 1), quantity="single"),
+    "small_mixed": OrderProfile(lines=(3, 12), quantity="uniform", size_skew=1.5),
+    "bulk_lines": OrderProfile(lines=(1, 3), quantity="bulk", size_skew=3.0, max_edge=15.0, max_quantity=2000),
+    "many_lines": OrderProfile(lines=(40, 80), quantity="uniform", size_skew=2.0, max_edge=20.0),
+    "fragile_large": OrderProfile(lines=(2, 6), quantity="uniform", fragile_share=0.8, size_skew=0.5),
+}
+
+
+def _edge(rng: random.Random, profile: OrderProfile) -> float:
+    # u ** skew pushes samples towards 0 for skew > 1
+    return round(1.0 + (profile.max_edge - 1.0) * rng.random() ** profile.size_skew, 1)
+
+
+def _quantity(rng: random.Random, profile: OrderProfile) -> int:
+    if profile.quantity == "single":
+        return 1
+    if profile.quantity == "uniform":
+        return rng.randint(1, 10)
+    return min(int(rng.paretovariate(1.2) * 20), profile.max_quantity)
+
+
+def generate_item(rng: random.Random, profile: OrderProfile) -> ItemInput:
+    """One random order line"""
+    fragile = rng.random() < profile.fragile_share
+    return ItemInput(
+        length=_edge(rng, profile),
+        width=_edge(rng, profile),
+        height=_edge(rng, profile),
+        weight=round(rng.uniform(0.05, 8.0), 2),
+        quantity=_quantity(rng, profile),
+        fragility=round(rng.uniform(0.7, 1.0) if fragile else rng.uniform(0.0, 0.7), 2),
+        is_rotatable=rng.random() < profile.rotatable_share
+    )
+
+
+def generate_order(rng: random.Random, profile: OrderProfile) -> List[ItemInput]:
+    """One random order following ``profile``"""
+    return [generate_item(rng, profile) for _ in range(rng.randint(*profile.lines))]
+
+
+def box_for(items: List[ItemInput], fill: float = 0.7) -> BoxOutput:
+    """A box about 1/fill times the order volume, never smaller than the largest unit"""
+    volume = sum(i.length * i.width * i.height * i.quantity for i in items) / fill
+    side = volume ** (1 / 3)
+    longest = max(max(i.length, i.width, i.height) for i in items)
+    length = max(round(side * 1.3, 1), longest)
+    width = max(round(side, 1), longest)
+    height = max(round(volume / (length * width), 1), longest)
+    return BoxOutput(length=length, width=width, height=height,
+                     volume=length * width * height, recommended_void_fill="bubble_wrap")
+
+
+def generate_orders(seed: int, profile: OrderProfile, count: int) -> List[Tuple[List[ItemInput], BoxOutput]]:
+    """Reproducible (order, box) pairs for a benchmark run"""
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(count):
+        items = generate_order(rng, profile)
+        orders.append((items, box_for(items)))
+    return orders
\ No newline at end of file
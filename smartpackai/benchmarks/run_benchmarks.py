@@ -0,0 +1,267 @@
+# benchmarks/run_benchmarks.py
+"""Offline benchmarks for the packer and box predictor.
+
+Usage (from the smartpackai directory):
+
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py                 # compare against the saved baseline
+
+Baselines are machine specific, so none is committed; save one on the
+machine that runs the comparison. The process exits with status 1 when
+any metric regresses past the threshold, and with status 2 when there is
+no baseline to compare against, so a check never passes by default.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "backend"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from benchmarks.generators import SCENARIOS, OrderProfile, generate_item, generate_orders, box_for
+from models.item_schema import ItemInput, PackingPlan
+from services.pack_optimizer import optimize_packing
+from services.box_predictor import predict_box_size, predict_box_sizes
+from services.plan_cache import plan_cache
+from services.serialization import dumps, plan_to_columns
+
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baselines" / "baseline.json"
+
+# Metrics compared against the baseline, and whether higher is better
+TRACKED_METRICS = {
+    "p50_ms": False,
+    "p99_ms": False,
+    "throughput_per_s": True,
+    "peak_memory_mb": False,
+    "mean_utilization": True,
+    "per_unit_growth": False,
+}
+# Utilization is compared in absolute terms; relative thresholds on a 0-1
+# ratio would hide real packing regressions
+UTILIZATION_TOLERANCE = 0.01
+
+
+def measure(fn: Callable, inputs: Sequence, warmup: int = 3,
+            memory_sample: int = 20) -> Dict:
+    """Latency percentiles, throughput and peak traced memory of ``fn`` over ``inputs``"""
+    for args in inputs[:warmup]:
+        fn(*args)
+
+    latencies = []
+    outputs = []
+    started = time.perf_counter()
+    for args in inputs:
+        call_started = time.perf_counter()
+        outputs.append(fn(*args))
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    elapsed = time.perf_counter() - started
+
+    # tracemalloc slows allocation-heavy code down, so memory is sampled
+    # in a separate pass instead of skewing the latency numbers
+    tracemalloc.start()
+    for args in inputs[:memory_sample]:
+        fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = np.array(latencies)
+    return {
+        "calls": len(inputs),
+        "mean_ms": round(float(latencies.mean()), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p90_ms": round(float(np.percentile(latencies, 90)), 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+        "throughput_per_s": round(len(inputs) / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_memory_mb": round(peak / 2 ** 20, 3),
+        "outputs": outputs,
+    }
+
+
+def _uncached_packing(items, box):
+    # Every generated order is distinct, but clear anyway so the numbers
+    # always reflect the packer rather than the plan cache
+    plan_cache.clear()
+    return optimize_packing(items, box)
+
+
+def scaling_suite(sizes: Sequence[int] = (100, 400, 1600), calls: int = 3, seed: int = 42) -> Dict[str, Dict]:
+    """Placement cost per unit as single-unit orders grow; flat per-unit cost means near-linear packing"""
+    profile = OrderProfile(lines=(1, 1), quantity="single", size_skew=1.5, max_edge=20.0)
+    results = {}
+    per_unit = []
+    for size in sizes:
+        rng = random.Random(seed)
+        items = [generate_item(rng, profile) for _ in range(size)]
+        result = measure(_uncached_packing, [(items, box_for(items, fill=0.6))] * calls, warmup=1, memory_sample=1)
+        plans = result.pop("outputs")
+        result["mean_utilization"] = round(float(np.mean([p.space_utilization for p in plans])), 4)
+        result["units"] = size
+        result["ms_per_unit"] = round(result["p50_ms"] / size, 4)
+        per_unit.append(result["ms_per_unit"])
+        results[f"packing_scale/{size}"] = result
+    # How much dearer a unit gets from the smallest to the largest order
+    results[f"packing_scale/{sizes[0]}-{sizes[-1]}"] = {"per_unit_growth": round(per_unit[-1] / per_unit[0], 3)}
+    return results
+
+
+def serialization_suite(units: int = 4000, calls: int = 5) -> Dict[str, Dict]:
+    """Cost of encoding one large plan: FastAPI's response_model path vs the fast and columnar encoders"""
+    items = [ItemInput(length=5, width=4, height=3, weight=0.2, quantity=units * 3 // 4),
+             ItemInput(length=7, width=5, height=2, weight=0.3, quantity=units // 4, fragility=0.6)]
+    plan = optimize_packing(items, box_for(items, fill=0.8))
+    field = create_response_field(name="Response_plan", type_=PackingPlan)
+
+    def response_model_path():
+        # What FastAPI does with a returned model: validate, jsonable_encoder, json.dumps
+        return JSONResponse(asyncio.run(serialize_response(field=field, response_content=plan))).body
+
+    encoders = {
+        "response_model": response_model_path,
+        "fast": lambda: dumps(plan),
+        "columnar": lambda: dumps(plan_to_columns(plan)),
+    }
+    results = {}
+    for name, encode in encoders.items():
+        result = measure(encode, [()] * calls, warmup=1, memory_sample=1)
+        result["bytes"] = len(result.pop("outputs")[0])
+        result["units"] = len(plan.items)
+        results[f"serialize/{name}"] = result
+    return results
+
+
+def run_suite(scenarios: Optional[List[str]] = None, orders: int = 50, seed: int = 42,
+              batch_size: int = 10000, serialization: bool = True, scaling: bool = True) -> Dict[str, Dict]:
+    """Run every benchmark for the chosen scenarios and return metrics by name"""
+    results = {}
+    for name in scenarios or list(SCENARIOS):
+        generated = generate_orders(seed, SCENARIOS[name], orders)
+
+        packing = measure(_uncached_packing, generated)
+        plans = packing.pop("outputs")
+        packing["mean_utilization"] = round(float(np.mean([p.space_utilization for p in plans])), 4)
+        packing["units"] = sum(i.quantity for items, _ in generated for i in items)
+        results[f"packing/{name}"] = packing
+
+        lines = [(item,) for items, _ in generated for item in items]
+        prediction = measure(predict_box_size, lines)
+        prediction.pop("outputs")
+        results[f"predict/{name}"] = prediction
+
+    # One large wave through the vectorized path
+    wave = [item for items, _ in generate_orders(seed, SCENARIOS["small_mixed"], batch_size // 7 + 1)
+            for item in items][:batch_size]
+    batch = measure(predict_box_sizes, [(wave,)] * 10, warmup=1, memory_sample=1)
+    batch.pop("outputs")
+    batch["items_per_call"] = len(wave)
+    results["predict_batch/wave"] = batch
+
+    if scaling:
+        results.update(scaling_suite(seed=seed))
+    if serialization:
+        results.update(serialization_suite())
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Human-readable regressions of ``results`` against ``baseline``"""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in TRACKED_METRICS.items():
+            if metric not in metrics or metric not in base:
+                continue
+            current, previous = metrics[metric], base[metric]
+            if metric == "mean_utilization":
+                regressed = current < previous - UTILIZATION_TOLERANCE
+            elif higher_is_better:
+                regressed = current < previous * (1 - threshold)
+            else:
+                regressed = current > previous * (1 + threshold)
+            if regressed:
+                regressions.append(f"{name} {metric}: {previous} -> {current}")
+    return regressions
+
+
+def _print_table(results: Dict[str, Dict]):
+    header = f"{'benchmark':<28}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'ops/s':>12}{'peak MB':>10}{'util':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, m in results.items():
+        if "p50_ms" not in m:
+            print(f"{name:<28}" + ", ".join(f"{k} {v}" for k, v in m.items()))
+            continue
+        util = f"{m['mean_utilization']:.3f}" if "mean_utilization" in m else "-"
+        print(f"{name:<28}{m['p50_ms']:>10.3f}{m['p90_ms']:>10.3f}{m['p99_ms']:>10.3f}"
+              f"{m['throughput_per_s']:>12.1f}{m['peak_memory_mb']:>10.2f}{util:>8}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--orders", type=int, default=50, help="Orders generated per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Overwrite the baseline with this run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative slowdown before a metric counts as regressed")
+    parser.add_argument("--output", type=Path, help="Also write this run's metrics to a JSON file")
+    parser.add_argument("--skip-serialization", action="store_true", help="Skip the plan encoding benchmarks")
+    parser.add_argument("--skip-scaling", action="store_true", help="Skip the large-order placement scaling benchmark")
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenarios.split(",") if args.scenarios else None
+    unknown = set(scenarios or []) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = run_suite(scenarios, args.orders, args.seed, serialization=not args.skip_serialization,
+                        scaling=not args.skip_scaling)
+    _print_table(results)
+    report = {
+        "seed": args.seed,
+        "orders": args.orders,
+        "scenarios": {name: SCENARIOS[name].describe() for name in scenarios or SCENARIOS},
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+        return 2
+    baseline = json.loads(args.baseline.read_text())
+    if (baseline.get("seed"), baseline.get("orders")) != (args.seed, args.orders):
+        print("\nBaseline was recorded with a different seed/order count; results are not comparable")
+        return 1
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,509 @@
+# camera_vision/batch_measure.py
+"""Offline batch measurement of product photos and conveyor videos.
+
+Usage (from the smartpackai directory):
+
+    python -m camera_vision.batch_measure photos/ conveyor.mp4 \\
+        --output ml_model/dataset/measured.csv --labels skus.csv
+
+Inputs are image files, video files or directories walked for both. Work
+is split into tasks, each measured on one worker process with its own
+OpenCV/MediaPipe detectors, and per-frame dimensions are fused into one
+record per task:
+
+- image: every photo is its own item (``--group-by image``), or every
+  directory of photos is one item seen from several angles
+  (``--group-by directory``);
+- video: every ``--segment-frames`` frames are one item, sampling every
+  ``--frame-step``-th frame. Workers decode their own segment, so frames
+  never cross process boundaries.
+
+Records are written as tasks finish, flushed every ``--flush-every`` rows,
+to a CSV file or to a Parquet directory of part files. Rerunning with the
+same output skips tasks already recorded, so an interrupted run picks up
+where it stopped; tasks that failed are retried with ``--retry-failed``.
+Output is append-only, so a retried key keeps its failure record next to
+the new one: the latest record of a key wins. Measured keys are never
+rerun, so dropping the records with an ``error`` (as ``ml_model/train.py``
+does) leaves exactly one record per key.
+
+Columns length/width/height are the names ``ml_model/train.py`` accepts
+for the item features. ``--labels`` joins a CSV keyed by ``sku`` (photo
+file stem, directory name or video stem) onto every record, e.g. with
+weight and box_length/box_width/box_height, so the output is a training
+file as written.
+"""
+import argparse
+import csv
+import importlib.util
+import json
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+from camera_vision.dimension_fusion import DimensionFusion
+from camera_vision.pipeline import measure_frame
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp'}
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.m4v', '.webm'}
+RESULT_COLUMNS = ['key', 'sku', 'source', 'start_frame', 'frames', 'frames_measured',
+                  'length', 'width', 'height', 'confidence', 'stable', 'error']
+
+
+class MeasureTask(NamedTuple):
+    """One item to measure: a group of photos or a segment of a video"""
+    key: str
+    sku: str
+    kind: str
+    paths: Tuple[str, ...]
+    start_frame: int = 0
+    frame_count: int = 0
+    frame_step: int = 1
+
+
+class WorkerConfig(NamedTuple):
+    objectron_model: str = 'Shoe'
+    reference_type: str = 'a4'
+    distance_cm: float = 60.0
+
+
+def _video_frame_count(path: Path) -> int:
+    import cv2
+    capture = cv2.VideoCapture(str(path))
+    try:
+        if not capture.isOpened():
+            raise ValueError(f"Could not open video {path}")
+        return int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        capture.release()
+
+
+def discover_tasks(inputs: Sequence[str],
+                   group_by: str = 'image',
+                   segment_frames: int = 30,
+                   frame_step: int = 1,
+                   frame_counter: Callable[[Path], int] = _video_frame_count) -> Iterator[MeasureTask]:
+    """
+    Tasks for every image and video under ``inputs``, in a stable order
+    Args:
+        inputs: Image files, video files or directories to walk
+        group_by: 'image' for one item per photo, 'directory' for one per directory
+        segment_frames: Video frames per item
+        frame_step: Measure every n-th video frame
+        frame_counter: Returns a video's frame count
+    Returns:
+        Iterator of MeasureTask; keys are paths relative to their input
+    """
+    if group_by not in ('image', 'directory'):
+        raise ValueError(f"Unknown grouping: {group_by}. Choose image or directory")
+    for entry in inputs:
+        root = Path(entry)
+        if root.is_dir():
+            base = root
+            files = sorted(p for p in root.rglob('*') if p.is_file())
+        elif root.is_file():
+            base = root.parent
+            files = [root]
+        else:
+            raise FileNotFoundError(f"No such file or directory: {entry}")
+
+        groups: Dict[Path, List[Path]] = {}
+        for path in files:
+            suffix = path.suffix.lower()
+            if suffix in IMAGE_EXTENSIONS:
+                groups.setdefault(path.parent if group_by == 'directory' else path, []).append(path)
+            elif suffix in VIDEO_EXTENSIONS:
+                key = path.relative_to(base).as_posix()
+                total = frame_counter(path)
+                for start in range(0, total, segment_frames):
+                    yield MeasureTask(f"{key}#{start}", path.stem, 'video', (str(path),),
+                                      start, min(segment_frames, total - start), frame_step)
+
+        for group, paths in groups.items():
+            if group_by == 'directory':
+                sku = group.name if group != base else base.resolve().name
+                key = group.relative_to(base).as_posix() + '/'
+            else:
+                sku = group.stem
+                key = group.relative_to(base).as_posix()
+            yield MeasureTask(key, sku, 'image', tuple(str(p) for p in paths))
+
+
+# Settings and detectors of this worker process, keyed by static_image_mode
+_config: Optional[WorkerConfig] = None
+_detectors: Dict = {}
+
+
+def init_worker(config: WorkerConfig):
+    """
+    Process pool initializer: remember the settings; detectors are built on first use
+    """
+    global _config
+    import cv2
+    # One process per core already; OpenCV's own threads would oversubscribe
+    cv2.setNumThreads(1)
+    _config = config
+    _detectors.clear()
+
+
+def _worker_detectors(static_image_mode: bool):
+    if static_image_mode not in _detectors:
+        from camera_vision.dimension_estimator import DimensionEstimator
+        from camera_vision.objectron_infer import ObjectronDetector
+        from camera_vision.reference_detection import ReferenceDetector
+        reference = ReferenceDetector(tracking=not static_image_mode)
+        ref = reference.reference_objects[_config.reference_type]
+        estimator = DimensionEstimator(max(ref['width'], ref['height']), min(ref['width'], ref['height']))
+        objectron = ObjectronDetector(_config.objectron_model, static_image_mode=static_image_mode)
+        _detectors[static_image_mode] = (reference, objectron, estimator)
+    return _detectors[static_image_mode]
+
+
+def iter_frames(task: MeasureTask) -> Iterator[np.ndarray]:
+    """
+    Decode the frames of one task
+    Args:
+        task: MeasureTask
+    Returns:
+        Iterator of BGR frames; unreadable photos are skipped
+    """
+    import cv2
+    if task.kind == 'image':
+        for path in task.paths:
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is None:
+                logger.warning(f"Could not read image {path}")
+                continue
+            yield frame
+        return
+
+    capture = cv2.VideoCapture(task.paths[0])
+    try:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, task.start_frame)
+        for offset in range(task.frame_count):
+            # grab() skips a frame without decoding it
+            if offset % task.frame_step:
+                if not capture.grab():
+                    return
+                continue
+            ok, frame = capture.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        capture.release()
+
+
+def measure_task(task: MeasureTask) -> Dict:
+    """
+    Measure one task on this worker's detectors
+    Args:
+        task: MeasureTask
+    Returns:
+        Result record with RESULT_COLUMNS; failures are recorded in 'error'
+    """
+    record = {'key': task.key, 'sku': task.sku, 'source': task.paths[0] if task.kind == 'video'
+              else os.path.commonpath(task.paths), 'start_frame': task.start_frame,
+              'frames': 0, 'frames_measured': 0, 'error': ''}
+    try:
+        # Photos are unrelated stills; video frames can be tracked across
+        reference_detector, objectron, estimator = _worker_detectors(task.kind == 'image')
+        reference_detector.reset_tracking()
+        expected = len(task.paths) if task.kind == 'image' else math.ceil(task.frame_count / task.frame_step)
+        fusion = DimensionFusion(window=max(expected, 1), min_frames=max(min(expected, 5), 1))
+        estimate = None
+        for frame in iter_frames(task):
+            record['frames'] += 1
+            reference = reference_detector.detect_reference(frame, _config.reference_type)
+            detection = objectron.detect_object(frame) if reference is not None else None
+            dimensions = measure_frame(reference, detection, frame.shape, estimator, _config.distance_cm)
+            if dimensions is not None:
+                estimate = fusion.update(dimensions)
+        if estimate is None:
+            record['error'] = f"Nothing measured in {record['frames']} frames"
+        else:
+            record.update(zip(('length', 'width', 'height'), estimate.dimensions))
+            record.update(frames_measured=estimate.frames, confidence=estimate.confidence,
+                          stable=estimate.stable)
+    except Exception as e:
+        logger.error(f"Measuring {task.key} failed: {str(e)}")
+        record['error'] = str(e)
+    return record
+
+
+class CsvResultWriter:
+    def __init__(self, path: str, columns: Sequence[str], flush_every: int = 100):
+        """
+        Appends result records to a CSV file, resuming an existing one
+        Args:
+            path: Output CSV file
+            columns: Column order; an existing file must have the same header
+            flush_every: Records buffered before they are written
+        """
+        self.path = Path(path)
+        self.columns = list(columns)
+        self.flush_every = flush_every
+        self._rows: List[Dict] = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        resuming = self.path.exists() and self.path.stat().st_size > 0
+        if resuming:
+            self._trim_partial_row()
+            with open(self.path, newline='') as f:
+                header = next(csv.reader(f), [])
+            if header != self.columns:
+                raise ValueError(f"{self.path} has columns {header}, expected {self.columns}. "
+                                 f"Use the same --labels as the first run or a new output")
+        self._file = open(self.path, 'a', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction='ignore')
+        if not resuming:
+            self._writer.writeheader()
+
+    def _trim_partial_row(self):
+        # A run killed mid-write can leave half a row at the end
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            tail_start = max(0, size - 65536)
+            f.seek(tail_start)
+            tail = f.read()
+            if tail.endswith(b'\n'):
+                return
+            cut = tail.rfind(b'\n')
+            f.truncate(tail_start + cut + 1 if cut >= 0 else 0)
+            logger.warning(f"Dropped a partially written row from {self.path}")
+
+    def done_keys(self, include_failed: bool = True) -> Set[str]:
+        """
+        Keys already recorded
+        Args:
+            include_failed: Also count keys whose latest record is a failure
+        Returns:
+            Set of task keys to skip
+        """
+        latest: Dict[str, str] = {}
+        with open(self.path, newline='') as f:
+            for row in csv.DictReader(f):
+                latest[row['key']] = row['error']
+        return {key for key, error in latest.items() if include_failed or not error}
+
+    def write(self, record: Dict):
+        self._rows.append(record)
+        if len(self._rows) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self._writer.writerows(self._rows)
+            self._rows = []
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> "CsvResultWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ParquetResultWriter(CsvResultWriter):
+    def __init__(self, path: str, columns: Sequence[str], flush_every: int = 1000):
+        """
+        Writes result records as numbered part files in a Parquet directory
+        Args:
+            path: Output directory, e.g. measured.parquet
+            columns: Column order of every part
+            flush_every: Records per part file
+        """
+        try:
+            pd.io.parquet.get_engine('auto')
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow. Run: pip install pyarrow")
+        self.path = Path(path)
+        self.columns = list(columns)
+        self.flush_every = flush_every
+        self._rows = []
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._parts = len(self._part_files())
+
+    def _part_files(self) -> List[Path]:
+        return sorted(self.path.glob('part-*.parquet'))
+
+    def done_keys(self, include_failed: bool = True) -> Set[str]:
+        latest: Dict[str, str] = {}
+        for part in self._part_files():
+            frame = pd.read_parquet(part, columns=['key', 'error'])
+            latest.update(zip(frame['key'], frame['error']))
+        return {key for key, error in latest.items() if include_failed or not error}
+
+    def flush(self):
+        if not self._rows:
+            return
+        part = self.path / f"part-{self._parts:05d}.parquet"
+        tmp = part.with_suffix('.tmp')
+        pd.DataFrame(self._rows, columns=self.columns).to_parquet(tmp, index=False)
+        # Only complete parts ever carry the .parquet name
+        os.replace(tmp, part)
+        self._parts += 1
+        self._rows = []
+
+    def close(self):
+        self.flush()
+
+
+def open_writer(path: str, columns: Sequence[str], flush_every: int = 100) -> CsvResultWriter:
+    """
+    Result writer for ``path``: a Parquet directory when it ends in .parquet, else a CSV file
+    """
+    if path.endswith('.parquet'):
+        return ParquetResultWriter(path, columns, flush_every)
+    return CsvResultWriter(path, columns, flush_every)
+
+
+def load_labels(path: str) -> Dict[str, Dict]:
+    """
+    Label rows keyed by their sku column, e.g. weight and box dimensions
+    """
+    labels = pd.read_csv(path, dtype={'sku': str})
+    if 'sku' not in labels.columns:
+        raise ValueError(f"Labels file {path} has no sku column")
+    # Measured columns come from the images, never from the labels
+    labels = labels.drop(columns=[c for c in RESULT_COLUMNS if c != 'sku' and c in labels.columns])
+    labels = labels.drop_duplicates('sku', keep='last').set_index('sku')
+    return labels.to_dict('index')
+
+
+def run_batch(tasks: Iterable[MeasureTask],
+              writer: CsvResultWriter,
+              workers: int = 0,
+              config: WorkerConfig = WorkerConfig(),
+              labels: Optional[Dict[str, Dict]] = None,
+              retry_failed: bool = False,
+              measure: Callable[[MeasureTask], Dict] = measure_task,
+              initializer: Callable = init_worker,
+              progress_seconds: float = 10.0) -> Dict:
+    """
+    Measure tasks on a process pool and write each record as it finishes
+    Args:
+        tasks: MeasureTask iterable, consumed lazily
+        writer: Result writer; tasks it already holds are skipped
+        workers: Worker processes (0: one per CPU)
+        config: Detector settings for every worker
+        labels: Extra columns per sku, joined onto each record
+        retry_failed: Measure tasks whose latest record is a failure again
+        measure: Runs one task in a worker
+        initializer: Prepares each worker process
+        progress_seconds: Interval between progress log lines
+    Returns:
+        Report with task counts, frames and images per second
+    """
+    workers = workers or os.cpu_count() or 1
+    done = writer.done_keys(include_failed=not retry_failed)
+    counts = {'tasks': 0, 'skipped': 0, 'measured': 0, 'failed': 0, 'frames': 0}
+    started = last_log = time.perf_counter()
+
+    def record(future: Future):
+        result = future.result()
+        if labels:
+            result.update(labels.get(result['sku'], {}))
+        writer.write(result)
+        counts['failed' if result['error'] else 'measured'] += 1
+        counts['frames'] += result['frames']
+
+    interrupted = False
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=(config,))
+    pending: Set[Future] = set()
+    try:
+        for task in tasks:
+            counts['tasks'] += 1
+            if task.key in done:
+                counts['skipped'] += 1
+                continue
+            # Bounded, so discovery of a huge archive doesn't queue every task up front
+            if len(pending) >= 2 * workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record(future)
+            pending.add(executor.submit(measure, task))
+            now = time.perf_counter()
+            if now - last_log >= progress_seconds:
+                last_log = now
+                logger.info(f"{counts['measured'] + counts['failed']} tasks, "
+                            f"{counts['frames'] / (now - started):.1f} images/s")
+        for future in as_completed(pending):
+            record(future)
+        pending = set()
+    except KeyboardInterrupt:
+        interrupted = True
+        logger.warning("Interrupted; recorded results are kept and the next run resumes after them")
+        for future in pending:
+            future.cancel()
+    finally:
+        executor.shutdown(wait=not interrupted, cancel_futures=interrupted)
+        writer.flush()
+
+    elapsed = time.perf_counter() - started
+    return {
+        **counts,
+        'interrupted': interrupted,
+        'elapsed_s': round(elapsed, 3),
+        'images_per_second': round(counts['frames'] / elapsed, 2) if elapsed > 0 else 0.0
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs='+', help="Image or video files, or directories of them")
+    parser.add_argument("--output", required=True, help="CSV file, or a directory ending in .parquet")
+    parser.add_argument("--labels", help="CSV of per-sku columns to join onto the results")
+    parser.add_argument("--group-by", choices=('image', 'directory'), default='image',
+                        help="One item per photo or per directory of photos")
+    parser.add_argument("--segment-frames", type=int, default=30, help="Video frames per item")
+    parser.add_argument("--frame-step", type=int, default=1, help="Measure every n-th video frame")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0: one per CPU)")
+    parser.add_argument("--flush-every", type=int, default=100, help="Records buffered between writes")
+    parser.add_argument("--reference-type", choices=('a4', 'credit_card'), default='a4')
+    parser.add_argument("--distance-cm", type=float, default=60.0, help="Camera to packing surface distance")
+    parser.add_argument("--objectron-model", default='Shoe')
+    parser.add_argument("--retry-failed", action="store_true", help="Measure failed tasks again")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.segment_frames < 1 or args.frame_step < 1:
+        parser.error("--segment-frames and --frame-step must be at least 1")
+    # Workers import them; the parent only checks they are there
+    if importlib.util.find_spec("cv2") is None or importlib.util.find_spec("mediapipe") is None:
+        logger.error("Batch measurement needs OpenCV and MediaPipe. Run: pip install opencv-python mediapipe")
+        return 1
+
+    try:
+        labels = load_labels(args.labels) if args.labels else None
+        label_columns = list(next(iter(labels.values()), {})) if labels else []
+        tasks = discover_tasks(args.inputs, args.group_by, args.segment_frames, args.frame_step)
+        config = WorkerConfig(args.objectron_model, args.reference_type, args.distance_cm)
+        with open_writer(args.output, RESULT_COLUMNS + label_columns, args.flush_every) as writer:
+            report = run_batch(tasks, writer, args.workers, config, labels, args.retry_failed)
+    except Exception as e:
+        logger.error(f"Batch measurement failed: {str(e)}")
+        return 1
+
+    print(json.dumps(report, indent=2))
+    return 130 if report['interrupted'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
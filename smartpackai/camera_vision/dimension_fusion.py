@@ -0,0 +1,145 @@
+# camera_vision/dimension_fusion.py
+import math
+from collections import deque
+from itertools import chain
+from typing import NamedTuple, Optional, Tuple
+import numpy as np
+
+# Scales a median absolute deviation to a standard deviation for normal noise
+MAD_TO_SIGMA = 1.4826
+# Standard error of a median relative to that of a mean, for normal noise
+MEDIAN_EFFICIENCY = 1.2533
+# Frames' worth of weight given to the prior noise level
+PRIOR_WEIGHT = 2
+
+
+def landmark_points(landmarks) -> np.ndarray:
+    """
+    Landmarks as an (N, 3) array of x, y, z
+    Args:
+        landmarks: Landmark list from Objectron, or an array already
+    Returns:
+        Float array with one row per landmark
+    """
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.reshape(-1, 3)
+    points = landmarks.landmark
+    return np.fromiter(chain.from_iterable((lm.x, lm.y, lm.z) for lm in points),
+                       dtype=np.float64, count=3 * len(points)).reshape(-1, 3)
+
+
+class FusedEstimate(NamedTuple):
+    dimensions: Tuple[float, float, float]
+    confidence: float
+    stable: bool
+    frames: int
+    rejected: int
+
+
+class DimensionFusion:
+    def __init__(self,
+                 window: int = 15,
+                 min_frames: int = 5,
+                 tolerance: float = 0.02,
+                 stable_confidence: float = 0.95,
+                 outlier_threshold: float = 3.5,
+                 prior_noise: float = 0.03,
+                 canonical: bool = True):
+        """
+        Running-median fusion of per-frame (length, width, height) estimates
+        Args:
+            window: Most recent accepted frames the median is taken over
+            min_frames: Frames needed before the estimate can be stable
+            tolerance: Relative error the estimate should be within, e.g. 0.02 for 2%
+            stable_confidence: Confidence at which the estimate counts as stable
+            outlier_threshold: Frames further than this many robust standard
+                deviations from the median are rejected
+            prior_noise: Relative per-frame noise assumed before enough frames
+                are seen to measure it
+            canonical: Report the longer footprint side as length, so an item
+                turned on the table keeps its dimensions
+        """
+        if window < min_frames:
+            raise ValueError(f"window ({window}) must hold at least min_frames ({min_frames})")
+        self.window = window
+        self.min_frames = min_frames
+        self.tolerance = tolerance
+        self.stable_confidence = stable_confidence
+        self.outlier_threshold = outlier_threshold
+        self.prior_noise = prior_noise
+        self.canonical = canonical
+        self.reset()
+
+    def reset(self):
+        """
+        Start over, e.g. when the next item is placed
+        """
+        self._samples = deque(maxlen=self.window)
+        self.frames = 0
+        self.rejected = 0
+        self._estimate: Optional[FusedEstimate] = None
+
+    def _spread(self, samples: np.ndarray, median: np.ndarray) -> np.ndarray:
+        return MAD_TO_SIGMA * np.median(np.abs(samples - median), axis=0)
+
+    def update(self, dimensions: Tuple[float, float, float]) -> Optional[FusedEstimate]:
+        """
+        Add one frame's estimate
+        Args:
+            dimensions: (length, width, height) from a single frame
+        Returns:
+            Fused estimate so far, or None before the first valid frame
+        """
+        sample = np.asarray(dimensions, dtype=np.float64)
+        if sample.shape != (3,) or not np.all(np.isfinite(sample)) or np.any(sample <= 0):
+            return self._estimate
+        if self.canonical and sample[1] > sample[0]:
+            sample[[0, 1]] = sample[[1, 0]]
+
+        if len(self._samples) >= self.min_frames:
+            samples = np.array(self._samples)
+            median = np.median(samples, axis=0)
+            # Floor the spread so a run of identical frames doesn't reject everything after it
+            sigma = np.maximum(self._spread(samples, median), median * self.tolerance / 4)
+            if np.any(np.abs(sample - median) > self.outlier_threshold * sigma):
+                self.rejected += 1
+                self._estimate = self._estimate._replace(rejected=self.rejected)
+                return self._estimate
+
+        self._samples.append(sample)
+        self.frames += 1
+        self._estimate = self._fuse()
+        return self._estimate
+
+    def _fuse(self) -> FusedEstimate:
+        samples = np.array(self._samples)
+        n = len(samples)
+        median = np.median(samples, axis=0)
+        confidence = 0.0
+        if n >= 2:
+            # Per-frame noise, relative to the median; a couple of frames
+            # can agree by chance, so blend in the prior until there are more
+            measured = self._spread(samples, median) / median
+            noise = np.sqrt((PRIOR_WEIGHT * self.prior_noise ** 2 + (n - 1) * measured ** 2) / (PRIOR_WEIGHT + n - 1))
+            # Standard error of the median per axis
+            error = MEDIAN_EFFICIENCY * noise / math.sqrt(n)
+            # Chance every axis is within tolerance of the true value
+            confidence = 1.0
+            for e in error:
+                confidence *= math.erf(self.tolerance / (e * math.sqrt(2))) if e > 0 else 1.0
+        stable = n >= self.min_frames and confidence >= self.stable_confidence
+        return FusedEstimate(
+            dimensions=tuple(round(float(d), 2) for d in median),
+            confidence=round(confidence, 4),
+            stable=stable,
+            frames=self.frames,
+            rejected=self.rejected
+        )
+
+    @property
+    def estimate(self) -> Optional[FusedEstimate]:
+        return self._estimate
+
+    @property
+    def stable(self) -> bool:
+        return self._estimate is not None and self._estimate.stable
\ No newline at end of file
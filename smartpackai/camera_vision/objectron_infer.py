@@ -2,6 +2,7 @@
 import cv2
 import numpy as np
 from typing import Optional, Tuple
+from camera_vision.dimension_fusion import landmark_points
 try:
     import mediapipe as mp
     MEDIAPIPE_AVAILABLE = True
@@ -9,18 +10,20 @@ except ImportError:
     MEDIAPIPE_AVAILABLE = False
 
 class ObjectronDetector:
-    def __init__(self, model_name: str = 'Shoe'):
+    def __init__(self, model_name: str = 'Shoe', static_image_mode: bool = False):
         """
         Initialize MediaPipe Objectron detector
         Args:
             model_name: Pre-trained model name ('Shoe', 'Chair', 'Cup', 'Camera')
+            static_image_mode: Detect in every frame instead of tracking, for
+                unrelated images such as uploads from different stations
         """
         if not MEDIAPIPE_AVAILABLE:
             raise ImportError("MediaPipe not installed. Run: pip install mediapipe")
             
         self.model_name = model_name
         self.detector = mp.solutions.objectron.Objectron(
-            static_image_mode=False,
+            static_image_mode=static_image_mode,
             max_num_objects=1,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.8,
@@ -29,16 +32,18 @@ class ObjectronDetector:
         self.mp_drawing = mp.solutions.drawing_utils
         
     def detect_object(self,
-                     frame: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+                     frame: np.ndarray,
+                     rgb: bool = False) -> Optional[Tuple[np.ndarray, np.ndarray]]:
         """
         Detect 3D object in frame
         Args:
             frame: Input image (BGR)
+            rgb: frame is already RGB, e.g. converted once for several detectors
         Returns:
             Tuple of (landmarks, bounding_box) or None
         """
-        # Convert to RGB
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Convert to RGB; a shared RGB frame gets a read-only view so its owner can still write it
+        image = frame.view() if rgb else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         image.flags.writeable = False
         
         # Process image
@@ -90,18 +95,12 @@ class ObjectronDetector:
         Returns:
             Tuple of (length, width, height) in cm
         """
-        # Calculate pixel dimensions from landmarks
-        x_coords = [lm.x for lm in landmarks.landmark]
-        y_coords = [lm.y for lm in landmarks.landmark]
-        z_coords = [lm.z for lm in landmarks.landmark]
-        
-        pixel_length = max(x_coords) - min(x_coords)
-        pixel_width = max(y_coords) - min(y_coords)
-        pixel_height = max(z_coords) - min(z_coords)
+        # Calculate pixel dimensions from landmarks in one pass over an array
+        pixel_length, pixel_width, pixel_height = np.ptp(landmark_points(landmarks), axis=0)
         
         # Simple proportional estimation
         length = reference_length * pixel_length
         width = reference_length * pixel_width
         height = reference_length * pixel_height
         
-        return round(length, 2), round(width, 2), round(height, 2)
\ No newline at end of file
+        return round(float(length), 2), round(float(width), 2), round(float(height), 2)
\ No newline at end of file
@@ -0,0 +1,421 @@
+# camera_vision/pipeline.py
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from camera_vision.dimension_fusion import DimensionFusion, FusedEstimate, landmark_points
+
+logger = logging.getLogger(__name__)
+
+# Recent samples kept per stage for FPS and latency percentiles
+STATS_WINDOW = 120
+# Stages every frame fans out to before it is measured
+DETECTION_STAGES = ("reference", "detect")
+
+
+class FramePacket:
+    """One captured frame and what each stage found in it"""
+    __slots__ = ("index", "captured_at", "image", "rgb", "pending", "abandoned",
+                 "reference", "detection", "dimensions", "estimate")
+
+    def __init__(self, index: int, captured_at: float, image: np.ndarray, rgb: Optional[np.ndarray] = None):
+        self.index = index
+        self.captured_at = captured_at
+        self.image = image
+        # Shared by the detection stages so the frame is converted only once
+        self.rgb = rgb
+        # Detection stages still working on the frame
+        self.pending = len(DETECTION_STAGES)
+        # Set once any stage drops the frame, so the others skip it too
+        self.abandoned = False
+        self.reference = None
+        self.detection = None
+        self.dimensions: Optional[Tuple[float, float, float]] = None
+        self.estimate: Optional[FusedEstimate] = None
+
+
+class FrameQueue:
+    def __init__(self, maxsize: int = 1, producers: int = 1):
+        """
+        Bounded hand-off between stages that keeps the newest frames
+        Args:
+            maxsize: Frames held; when full the oldest one is dropped
+            producers: Stages feeding the queue; it closes once all of them have
+        """
+        self.maxsize = maxsize
+        self.producers = producers
+        self.dropped = 0
+        self._items = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, packet: FramePacket):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft().abandoned = True
+                self.dropped += 1
+            self._items.append(packet)
+            self._cond.notify()
+
+    def get(self, timeout: float = 0.1) -> Optional[FramePacket]:
+        """
+        Oldest frame still queued
+        Returns:
+            The frame, or None on timeout or once closed and drained
+        """
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self.producers -= 1
+            if self.producers <= 0:
+                self._closed = True
+                self._cond.notify_all()
+
+    def shut(self):
+        """
+        Close the queue whatever its producers are doing
+        """
+        with self._cond:
+            self.producers = 0
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def drained(self) -> bool:
+        with self._cond:
+            return self._closed and not self._items
+
+
+class StageStats:
+    def __init__(self, name: str):
+        """
+        Rolling throughput and latency of one pipeline stage
+        Args:
+            name: Stage name used in reports
+        """
+        self.name = name
+        self.processed = 0
+        self.stale = 0
+        self.errors = 0
+        self._done_at = deque(maxlen=STATS_WINDOW)
+        self._latency = deque(maxlen=STATS_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, started: float, finished: float):
+        with self._lock:
+            self.processed += 1
+            self._done_at.append(finished)
+            self._latency.append(finished - started)
+
+    def report(self) -> Dict:
+        with self._lock:
+            done_at = list(self._done_at)
+            latency = np.array(self._latency) * 1000
+        span = done_at[-1] - done_at[0] if len(done_at) > 1 else 0.0
+        return {
+            "processed": self.processed,
+            "stale": self.stale,
+            "errors": self.errors,
+            "fps": round((len(done_at) - 1) / span, 2) if span > 0 else 0.0,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latency, 50)), 3) if latency.size else 0.0,
+                "p95": round(float(np.percentile(latency, 95)), 3) if latency.size else 0.0
+            }
+        }
+
+
+def landmark_extent(landmarks, frame_shape: Tuple[int, ...]) -> Tuple[float, float, float]:
+    """
+    Pixel extent of Objectron landmarks along each axis
+    Args:
+        landmarks: Normalized 2D landmarks from ObjectronDetector.detect_object
+        frame_shape: Shape of the frame they were detected in
+    Returns:
+        Tuple of (length, width, height) in pixels
+    """
+    height_px, width_px = frame_shape[:2]
+    extent = np.ptp(landmark_points(landmarks), axis=0)
+    # Objectron scales z like x
+    return float(extent[0] * width_px), float(extent[1] * height_px), float(extent[2] * width_px)
+
+
+def measure_frame(reference,
+                  detection,
+                  frame_shape: Tuple[int, ...],
+                  estimator,
+                  distance_cm: float) -> Optional[Tuple[float, float, float]]:
+    """
+    Object dimensions from one frame's reference and Objectron detections
+    Args:
+        reference: ReferenceDetector.detect_reference result or None
+        detection: ObjectronDetector.detect_object result or None
+        frame_shape: Shape of the frame both were detected in
+        estimator: DimensionEstimator for the reference object's size
+        distance_cm: Distance from the camera to the packing surface
+    Returns:
+        Tuple of (length, width, height) in cm, or None without both detections
+    """
+    if reference is None or detection is None:
+        return None
+    ref_width, ref_height, _ = reference
+    # detect_reference reports the short edge as width
+    estimator.calculate_focal_length(ref_height, ref_width, distance_cm)
+    landmarks, _ = detection
+    length, width, height = landmark_extent(landmarks, frame_shape)
+    return estimator.estimate_dimensions(length, width, height, distance_cm)
+
+
+class VisionPipeline:
+    def __init__(self,
+                 source,
+                 reference_detector,
+                 object_detector,
+                 estimator,
+                 reference_type: str = 'a4',
+                 distance_cm: float = 60.0,
+                 queue_size: int = 1,
+                 max_frame_age_ms: float = 500.0,
+                 on_result: Optional[Callable[[FramePacket], Any]] = None,
+                 fusion: Optional[DimensionFusion] = None,
+                 stop_when_stable: bool = False):
+        """
+        Capture -> reference detection and Objectron side by side -> measurement
+
+        Every stage has its own thread. Each captured frame is converted to RGB
+        once and handed to both detection stages at the same time; it is
+        measured once both are done with it.
+        Args:
+            source: Frame source with read() -> (ok, frame), e.g. cv2.VideoCapture
+            reference_detector: ReferenceDetector
+            object_detector: ObjectronDetector
+            estimator: DimensionEstimator for the reference object's size
+            reference_type: Reference object to look for ('a4' or 'credit_card')
+            distance_cm: Distance from the camera to the packing surface
+            queue_size: Frames buffered between stages; the oldest is dropped when full
+            max_frame_age_ms: Frames older than this are skipped instead of processed
+            on_result: Called with each measured frame
+            fusion: Fuses per-frame dimensions across frames; set on each packet as estimate
+            stop_when_stable: Stop scanning once the fused estimate is stable
+        """
+        self.source = source
+        self.reference_detector = reference_detector
+        # Consecutive frames of one camera: look where the reference was last seen first
+        reference_detector.tracking = True
+        self.object_detector = object_detector
+        self.estimator = estimator
+        self.reference_type = reference_type
+        self.distance_cm = distance_cm
+        self.queue_size = queue_size
+        self.max_frame_age = max_frame_age_ms / 1000
+        self.on_result = on_result
+        self.fusion = fusion
+        self.stop_when_stable = stop_when_stable
+        self._stable = threading.Event()
+        self.queues = self._new_queues()
+        self.stats = {name: StageStats(name) for name in ("capture", "reference", "detect", "measure")}
+        self.end_to_end = StageStats("end_to_end")
+        self._join_lock = threading.Lock()
+        self._latest: Optional[FramePacket] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _new_queues(self) -> Dict[str, FrameQueue]:
+        queues = {name: FrameQueue(self.queue_size) for name in DETECTION_STAGES}
+        queues["measure"] = FrameQueue(self.queue_size, producers=len(DETECTION_STAGES))
+        return queues
+
+    @classmethod
+    def from_camera(cls, camera_index: int = 0, **kwargs) -> "VisionPipeline":
+        """
+        Pipeline reading from a local camera
+        Args:
+            camera_index: OpenCV camera index
+            kwargs: Remaining VisionPipeline arguments
+        Returns:
+            Pipeline, not yet started
+        """
+        import cv2
+        capture = cv2.VideoCapture(camera_index)
+        # Keep the driver from buffering frames we would only drop
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cls(capture, **kwargs)
+
+    def _capture(self):
+        stats = self.stats["capture"]
+        index = 0
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                ok, frame = self.source.read()
+                if not ok:
+                    break
+                # Both detectors want RGB; reorder the channels once for the two of them
+                rgb = np.ascontiguousarray(frame[..., ::-1])
+                finished = time.perf_counter()
+                stats.record(started, finished)
+                packet = FramePacket(index, finished, frame, rgb)
+                for name in DETECTION_STAGES:
+                    self.queues[name].put(packet)
+                index += 1
+        except Exception as e:
+            stats.errors += 1
+            logger.error(f"Frame capture failed: {str(e)}")
+        finally:
+            for name in DETECTION_STAGES:
+                self.queues[name].close()
+
+    def _find_reference(self, packet: FramePacket):
+        packet.reference = self.reference_detector.detect_reference(packet.rgb, self.reference_type, rgb=True)
+
+    def _detect_object(self, packet: FramePacket):
+        packet.detection = self.object_detector.detect_object(packet.rgb, rgb=True)
+
+    def _joined(self, packet: FramePacket) -> bool:
+        """
+        Whether the calling detection stage was the last one the frame waited for
+        """
+        with self._join_lock:
+            packet.pending -= 1
+            return packet.pending == 0 and not packet.abandoned
+
+    def _measure(self, packet: FramePacket):
+        packet.dimensions = measure_frame(packet.reference, packet.detection, packet.image.shape,
+                                          self.estimator, self.distance_cm)
+        if packet.dimensions is None:
+            return
+        if self.fusion is not None:
+            packet.estimate = self.fusion.update(packet.dimensions)
+            if packet.estimate is not None and packet.estimate.stable and not self._stable.is_set():
+                self._stable.set()
+                if self.stop_when_stable:
+                    self._halt()
+
+    def _run_stage(self, name: str, work: Callable[[FramePacket], None], inbox: FrameQueue,
+                   outbox: Optional[FrameQueue]):
+        stats = self.stats[name]
+        try:
+            while not self._stop.is_set():
+                packet = inbox.get()
+                if packet is None:
+                    if inbox.drained:
+                        break
+                    continue
+                if packet.abandoned:
+                    # Another detection stage dropped it; it will never be measured
+                    continue
+                started = time.perf_counter()
+                # Work on a frame the live view has long moved past is wasted
+                if started - packet.captured_at > self.max_frame_age:
+                    stats.stale += 1
+                    packet.abandoned = True
+                    continue
+                try:
+                    work(packet)
+                except Exception as e:
+                    stats.errors += 1
+                    packet.abandoned = True
+                    logger.error(f"Vision stage {name} failed on frame {packet.index}: {str(e)}")
+                    continue
+                finished = time.perf_counter()
+                stats.record(started, finished)
+                if outbox is None:
+                    self._deliver(packet, finished)
+                elif self._joined(packet):
+                    outbox.put(packet)
+        finally:
+            if outbox is not None:
+                outbox.close()
+
+    def _deliver(self, packet: FramePacket, finished: float):
+        self.end_to_end.record(packet.captured_at, finished)
+        self._latest = packet
+        if self.on_result is not None:
+            try:
+                self.on_result(packet)
+            except Exception as e:
+                logger.error(f"Vision result callback failed: {str(e)}")
+
+    def start(self) -> "VisionPipeline":
+        if self._threads:
+            return self
+        self._stop.clear()
+        self._stable.clear()
+        self.queues = self._new_queues()
+        stages = [
+            ("reference", self._find_reference, self.queues["reference"], self.queues["measure"]),
+            ("detect", self._detect_object, self.queues["detect"], self.queues["measure"]),
+            ("measure", self._measure, self.queues["measure"], None)
+        ]
+        self._threads = [threading.Thread(target=self._capture, name="vision-capture", daemon=True)]
+        self._threads += [threading.Thread(target=self._run_stage, args=stage, name=f"vision-{stage[0]}", daemon=True)
+                          for stage in stages]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def join(self, timeout: Optional[float] = None):
+        """
+        Wait for the source to run out and every queued frame to finish
+        """
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _halt(self):
+        self._stop.set()
+        for queue in self.queues.values():
+            queue.shut()
+
+    def stop(self):
+        self._halt()
+        self.join()
+        self._threads = []
+
+    def wait_stable(self, timeout: Optional[float] = None) -> Optional[FusedEstimate]:
+        """
+        Block until the fused estimate is stable
+        Args:
+            timeout: Seconds to wait at most
+        Returns:
+            The stable estimate, or None on timeout
+        """
+        if self.fusion is None:
+            raise ValueError("Pipeline has no fusion to wait for. Pass fusion=DimensionFusion()")
+        if not self._stable.wait(timeout):
+            return None
+        return self.fusion.estimate
+
+    def reset(self):
+        """
+        Start a new measurement, e.g. when the next item is placed
+        """
+        self._stable.clear()
+        if self.fusion is not None:
+            self.fusion.reset()
+
+    def latest(self) -> Optional[FramePacket]:
+        """
+        Most recently measured frame
+        """
+        return self._latest
+
+    def report(self) -> Dict:
+        """
+        Per-stage FPS and latency, frames dropped between stages and end-to-end latency
+        """
+        report = {name: stats.report() for name, stats in self.stats.items()}
+        for name, queue in self.queues.items():
+            report[name]["dropped"] = queue.dropped
+        report["end_to_end"] = self.end_to_end.report()
+        return report
+
+    def __enter__(self) -> "VisionPipeline":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
\ No newline at end of file
@@ -1,10 +1,29 @@
 # camera_vision/reference_detection.py
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 class ReferenceDetector:
-    def __init__(self):
+    def __init__(self,
+                 tracking: bool = False,
+                 search_width: int = 640,
+                 roi_margin: float = 0.25,
+                 min_area: float = 100.0):
+        """
+        Args:
+            tracking: Search around the last detection before the whole frame;
+                only for consecutive frames of one camera, not unrelated images
+            search_width: Width frames are downscaled to for full-frame search
+            roi_margin: Region of interest around the last detection, as a
+                fraction of its size
+            min_area: Smallest contour considered, in search-scale pixels
+        """
+        self.tracking = tracking
+        self.search_width = search_width
+        self.roi_margin = roi_margin
+        self.min_area = min_area
+        # Last bounding rect (x, y, w, h) per reference type, full-frame pixels
+        self._tracks: Dict[str, Tuple[int, int, int, int]] = {}
         # Predefined reference objects (A4 paper, credit card)
         self.reference_objects = {
             'a4': {
@@ -27,23 +46,19 @@ class ReferenceDetector:
             }
         }
         
-    def detect_reference(self,
-                        frame: np.ndarray,
-                        reference_type: str = 'a4') -> Optional[Tuple[float, float, np.ndarray]]:
+    def _match(self,
+               hsv: np.ndarray,
+               ref_obj: Dict,
+               min_area: float = 0.0) -> Optional[Tuple[float, float, np.ndarray]]:
         """
-        Detect reference object in frame
+        Find the first quadrilateral with the reference's color and aspect ratio
         Args:
-            frame: Input image (BGR)
-            reference_type: Type of reference object ('a4' or 'credit_card')
+            hsv: HSV image (or part of one) to search
+            ref_obj: Entry of reference_objects
+            min_area: Skip contours smaller than this many pixels
         Returns:
-            Tuple of (pixel_width, pixel_height, contour) or None
+            Tuple of (pixel_width, pixel_height, contour) in hsv's pixels or None
         """
-        if reference_type not in self.reference_objects:
-            raise ValueError(f"Unknown reference type: {reference_type}. Choose 'a4' or 'credit_card'")
-            
-        ref_obj = self.reference_objects[reference_type]
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
         # Create mask based on color range
         mask = cv2.inRange(hsv, 
                           ref_obj['color_range']['lower'],
@@ -53,6 +68,10 @@ class ReferenceDetector:
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         for cnt in contours:
+            # Specks of matching color can't be the reference; skip them before the polygon fit
+            if min_area and cv2.contourArea(cnt) < min_area:
+                continue
+                
             # Approximate contour to polygon
             epsilon = 0.02 * cv2.arcLength(cnt, True)
             approx = cv2.approxPolyDP(cnt, epsilon, True)
@@ -64,6 +83,8 @@ class ReferenceDetector:
                 width, height = rect[1]
                 if width > height:
                     width, height = height, width
+                if width == 0:
+                    continue
                 ar = height / width
                 
                 # Check if aspect ratio matches reference
@@ -73,6 +94,147 @@ class ReferenceDetector:
                     
         return None
         
+    def _roi(self,
+             rect: Tuple[int, int, int, int],
+             shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+        """
+        Rect grown by roi_margin on every side, clipped to the frame
+        Returns:
+            Tuple of (x0, y0, x1, y1)
+        """
+        x, y, w, h = rect
+        dx = int(w * self.roi_margin) + 8
+        dy = int(h * self.roi_margin) + 8
+        return max(x - dx, 0), max(y - dy, 0), min(x + w + dx, shape[1]), min(y + h + dy, shape[0])
+        
+    def _search_roi(self,
+                    frame: np.ndarray,
+                    rect: Tuple[int, int, int, int],
+                    ref_obj: Dict,
+                    to_hsv: int = cv2.COLOR_BGR2HSV) -> Optional[Tuple[float, float, np.ndarray]]:
+        """
+        Full-resolution search around rect
+        Args:
+            frame: Input image (BGR)
+            rect: Where to look, as (x, y, w, h) in frame pixels
+            ref_obj: Entry of reference_objects
+            to_hsv: cv2 conversion code from frame's channel order to HSV
+        Returns:
+            Tuple of (pixel_width, pixel_height, contour) in frame pixels or None
+        """
+        x0, y0, x1, y1 = self._roi(rect, frame.shape)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        roi = cv2.cvtColor(frame[y0:y1, x0:x1], to_hsv)
+        found = self._match(roi, ref_obj, self.min_area)
+        if found is None:
+            return None
+        width, height, cnt = found
+        return width, height, cnt + np.array([x0, y0], dtype=cnt.dtype)
+        
+    def _downscale(self, frame: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Frame shrunk to search_width, with the scale applied
+        """
+        scale = min(1.0, self.search_width / frame.shape[1]) if self.search_width else 1.0
+        if scale < 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return frame, scale
+        
+    def _search_frame(self,
+                      frame: np.ndarray,
+                      small_hsv: np.ndarray,
+                      scale: float,
+                      ref_obj: Dict,
+                      to_hsv: int = cv2.COLOR_BGR2HSV) -> Optional[Tuple[float, float, np.ndarray]]:
+        """
+        Downscaled full-frame search, refined at full resolution
+        Args:
+            frame: Input image (BGR)
+            small_hsv: HSV of the downscaled frame
+            scale: Downscale factor of small_hsv
+            ref_obj: Entry of reference_objects
+            to_hsv: cv2 conversion code from frame's channel order to HSV
+        Returns:
+            Tuple of (pixel_width, pixel_height, contour) in frame pixels or None
+        """
+        found = self._match(small_hsv, ref_obj, self.min_area)
+        if found is None:
+            return None
+        width, height, cnt = found
+        if scale == 1.0:
+            return found
+        # Measure on the full-resolution pixels around the coarse hit
+        x, y, w, h = cv2.boundingRect(cnt)
+        coarse = (int(x / scale), int(y / scale), int(np.ceil(w / scale)), int(np.ceil(h / scale)))
+        refined = self._search_roi(frame, coarse, ref_obj, to_hsv)
+        if refined is not None:
+            return refined
+        return width / scale, height / scale, (cnt / scale).astype(np.int32)
+        
+    def detect_references(self,
+                          frame: np.ndarray,
+                          reference_types: Optional[List[str]] = None,
+                          rgb: bool = False) -> Dict[str, Optional[Tuple[float, float, np.ndarray]]]:
+        """
+        Detect several reference objects in frame, sharing one color conversion
+        Args:
+            frame: Input image (BGR)
+            reference_types: Types to look for (all configured types by default)
+            rgb: frame is RGB rather than BGR, e.g. converted once for several detectors
+        Returns:
+            Dict of reference type -> (pixel_width, pixel_height, contour) or None
+        """
+        reference_types = reference_types or list(self.reference_objects)
+        for reference_type in reference_types:
+            if reference_type not in self.reference_objects:
+                raise ValueError(f"Unknown reference type: {reference_type}. Choose 'a4' or 'credit_card'")
+                
+        to_hsv = cv2.COLOR_RGB2HSV if rgb else cv2.COLOR_BGR2HSV
+        results = {}
+        small = None
+        for reference_type in reference_types:
+            ref_obj = self.reference_objects[reference_type]
+            found = None
+            rect = self._tracks.get(reference_type) if self.tracking else None
+            if rect is not None:
+                # The sheet barely moves between frames: look where it was first
+                found = self._search_roi(frame, rect, ref_obj, to_hsv)
+            if found is None:
+                if small is None:
+                    small_frame, scale = self._downscale(frame)
+                    small = cv2.cvtColor(small_frame, to_hsv)
+                found = self._search_frame(frame, small, scale, ref_obj, to_hsv)
+                
+            if found is not None and self.tracking:
+                self._tracks[reference_type] = cv2.boundingRect(found[2])
+            else:
+                self._tracks.pop(reference_type, None)
+            results[reference_type] = found
+            
+        return results
+        
+    def detect_reference(self,
+                        frame: np.ndarray,
+                        reference_type: str = 'a4',
+                        rgb: bool = False) -> Optional[Tuple[float, float, np.ndarray]]:
+        """
+        Detect reference object in frame
+        Args:
+            frame: Input image (BGR)
+            reference_type: Type of reference object ('a4' or 'credit_card')
+            rgb: frame is RGB rather than BGR
+        Returns:
+            Tuple of (pixel_width, pixel_height, contour) or None
+        """
+        return self.detect_references(frame, [reference_type], rgb)[reference_type]
+        
+    def reset_tracking(self):
+        """
+        Forget previous detections, e.g. after the camera moved
+        """
+        self._tracks.clear()
+        
     def draw_reference(self,
                       frame: np.ndarray,
                       contour: np.ndarray) -> np.ndarray:
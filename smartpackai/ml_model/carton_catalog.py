@@ -0,0 +1,154 @@
+# ml_model/carton_catalog.py
+import csv
+import itertools
+import os
+import numpy as np
+from typing import List, Optional, Tuple
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-6
+DEFAULT_CATALOG_PATH = os.getenv("CARTON_CATALOG_PATH", str(Path(__file__).parent / "cartons.csv"))
+
+Dims = Tuple[float, float, float]
+
+
+class _FitTable:
+    """Candidate dims (M, 3) in volume order with suffix maxima for early rejection"""
+
+    def __init__(self, dims: np.ndarray, volumes: np.ndarray):
+        order = np.lexsort((dims[:, 2], dims[:, 1], dims[:, 0], volumes))
+        dims, volumes = dims[order], volumes[order]
+
+        # Dominance pruning: an entry contained in an earlier entry of no
+        # larger volume can never be the smallest fit
+        keep = np.ones(len(dims), dtype=bool)
+        for j in range(1, len(dims)):
+            kept = keep[:j]
+            keep[j] = not (dims[:j][kept] >= dims[j] - EPSILON).all(axis=1).any()
+        self.dims = dims[keep]
+        self.volumes = volumes[keep]
+
+        # suffix_max[i] bounds what any entry from i onward can hold
+        self.suffix_max = np.maximum.accumulate(self.dims[::-1], axis=0)[::-1]
+
+    def lookup(self, queries: np.ndarray, min_volumes: np.ndarray) -> np.ndarray:
+        """Row of the smallest entry holding each query (Q, 3); -1 if none"""
+        result = np.full(queries.shape[0], -1, dtype=np.int64)
+        if self.dims.shape[0] == 0 or queries.shape[0] == 0:
+            return result
+        start = np.searchsorted(self.volumes, np.maximum(queries.prod(axis=1), min_volumes) - EPSILON)
+
+        # Queries larger than every remaining entry along some axis have no fit
+        open_ = start < self.dims.shape[0]
+        open_[open_] = (self.suffix_max[start[open_]] >= queries[open_] - EPSILON).all(axis=1)
+        pending = np.flatnonzero(open_)
+        cursor = start[pending]
+
+        # Walk all pending queries forward in lockstep; most resolve in a step or two
+        while pending.size:
+            fits = (self.dims[cursor] >= queries[pending] - EPSILON).all(axis=1)
+            result[pending[fits]] = cursor[fits]
+            cursor = cursor[~fits] + 1
+            pending = pending[~fits]
+            alive = cursor < self.dims.shape[0]
+            alive[alive] = (self.suffix_max[cursor[alive]] >= queries[pending[alive]] - EPSILON).all(axis=1)
+            cursor, pending = cursor[alive], pending[alive]
+        return result
+
+
+class CartonCatalog:
+    """Indexed carton catalog for "smallest carton that fits" lookups.
+
+    Cartons are kept in volume order. Rotatable queries compare sorted
+    dimensions; fixed-orientation queries are matched against all six
+    orientations of every carton. Each lookup bisects on volume, rejects
+    impossible queries from suffix maxima and then scans forward, so only
+    the few cartons just above the required volume are ever tested.
+    """
+
+    def __init__(self, cartons: List[Dims]):
+        if not cartons:
+            raise ValueError("Carton catalog is empty")
+        boxes = np.array(cartons, dtype=np.float64).reshape(-1, 3)
+        if (boxes <= 0).any():
+            raise ValueError("Carton dimensions must be positive")
+        volumes = boxes.prod(axis=1)
+        self.boxes = boxes[np.argsort(volumes, kind="stable")]
+
+        # Rotatable items only need sorted dims (largest first)
+        self._sorted = _FitTable(-np.sort(-self.boxes, axis=1), self.boxes.prod(axis=1))
+        # Fixed items need each orientation of each carton
+        oriented = np.unique(
+            np.concatenate([self.boxes[:, list(p)] for p in itertools.permutations(range(3))]), axis=0
+        )
+        self._oriented = _FitTable(oriented, oriented.prod(axis=1))
+
+    @classmethod
+    def from_file(cls, path: str) -> "CartonCatalog":
+        """Load a catalog from a CSV file with length, width and height columns"""
+        try:
+            with open(path, newline="") as f:
+                cartons = [
+                    (float(row["length"]), float(row["width"]), float(row["height"]))
+                    for row in csv.DictReader(f)
+                ]
+            logger.info(f"Loaded {len(cartons)} cartons from {path}")
+            return cls(cartons)
+        except Exception as e:
+            logger.error(f"Failed to load carton catalog: {str(e)}")
+            raise
+
+    @property
+    def cartons(self) -> List[Dims]:
+        """Cartons as (length, width, height) tuples, smallest volume first"""
+        return [tuple(box) for box in self.boxes.tolist()]
+
+    @property
+    def largest(self) -> Dims:
+        return tuple(self.boxes[-1].tolist())
+
+    def smallest_fit(self, dims: Dims, rotatable: bool = True,
+                     min_volume: float = 0.0) -> Optional[Dims]:
+        """Smallest carton holding ``dims`` with at least ``min_volume``, oriented to fit"""
+        found = self.smallest_fit_many(
+            np.array([dims], dtype=np.float64),
+            np.array([rotatable]),
+            np.array([min_volume], dtype=np.float64)
+        )[0]
+        if np.isnan(found[0]):
+            return None
+        return tuple(found.tolist())
+
+    def smallest_fit_many(self, dims: np.ndarray, rotatable: np.ndarray,
+                          min_volumes: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vectorized smallest_fit over (N, 3) dims; rows without a fit are NaN"""
+        dims = np.asarray(dims, dtype=np.float64).reshape(-1, 3)
+        rotatable = np.broadcast_to(np.asarray(rotatable, dtype=bool), dims.shape[:1])
+        if min_volumes is None:
+            min_volumes = np.zeros(dims.shape[0])
+        result = np.full(dims.shape, np.nan)
+
+        rows = np.flatnonzero(rotatable)
+        if rows.size:
+            # Lay the carton's largest side along the item's largest side
+            rank = np.argsort(-dims[rows], axis=1, kind="stable")
+            queries = np.take_along_axis(dims[rows], rank, axis=1)
+            found = self._sorted.lookup(queries, min_volumes[rows])
+            hit = found >= 0
+            oriented = np.empty((hit.sum(), 3))
+            np.put_along_axis(oriented, rank[hit], self._sorted.dims[found[hit]], axis=1)
+            result[rows[hit]] = oriented
+
+        rows = np.flatnonzero(~rotatable)
+        if rows.size:
+            found = self._oriented.lookup(dims[rows], min_volumes[rows])
+            hit = found >= 0
+            result[rows[hit]] = self._oriented.dims[found[hit]]
+        return result
+
+
+# Shared catalog instance
+catalog = CartonCatalog.from_file(DEFAULT_CATALOG_PATH)
\ No newline at end of file
@@ -1,57 +1,173 @@
 # ml_model/predict.py
 import joblib
+import os
+import threading
+import time
 import numpy as np
 import pandas as pd
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 from pathlib import Path
 import logging
 
+from ml_model.carton_catalog import catalog as carton_catalog
+from ml_model.compiled_forest import CompiledForest
+
 logger = logging.getLogger(__name__)
 
+FEATURE_COLUMNS = [
+    'item_length', 'item_width', 'item_height',
+    'item_weight', 'quantity', 'fragility'
+]
+
+DEFAULT_MODEL_PATH = os.getenv("MODEL_PATH", str(Path(__file__).parent / 'model.pkl'))
+
+# Typical item used to warm the model up before serving traffic
+WARM_UP_ROW = [[20.0, 15.0, 10.0, 1.0, 1, 0.5]]
+
+class LoadedModel(NamedTuple):
+    """A loaded model and its compiled form, swapped in as one unit"""
+    model: Any
+    compiled: Optional[CompiledForest]
+
 class BoxSizePredictor:
-    def __init__(self, model_path: str = None):
-        self.model = self._load_model(model_path)
-        self.standard_boxes = [
-            (20, 15, 10), (25, 20, 15), (30, 25, 20),
-            (40, 30, 20), (50, 40, 30)
-        ]
-        
+    """Box size predictor backed by a trained regression model.
+
+    The model is loaded on first use (or by ``load``/``warm_up`` from a
+    startup hook), not at import time. Loading uses joblib's mmap_mode so
+    the NumPy arrays of an uncompressed model are mapped from the file and
+    shared copy-on-write between forked workers instead of copied into each.
+    Tree ensembles are compiled to a CompiledForest on load, so requests
+    skip the pandas/sklearn overhead. ``swap`` replaces the served model in
+    one reference assignment, so predictions never see a half-loaded one.
+    """
+
+    def __init__(self, model_path: str = None, mmap_mode: Optional[str] = "r",
+                 version: Optional[str] = None):
+        self.model_path = model_path or DEFAULT_MODEL_PATH
+        self.mmap_mode = mmap_mode
+        self.version = version
+        self._state: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+        self.load_error: Optional[str] = None
+        self.load_time_ms: Optional[float] = None
+        self.warmed_up = False
+        # Called as shadow(features, output, elapsed_ms) after each prediction
+        self.shadow: Optional[Callable[[np.ndarray, np.ndarray, float], None]] = None
+        self.catalog = carton_catalog
+        self.standard_boxes = self.catalog.cartons
+
+    @property
+    def model(self):
+        """The trained model, loaded on first access"""
+        return (self._state or self.load()).model
+
+    @property
+    def compiled(self) -> Optional[CompiledForest]:
+        return self._state.compiled if self._state is not None else None
+
+    @property
+    def is_ready(self) -> bool:
+        """Loaded and warmed up, so the next prediction pays no start-up cost"""
+        return self._state is not None and self.warmed_up
+
+    def load(self) -> LoadedModel:
+        """Load the model if it is not loaded yet; safe to call from several threads"""
+        with self._lock:
+            if self._state is None:
+                started = time.perf_counter()
+                model = self._load_model(self.model_path)
+                if isinstance(model, CompiledForest):
+                    compiled = model
+                elif CompiledForest.supports(model):
+                    # A copy per process; registry versions are stored compiled and stay shared
+                    logger.warning(f"Compiling {type(model).__name__} from {self.model_path} on load; "
+                                   f"publish it through the model registry to share its arrays")
+                    compiled = CompiledForest.from_sklearn(model)
+                else:
+                    compiled = None
+                self._state = LoadedModel(model, compiled)
+                self.load_time_ms = (time.perf_counter() - started) * 1000
+                self.load_error = None
+                logger.info(f"Loaded model from {self.model_path} in {self.load_time_ms:.1f} ms")
+        return self._state
+
     def _load_model(self, model_path: str):
         """Load trained model from file"""
         try:
-            if model_path is None:
-                model_path = Path(__file__).parent / 'model.pkl'
-            return joblib.load(model_path)
+            return joblib.load(model_path, mmap_mode=self.mmap_mode)
         except Exception as e:
+            self.load_error = f"{type(e).__name__}: {str(e)}"
             logger.error(f"Failed to load model: {str(e)}")
             raise
 
+    def swap(self, candidate: "BoxSizePredictor"):
+        """Serve ``candidate``'s loaded model from now on
+
+        Predictions already running finish on the previous model.
+        """
+        state = candidate._state
+        if state is None:
+            raise ValueError(f"Candidate model {candidate.model_path} is not loaded")
+        with self._lock:
+            self._state = state
+            self.model_path = candidate.model_path
+            self.version = candidate.version
+            self.load_time_ms = candidate.load_time_ms
+            self.load_error = None
+            self.warmed_up = candidate.warmed_up
+        logger.info(f"Swapped in model {self.version or self.model_path}")
+
+    def warm_up(self) -> bool:
+        """Load the model and run one prediction so the first request is not slow"""
+        try:
+            self.predict_features(np.array(WARM_UP_ROW, dtype=np.float64))
+            self.warmed_up = True
+        except Exception as e:
+            self.load_error = self.load_error or f"{type(e).__name__}: {str(e)}"
+            logger.error(f"Model warm-up failed: {str(e)}")
+        return self.is_ready
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        """Raw model output (N, 3) for a feature matrix (N, 6) in FEATURE_COLUMNS order"""
+        # Read the state once so a concurrent swap cannot mix two models
+        state = self._state or self.load()
+        started = time.perf_counter()
+        if state.compiled is not None:
+            output = state.compiled.predict(features)
+        else:
+            output = state.model.predict(pd.DataFrame(features, columns=FEATURE_COLUMNS))
+        shadow = self.shadow
+        if shadow is not None:
+            shadow(features, output, (time.perf_counter() - started) * 1000)
+        return output
+
+    def status(self) -> Dict:
+        """Readiness details for the model"""
+        return {
+            "ready": self.is_ready,
+            "loaded": self._state is not None,
+            "version": self.version,
+            "compiled": self.compiled is not None,
+            "model_path": str(self.model_path),
+            "load_time_ms": self.load_time_ms,
+            "error": self.load_error
+        }
+
     def _select_nearest_standard(self, pred_length: float, pred_width: float, pred_height: float) -> Dict:
         """Find closest standard box size"""
+        # The smallest carton holding the predicted box in any orientation
+        # is also the closest in volume
+        box = self.catalog.smallest_fit((pred_length, pred_width, pred_height))
         best_match = None
-        min_diff = float('inf')
-        
-        for box in self.standard_boxes:
-            # Calculate volume difference
-            std_volume = box[0] * box[1] * box[2]
-            pred_volume = pred_length * pred_width * pred_height
-            volume_diff = abs(std_volume - pred_volume)
-            
-            # Check dimensional constraints
-            length_ok = box[0] >= pred_length
-            width_ok = box[1] >= pred_width
-            height_ok = box[2] >= pred_height
-            
-            if length_ok and width_ok and height_ok and volume_diff < min_diff:
-                min_diff = volume_diff
-                best_match = {
-                    'length': box[0],
-                    'width': box[1],
-                    'height': box[2],
-                    'volume': std_volume,
-                    'is_custom': False
-                }
-        
+        if box is not None:
+            best_match = {
+                'length': box[0],
+                'width': box[1],
+                'height': box[2],
+                'volume': box[0] * box[1] * box[2],
+                'is_custom': False
+            }
+
         return best_match or {
             'length': round(pred_length + 2, 1),  # Add 2cm padding
             'width': round(pred_width + 2, 1),
@@ -63,20 +179,27 @@ class BoxSizePredictor:
     def predict(self, item_length: float, item_width: float, item_height: float,
                 item_weight: float, quantity: int = 1, fragility: float = 0.5) -> Dict:
         """Predict optimal box dimensions"""
+        return self.predict_many([(item_length, item_width, item_height,
+                                   item_weight, quantity, fragility)])[0]
+
+    def predict_many(self, rows: List[Tuple]) -> List[Dict]:
+        """``predict`` for many rows in FEATURE_COLUMNS order with a single model call"""
         try:
             # Prepare input features
-            input_data = pd.DataFrame([[
-                item_length, item_width, item_height,
-                item_weight, quantity, fragility
-            ]], columns=[
-                'item_length', 'item_width', 'item_height',
-                'item_weight', 'quantity', 'fragility'
-            ])
-            
+            input_data = np.array(rows, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
+
             # Make prediction
-            pred = self.model.predict(input_data)[0]
+            preds = self.predict_features(input_data)
+        except Exception as e:
+            logger.error(f"Prediction failed: {str(e)}")
+            return [{'status': 'error', 'message': str(e)} for _ in rows]
+        return [self._to_result(row, pred) for row, pred in zip(rows, preds)]
+
+    def _to_result(self, row: Tuple, pred: np.ndarray) -> Dict:
+        try:
+            item_length, item_width, item_height, _, quantity, _ = row
             pred_length, pred_width, pred_height = pred
-            
+
             # Select standard box or create custom
             box = self._select_nearest_standard(pred_length, pred_width, pred_height)
             
@@ -102,11 +225,15 @@ class BoxSizePredictor:
                 'message': str(e)
             }
 
-# Singleton predictor instance
+# Singleton predictor instance; the model itself loads on first use
 predictor = BoxSizePredictor()
 
 def predict_box_dimensions(item_length: float, item_width: float, item_height: float,
                           item_weight: float, quantity: int = 1, fragility: float = 0.5):
     """Public prediction interface"""
     return predictor.predict(item_length, item_width, item_height,
-                           item_weight, quantity, fragility)
\ No newline at end of file
+                           item_weight, quantity, fragility)
+
+def predict_box_dimensions_many(rows: List[Tuple]) -> List[Dict]:
+    """Public batch interface: one result per (length, width, height, weight, quantity, fragility) row"""
+    return predictor.predict_many(rows)
\ No newline at end of file
@@ -0,0 +1,132 @@
+# ml_model/registry.py
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+import joblib
+import logging
+
+from ml_model.compiled_forest import CompiledForest
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILENAME = "model.pkl"
+METADATA_FILENAME = "metadata.json"
+# Names the version to serve; the newest version is served when absent
+CURRENT_FILENAME = "CURRENT"
+
+
+def _version_key(version: str):
+    # Natural order, so v10 sorts after v9
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part)
+            for part in re.split(r"(\d+)", version) if part]
+
+
+class ModelRegistry:
+    """Directory of versioned model artifacts.
+
+    Layout::
+
+        <root>/v1/model.pkl
+        <root>/v1/metadata.json     (optional)
+        <root>/v2/model.pkl
+        <root>/CURRENT              (optional, e.g. "v1")
+
+    A version is any sub-directory holding a model.pkl. Versions are
+    never modified once published; rolling back is pointing CURRENT at
+    an older one. sklearn forests are stored compiled, so servers map the
+    arrays they predict with straight from the file.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def versions(self) -> List[str]:
+        """Published versions, oldest first"""
+        if not self.root.is_dir():
+            return []
+        found = [p.name for p in self.root.iterdir() if (p / MODEL_FILENAME).is_file()]
+        return sorted(found, key=_version_key)
+
+    def latest(self) -> Optional[str]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def current(self) -> Optional[str]:
+        """The version to serve: CURRENT if it names a published version, else the newest"""
+        pointer = self.root / CURRENT_FILENAME
+        if pointer.is_file():
+            version = pointer.read_text().strip()
+            if (self.root / version / MODEL_FILENAME).is_file():
+                return version
+            logger.warning(f"{pointer} names unknown model version {version!r}; using the newest")
+        return self.latest()
+
+    def set_current(self, version: str):
+        """Point CURRENT at ``version`` atomically"""
+        self.path_for(version)
+        tmp_path = self.root / f"{CURRENT_FILENAME}.tmp"
+        tmp_path.write_text(version)
+        os.replace(tmp_path, self.root / CURRENT_FILENAME)
+
+    def path_for(self, version: str) -> str:
+        """Model file of ``version``"""
+        path = self.root / version / MODEL_FILENAME
+        if not path.is_file():
+            raise KeyError(f"Unknown model version: {version}")
+        return str(path)
+
+    def metadata(self, version: str) -> Dict:
+        path = self.root / version / METADATA_FILENAME
+        if not path.is_file():
+            return {}
+        return json.loads(path.read_text())
+
+    def next_version(self) -> str:
+        numbers = [int(v[1:]) for v in self.versions() if re.fullmatch(r"v\d+", v)]
+        return f"v{max(numbers, default=0) + 1}"
+
+    def publish(self, model_file: str, version: Optional[str] = None,
+                metadata: Optional[Dict] = None) -> str:
+        """Copy ``model_file`` in as a new version and return its name
+
+        The artifact is staged in a temporary directory and renamed into
+        place, so watchers never see a partially written version.
+        """
+        version = version or self.next_version()
+        target = self.root / version
+        if target.exists():
+            raise ValueError(f"Model version {version} already exists")
+        staging = self.root / f".{version}.tmp"
+        try:
+            staging.mkdir(parents=True)
+            self._stage_model(model_file, staging / MODEL_FILENAME)
+            if metadata is not None:
+                (staging / METADATA_FILENAME).write_text(json.dumps(metadata, indent=2, default=str))
+            os.replace(staging, target)
+        except Exception as e:
+            logger.error(f"Failed to publish model version {version}: {str(e)}")
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logger.info(f"Published model version {version} to {target}")
+        return version
+
+    @staticmethod
+    def _stage_model(model_file: str, target: Path):
+        """Copy the artifact in, compiling sklearn forests to a CompiledForest first
+
+        A forest compiled on load would give every worker its own copy of
+        the tree arrays instead of sharing the memory-mapped file.
+        """
+        try:
+            model = joblib.load(model_file, mmap_mode="r")
+        except Exception as e:
+            raise ValueError(f"{model_file} is not a loadable model: {type(e).__name__}: {str(e)}")
+        if isinstance(model, CompiledForest) or not CompiledForest.supports(model):
+            shutil.copyfile(model_file, target)
+            return
+        logger.info(f"Compiling {type(model).__name__} from {model_file} for publishing")
+        # Uncompressed, so the arrays can be memory-mapped on load
+        joblib.dump(CompiledForest.from_sklearn(model), target)
\ No newline at end of file
@@ -0,0 +1,238 @@
+# ml_model/rollout.py
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import numpy as np
+import logging
+
+from ml_model.predict import BoxSizePredictor
+from ml_model.registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+# Shadow batches allowed to wait for the scoring thread; more are dropped
+# rather than queued so shadowing never builds up memory under load
+MAX_PENDING_SHADOW = 8
+
+
+class ShadowStats:
+    """Running comparison of candidate against primary predictions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.dropped = 0
+        self.errors = 0
+        self.primary_ms = 0.0
+        self.candidate_ms = 0.0
+        self.abs_delta_sum = np.zeros(3)
+        self.max_abs_delta = 0.0
+
+    def record(self, primary: np.ndarray, candidate: np.ndarray, primary_ms: float, candidate_ms: float):
+        delta = np.abs(np.asarray(candidate, dtype=np.float64) - np.asarray(primary, dtype=np.float64))
+        with self._lock:
+            self.batches += 1
+            self.rows += len(delta)
+            self.primary_ms += primary_ms
+            self.candidate_ms += candidate_ms
+            self.abs_delta_sum += delta.reshape(len(delta), -1).sum(axis=0)
+            self.max_abs_delta = max(self.max_abs_delta, float(delta.max()) if delta.size else 0.0)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            mean_delta = self.abs_delta_sum / self.rows if self.rows else np.zeros(3)
+            return {
+                "batches": self.batches,
+                "rows": self.rows,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "mean_primary_ms": round(self.primary_ms / self.batches, 4) if self.batches else 0.0,
+                "mean_candidate_ms": round(self.candidate_ms / self.batches, 4) if self.batches else 0.0,
+                "mean_abs_delta": dict(zip(("length", "width", "height"), np.round(mean_delta, 4).tolist())),
+                "max_abs_delta": round(self.max_abs_delta, 4)
+            }
+
+
+class ModelRollout:
+    """Loads model versions in the background and swaps them into a live predictor.
+
+    A new version is loaded and warmed up on its own thread while the
+    current one keeps serving, then swapped in atomically. In shadow mode
+    the candidate is held back instead: a sample of live predictions is
+    re-scored on it (on a separate thread, off the request path) until it
+    is promoted or discarded.
+    """
+
+    def __init__(self, predictor: BoxSizePredictor, registry: Optional[ModelRegistry] = None,
+                 shadow_sample_rate: float = 0.05):
+        self.predictor = predictor
+        self.registry = registry
+        self.shadow_sample_rate = shadow_sample_rate
+        self.candidate: Optional[BoxSizePredictor] = None
+        self.state = "idle"
+        self.loading_version: Optional[str] = None
+        self.error: Optional[str] = None
+        # Not retried by check_registry until the registry points elsewhere
+        self.failed_version: Optional[str] = None
+        self.shadow_stats = ShadowStats()
+        self._pending_shadow = 0
+        self._lock = threading.Lock()
+        self._shadow_executor: Optional[ThreadPoolExecutor] = None
+        # Before anything can load the predictor, so even the first request
+        # is served by the registry's version rather than the default path
+        self.bootstrap()
+
+    def bootstrap(self):
+        """Point a not yet loaded predictor at the registry's current version"""
+        if self.registry is None or self.predictor.status()["loaded"]:
+            return
+        version = self.registry.current()
+        if version is not None:
+            self.predictor.model_path = self.registry.path_for(version)
+            self.predictor.version = version
+            logger.info(f"Serving model version {version} from {self.registry.root}")
+
+    def start(self, version: Optional[str] = None, shadow: bool = False, pin: bool = True) -> Dict:
+        """Begin loading ``version`` (default: the registry's current one) in the background
+
+        With ``pin`` the registry's CURRENT pointer is moved to the version
+        once it is swapped in, so a registry watcher does not revert it.
+        """
+        if self.registry is None:
+            raise ValueError("No model registry configured")
+        version = version or self.registry.current()
+        if version is None:
+            raise ValueError(f"No model versions in {self.registry.root}")
+        path = self.registry.path_for(version)
+        with self._lock:
+            if self.state == "loading":
+                raise RuntimeError(f"Model version {self.loading_version} is still loading")
+            self.state = "loading"
+            self.loading_version = version
+            self.error = None
+        thread = threading.Thread(target=self._load, args=(version, path, shadow, pin),
+                                  name=f"model-load-{version}", daemon=True)
+        thread.start()
+        return self.status()
+
+    def _load(self, version: str, path: str, shadow: bool, pin: bool):
+        try:
+            candidate = BoxSizePredictor(path, mmap_mode=self.predictor.mmap_mode, version=version)
+            candidate.load()
+            if not candidate.warm_up():
+                raise RuntimeError(candidate.load_error or "warm-up failed")
+        except Exception as e:
+            logger.error(f"Loading model version {version} failed: {str(e)}")
+            with self._lock:
+                self.state = "failed"
+                self.error = f"{type(e).__name__}: {str(e)}"
+                self.failed_version = version
+                self.loading_version = None
+            return
+
+        if shadow:
+            with self._lock:
+                self.candidate = candidate
+                self.shadow_stats = ShadowStats()
+                self.state = "shadowing"
+                self.loading_version = None
+            self.predictor.shadow = self._observe
+            logger.info(f"Model version {version} is shadowing {self.predictor.version or self.predictor.model_path}")
+            return
+
+        self._activate(candidate, pin)
+        with self._lock:
+            self.state = "idle"
+            self.loading_version = None
+
+    def _activate(self, candidate: BoxSizePredictor, pin: bool):
+        self.predictor.swap(candidate)
+        if pin and self.registry is not None and candidate.version is not None:
+            self.registry.set_current(candidate.version)
+
+    def promote(self) -> Dict:
+        """Swap the shadowed candidate in"""
+        with self._lock:
+            candidate = self.candidate
+            if candidate is None:
+                raise ValueError("No candidate model to promote")
+            self.candidate = None
+            self.state = "idle"
+        self.predictor.shadow = None
+        self._activate(candidate, pin=True)
+        return self.status()
+
+    def discard(self) -> Dict:
+        """Stop shadowing and drop the candidate"""
+        with self._lock:
+            self.candidate = None
+            if self.state == "shadowing":
+                self.state = "idle"
+        self.predictor.shadow = None
+        return self.status()
+
+    def check_registry(self) -> bool:
+        """Start loading the registry's current version if it is not being served; True if started"""
+        if self.registry is None or self.state == "loading":
+            return False
+        version = self.registry.current()
+        candidate = self.candidate
+        if version is None or version in (self.predictor.version, self.failed_version):
+            return False
+        if candidate is not None and candidate.version == version:
+            return False
+        logger.info(f"Model registry now points at {version}; loading it")
+        try:
+            self.start(version, pin=False)
+        except RuntimeError:
+            return False
+        return True
+
+    def _observe(self, features: np.ndarray, output: np.ndarray, elapsed_ms: float):
+        candidate = self.candidate
+        if candidate is None or random.random() >= self.shadow_sample_rate:
+            return
+        with self._lock:
+            if self._pending_shadow >= MAX_PENDING_SHADOW:
+                self.shadow_stats.dropped += 1
+                return
+            self._pending_shadow += 1
+            if self._shadow_executor is None:
+                self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._shadow_executor.submit(self._score, candidate, features, output, elapsed_ms)
+
+    def _score(self, candidate: BoxSizePredictor, features: np.ndarray, output: np.ndarray, primary_ms: float):
+        stats = self.shadow_stats
+        try:
+            started = time.perf_counter()
+            shadow_output = candidate.predict_features(features)
+            stats.record(output, shadow_output, primary_ms, (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            stats.errors += 1
+            logger.error(f"Shadow prediction failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending_shadow -= 1
+
+    def status(self) -> Dict:
+        candidate = self.candidate
+        return {
+            "state": self.state,
+            "active_version": self.predictor.version,
+            "loading_version": self.loading_version,
+            "candidate_version": candidate.version if candidate else None,
+            "error": self.error,
+            "available_versions": self.registry.versions() if self.registry else [],
+            "registry_current": self.registry.current() if self.registry else None,
+            "shadow_sample_rate": self.shadow_sample_rate,
+            "shadow": self.shadow_stats.to_dict() if candidate else None
+        }
+
+    def shutdown(self):
+        self.discard()
+        if self._shadow_executor is not None:
+            self._shadow_executor.shutdown(wait=False, cancel_futures=True)
+            self._shadow_executor = None
\ No newline at end of file
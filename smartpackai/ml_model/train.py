@@ -0,0 +1,305 @@
+# ml_model/train.py
+"""Out-of-core training for the box-size model.
+
+Usage (from the smartpackai directory):
+
+    python -m ml_model.train --data "ml_model/dataset/*.csv" --registry ml_model/registry
+
+CSV files are streamed in chunks, never loaded whole; Parquet files (e.g.
+the parts written by ``camera_vision.batch_measure``) are read one file at a
+time and split into chunks. Each chunk trains a
+few trees on its own rows, in parallel across CPU cores, and the trees are
+merged into one random forest, so memory stays bounded by the chunk size
+times the number of jobs. A small random holdout is kept back for the
+accuracy report. The forest is saved as a CompiledForest (contiguous
+arrays, memory-mappable) and published as a new registry version with the
+timing/accuracy report as its metadata.
+
+Input columns: the six features (item_length ... fragility, or plain
+length/width/height/weight/quantity/fragility) plus the targets
+box_length, box_width and box_height. Missing quantity defaults to 1 and
+missing fragility to 0.5, as in ``BoxSizePredictor.predict``. Rows with
+an ``error`` (failed attempts in ``camera_vision.batch_measure`` output,
+superseded by a retry's record) are skipped.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor
+
+from ml_model.compiled_forest import CompiledForest
+from ml_model.predict import FEATURE_COLUMNS
+from ml_model.registry import ModelRegistry
+import logging
+
+logger = logging.getLogger(__name__)
+
+TARGET_COLUMNS = ['box_length', 'box_width', 'box_height']
+# Plain column names accepted in place of the feature names
+COLUMN_ALIASES = {
+    'length': 'item_length',
+    'width': 'item_width',
+    'height': 'item_height',
+    'weight': 'item_weight'
+}
+FEATURE_DEFAULTS = {'quantity': 1, 'fragility': 0.5}
+
+
+class TrainingConfig:
+    """Knobs for one training run"""
+
+    def __init__(self, chunk_size: int = 500_000, trees_per_chunk: int = 2, max_trees: int = 64,
+                 max_depth: Optional[int] = 12, min_samples_leaf: int = 5, max_samples: Optional[float] = 0.5,
+                 holdout_fraction: float = 0.02, max_holdout_rows: int = 200_000,
+                 n_jobs: int = -1, seed: int = 0):
+        self.chunk_size = chunk_size
+        self.trees_per_chunk = trees_per_chunk
+        self.max_trees = max_trees
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.max_samples = max_samples
+        self.holdout_fraction = holdout_fraction
+        self.max_holdout_rows = max_holdout_rows
+        self.n_jobs = n_jobs
+        self.seed = seed
+
+    def describe(self) -> Dict:
+        return dict(vars(self))
+
+
+def prepare_chunk(chunk: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Feature matrix (N, 6) in FEATURE_COLUMNS order and targets (N, 3) of the usable rows"""
+    if 'error' in chunk.columns:
+        # Failed measurements; a retried key has its own later record
+        chunk = chunk[chunk['error'].fillna('').astype(str) == '']
+    chunk = chunk.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if v not in chunk.columns})
+    for column, default in FEATURE_DEFAULTS.items():
+        if column not in chunk.columns:
+            chunk[column] = default
+    missing = [c for c in FEATURE_COLUMNS + TARGET_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Training data is missing columns: {', '.join(missing)}")
+
+    data = chunk[FEATURE_COLUMNS + TARGET_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(np.float64)
+    valid = np.isfinite(data).all(axis=1) & (data[:, [0, 1, 2, 3, 6, 7, 8]] > 0).all(axis=1)
+    data = data[valid]
+    return data[:, :len(FEATURE_COLUMNS)], data[:, len(FEATURE_COLUMNS):]
+
+
+def iter_chunks(paths: List[str], chunk_size: int) -> Iterator[pd.DataFrame]:
+    for path in paths:
+        if os.path.getsize(path) == 0:
+            logger.warning(f"Skipping empty file {path}")
+            continue
+        if path.endswith('.parquet'):
+            frame = pd.read_parquet(path)
+            for start in range(0, len(frame), chunk_size):
+                yield frame.iloc[start:start + chunk_size]
+            continue
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def _fit_chunk(X: np.ndarray, y: np.ndarray, config: TrainingConfig, seed: int) -> RandomForestRegressor:
+    # max_samples needs at least one row per tree
+    max_samples = config.max_samples if config.max_samples and len(X) * config.max_samples >= 1 else None
+    model = RandomForestRegressor(
+        n_estimators=config.trees_per_chunk,
+        max_depth=config.max_depth,
+        min_samples_leaf=config.min_samples_leaf,
+        max_samples=max_samples,
+        n_jobs=1,
+        random_state=seed
+    )
+    return model.fit(pd.DataFrame(X, columns=FEATURE_COLUMNS), y)
+
+
+def merge_forests(forests: List[RandomForestRegressor], max_trees: int, seed: int) -> RandomForestRegressor:
+    """One forest averaging the trees of all ``forests``, subsampled down to ``max_trees``"""
+    trees = [tree for forest in forests for tree in forest.estimators_]
+    if len(trees) > max_trees:
+        keep = np.random.default_rng(seed).choice(len(trees), size=max_trees, replace=False)
+        trees = [trees[i] for i in sorted(keep)]
+    merged = forests[0]
+    merged.estimators_ = trees
+    merged.n_estimators = len(trees)
+    return merged
+
+
+def _regression_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict:
+    metrics = {}
+    for i, name in enumerate(TARGET_COLUMNS):
+        error = y_pred[:, i] - y_true[:, i]
+        variance = float(np.var(y_true[:, i]))
+        metrics[name] = {
+            "mae": round(float(np.mean(np.abs(error))), 4),
+            "rmse": round(float(np.sqrt(np.mean(error ** 2))), 4),
+            "r2": round(1 - float(np.mean(error ** 2)) / variance, 4) if variance > 0 else None
+        }
+    return metrics
+
+
+def train(paths: List[str], config: TrainingConfig) -> Tuple[CompiledForest, Dict]:
+    """Train on the CSV files at ``paths``; returns the compiled model and a report"""
+    if not paths:
+        raise ValueError("No training files given")
+    rng = np.random.default_rng(config.seed)
+    counts = {"rows_read": 0, "rows_used": 0, "rows_train": 0, "chunks": 0}
+    holdout_X, holdout_y = [], []
+    holdout_rows = 0
+    read_seconds = 0.0
+
+    def training_chunks():
+        nonlocal holdout_rows, read_seconds
+        chunks = iter_chunks(paths, config.chunk_size)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            X, y = prepare_chunk(chunk)
+            counts["rows_read"] += len(chunk)
+            counts["rows_used"] += len(X)
+            if holdout_rows < config.max_holdout_rows:
+                held = rng.random(len(X)) < config.holdout_fraction
+                held &= np.cumsum(held) <= config.max_holdout_rows - holdout_rows
+                holdout_X.append(X[held])
+                holdout_y.append(y[held])
+                holdout_rows += int(held.sum())
+                X, y = X[~held], y[~held]
+            read_seconds += time.perf_counter() - started
+            if len(X) == 0:
+                continue
+            counts["rows_train"] += len(X)
+            counts["chunks"] += 1
+            yield X, y, config.seed + counts["chunks"]
+
+    started = time.perf_counter()
+    # The generator is consumed lazily, so only about 2 * n_jobs chunks
+    # are held in memory at once
+    forests = Parallel(n_jobs=config.n_jobs, pre_dispatch="2*n_jobs")(
+        delayed(_fit_chunk)(X, y, config, seed) for X, y, seed in training_chunks()
+    )
+    if not forests:
+        raise ValueError("Training data has no usable rows")
+    model = merge_forests(forests, config.max_trees, config.seed)
+    compiled = CompiledForest.from_sklearn(model)
+    train_seconds = time.perf_counter() - started - read_seconds
+
+    started = time.perf_counter()
+    if holdout_rows:
+        X_test, y_test = np.concatenate(holdout_X), np.concatenate(holdout_y)
+        accuracy = _regression_metrics(y_test, compiled.predict(X_test))
+    else:
+        accuracy = {}
+    evaluate_seconds = time.perf_counter() - started
+
+    report = {
+        "features": FEATURE_COLUMNS,
+        "targets": TARGET_COLUMNS,
+        "files": [str(p) for p in paths],
+        "config": config.describe(),
+        **counts,
+        "rows_holdout": holdout_rows,
+        "trees": compiled.n_trees,
+        "nodes": int(compiled.feature.shape[0]),
+        "max_depth": compiled.max_depth,
+        "timings_s": {
+            "read_and_features": round(read_seconds, 3),
+            "train": round(train_seconds, 3),
+            "evaluate": round(evaluate_seconds, 3)
+        },
+        "holdout_accuracy": accuracy
+    }
+    return compiled, report
+
+
+def save_artifact(model: CompiledForest, report: Dict, registry: Optional[ModelRegistry] = None,
+                  output: Optional[str] = None, version: Optional[str] = None) -> Dict:
+    """Write the model to ``output`` and/or publish it to ``registry``; returns the final report"""
+    with tempfile.TemporaryDirectory() as tmp:
+        # Uncompressed, so the arrays can be memory-mapped on load
+        path = Path(tmp) / "model.pkl"
+        started = time.perf_counter()
+        joblib.dump(model, path)
+        report["artifact_bytes"] = path.stat().st_size
+        report["timings_s"]["save"] = round(time.perf_counter() - started, 3)
+        if registry is not None:
+            report["version"] = version or registry.next_version()
+            registry.publish(str(path), version=report["version"], metadata=report)
+        if output:
+            Path(output).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, output)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=str(ROOT / "ml_model" / "dataset" / "*.csv"),
+                        help="Glob of training CSV or Parquet files")
+    parser.add_argument("--registry", default=os.getenv("MODEL_REGISTRY_DIR") or str(ROOT / "ml_model" / "registry"),
+                        help="Model registry to publish the new version to")
+    parser.add_argument("--version", help="Registry version name (default: next vN)")
+    parser.add_argument("--output", help="Also write the model file here")
+    parser.add_argument("--no-publish", action="store_true", help="Do not publish to the registry")
+    parser.add_argument("--report", help="Also write the report to this JSON file")
+    parser.add_argument("--chunk-size", type=int, default=500_000, help="Rows per chunk")
+    parser.add_argument("--trees-per-chunk", type=int, default=2)
+    parser.add_argument("--max-trees", type=int, default=64, help="Trees kept in the merged forest")
+    parser.add_argument("--max-depth", type=int, default=12)
+    parser.add_argument("--min-samples-leaf", type=int, default=5)
+    parser.add_argument("--holdout-fraction", type=float, default=0.02)
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel training jobs (-1: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    paths = sorted(glob.glob(args.data))
+    if not paths:
+        parser.error(f"No files match {args.data}")
+    if args.no_publish and not args.output:
+        parser.error("--no-publish needs --output")
+
+    config = TrainingConfig(
+        chunk_size=args.chunk_size,
+        trees_per_chunk=args.trees_per_chunk,
+        max_trees=args.max_trees,
+        max_depth=args.max_depth,
+        min_samples_leaf=args.min_samples_leaf,
+        holdout_fraction=args.holdout_fraction,
+        n_jobs=args.jobs,
+        seed=args.seed
+    )
+    try:
+        model, report = train(paths, config)
+        registry = None if args.no_publish else ModelRegistry(args.registry)
+        report = save_artifact(model, report, registry, args.output, args.version)
+    except Exception as e:
+        logger.error(f"Training failed: {str(e)}")
+        return 1
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+    print(json.dumps({k: report[k] for k in ("version", "rows_train", "rows_holdout", "trees",
+                                             "artifact_bytes", "timings_s", "holdout_accuracy") if k in report},
+                     indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
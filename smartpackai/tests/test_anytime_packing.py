@@ -0,0 +1,73 @@
+# tests/test_anytime_packing.py
+import random
+from fastapi.testclient import TestClient
+from main import app
+from services.pack_optimizer import PackingOptimizer, ExtremePointPacker
+from models.item_schema import ItemInput, BoxOutput
+from test_pack_engine import _assert_valid
+
+BOX = BoxOutput(length=40, width=30, height=20, volume=24000, recommended_void_fill="air_cushions")
+
+
+def _mixed_order(seed=5):
+    rng = random.Random(seed)
+    return [
+        ItemInput(length=rng.randint(3, 14), width=rng.randint(3, 12), height=rng.randint(2, 9),
+                  weight=rng.uniform(0.1, 3), quantity=rng.randint(1, 6))
+        for _ in range(25)
+    ]
+
+
+def test_greedy_without_budget():
+    plan = PackingOptimizer().optimize(_mixed_order(), BOX)
+    assert plan.search_iterations == 0
+    assert len(plan.utilization_history) == 1
+
+
+def test_search_never_worse_than_greedy():
+    items = _mixed_order()
+    greedy = PackingOptimizer().optimize(items, BOX)
+    plan = PackingOptimizer().optimize(items, BOX, deadline_ms=300)
+
+    _assert_valid(plan, BOX)
+    assert plan.search_iterations > 0
+    assert plan.space_utilization >= greedy.space_utilization - 1e-9
+    assert len(plan.items) + len(plan.unpacked_items) == sum(i.quantity for i in items)
+
+    history = plan.utilization_history
+    for before, after in zip(history, history[1:]):
+        assert after.elapsed_ms >= before.elapsed_ms
+        assert (after.utilization, -after.packed_height) > (before.utilization, -before.packed_height)
+    assert history[-1].utilization == plan.space_utilization
+
+
+def test_budget_is_respected():
+    plan = PackingOptimizer().optimize(_mixed_order(), BOX, deadline_ms=100)
+    assert plan.placement_time_ms < 200
+
+
+def test_search_is_reproducible():
+    items = _mixed_order(9)
+    first = PackingOptimizer().optimize(items, BOX, deadline_ms=50, seed=3)
+    again = PackingOptimizer().optimize(items, BOX, deadline_ms=first.placement_time_ms * 4, seed=3)
+    # A longer budget with the same seed only extends the same search
+    assert again.search_iterations >= first.search_iterations
+    assert again.space_utilization >= first.space_utilization - 1e-9
+
+
+def test_pinned_orientation():
+    packer = ExtremePointPacker(30, 30, 30, cell_size=10)
+    origin, orientation = packer.place((10, 5, 2), rotatable=True, orientation=2)
+    assert orientation == 2
+    origin, orientation = packer.place((10, 5, 2), rotatable=False, orientation=2)
+    assert orientation == 0
+
+
+def test_endpoint_reports_search():
+    payload = {"items": [i.dict() for i in _mixed_order(11)], "box": BOX.dict()}
+    response = TestClient(app).post("/api/optimize-pack?deadline_ms=400", json=payload)
+
+    assert response.status_code == 200
+    plan = response.json()
+    assert plan["search_iterations"] > 0
+    assert plan["utilization_history"]
\ No newline at end of file
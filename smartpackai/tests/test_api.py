@@ -1,7 +1,7 @@
 # tests/test_api.py
 import pytest
 from fastapi.testclient import TestClient
-from backend.main import app
+from main import app
 from models.item_schema import ItemInput
 
 client = TestClient(app)
@@ -0,0 +1,90 @@
+# tests/test_batch_measure.py
+import csv
+import pandas as pd
+import pytest
+from camera_vision.batch_measure import (RESULT_COLUMNS, CsvResultWriter, MeasureTask, discover_tasks,
+                                         load_labels, open_writer, run_batch)
+from ml_model.train import prepare_chunk
+
+
+def fake_init(config):
+    pass
+
+
+def fake_measure(task: MeasureTask):
+    """Photos named bad_* measure nothing; the rest 30 x 20 x 10 cm"""
+    record = {'key': task.key, 'sku': task.sku, 'source': task.paths[0], 'start_frame': task.start_frame,
+              'frames': len(task.paths), 'frames_measured': len(task.paths), 'error': ''}
+    if task.sku.startswith('bad'):
+        record.update(frames_measured=0, error='Nothing measured')
+    else:
+        record.update(length=30.0, width=20.0, height=10.0, confidence=0.97, stable=True)
+    return record
+
+
+@pytest.fixture
+def photos(tmp_path):
+    root = tmp_path / "photos"
+    for name in ("a/front.jpg", "a/side.PNG", "b/top.jpg", "bad_1.jpg", "notes.txt", "belt.mp4"):
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_bytes(b"")
+    return root
+
+
+def _run(photos, writer, **kwargs):
+    tasks = discover_tasks([str(photos)], frame_counter=lambda path: 0)
+    return run_batch(tasks, writer, workers=2, measure=fake_measure, initializer=fake_init, **kwargs)
+
+
+def test_discover_tasks(photos):
+    tasks = list(discover_tasks([str(photos)], frame_counter=lambda path: 70))
+    videos = [t for t in tasks if t.kind == 'video']
+    assert [(t.key, t.start_frame, t.frame_count) for t in videos] == [
+        ("belt.mp4#0", 0, 30), ("belt.mp4#30", 30, 30), ("belt.mp4#60", 60, 10)]
+    assert {t.sku for t in videos} == {"belt"}
+    assert [t.key for t in tasks if t.kind == 'image'] == ["a/front.jpg", "a/side.PNG", "b/top.jpg", "bad_1.jpg"]
+
+    grouped = list(discover_tasks([str(photos)], group_by='directory', frame_counter=lambda path: 0))
+    assert [(t.key, t.sku, len(t.paths)) for t in grouped] == [("a/", "a", 2), ("b/", "b", 1), ("./", "photos", 1)]
+    with pytest.raises(FileNotFoundError):
+        list(discover_tasks([str(photos / "missing")]))
+
+
+def test_writes_and_resumes_csv(photos, tmp_path):
+    output = tmp_path / "out" / "measured.csv"
+    with CsvResultWriter(str(output), RESULT_COLUMNS, flush_every=2) as writer:
+        report = _run(photos, writer)
+    assert (report['tasks'], report['measured'], report['failed'], report['frames']) == (4, 3, 1, 4)
+    assert report['images_per_second'] > 0 and not report['interrupted']
+
+    # A run killed mid-write leaves half a row
+    with open(output, 'a') as f:
+        f.write("b/top.jpg,b,")
+    with CsvResultWriter(str(output), RESULT_COLUMNS) as writer:
+        assert _run(photos, writer)['skipped'] == 4
+    with CsvResultWriter(str(output), RESULT_COLUMNS) as writer:
+        report = _run(photos, writer, retry_failed=True)
+    assert (report['skipped'], report['failed']) == (3, 1)
+
+    with open(output, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5 and {r['key'] for r in rows} == {"a/front.jpg", "a/side.PNG", "b/top.jpg", "bad_1.jpg"}
+    with pytest.raises(ValueError):
+        CsvResultWriter(str(output), RESULT_COLUMNS + ['weight'])
+
+
+def test_labelled_output_is_training_data(photos, tmp_path):
+    labels_path = tmp_path / "labels.csv"
+    pd.DataFrame({'sku': ["front", "side", "top"], 'weight': [1.0, 1.5, 0.5], 'length': [99, 99, 99],
+                  'box_length': [35, 35, 32], 'box_width': [25, 25, 22], 'box_height': [15, 15, 12]}
+                 ).to_csv(labels_path, index=False)
+    labels = load_labels(str(labels_path))
+    assert 'length' not in labels['top']
+    output = tmp_path / "dataset.csv"
+    with open_writer(str(output), RESULT_COLUMNS + list(labels['top']), flush_every=10) as writer:
+        _run(photos, writer, labels=labels)
+
+    X, y = prepare_chunk(pd.read_csv(output))
+    # The failed photo has no dimensions and is dropped
+    assert X.shape == (3, 6) and y.shape == (3, 3)
+    assert (X[:, :3] == [30.0, 20.0, 10.0]).all()
\ No newline at end of file
@@ -0,0 +1,47 @@
+# tests/test_batch_prediction.py
+import random
+from fastapi.testclient import TestClient
+from main import app
+from services.box_predictor import BoxPredictor
+from models.item_schema import ItemInput
+
+client = TestClient(app)
+
+
+def _random_items(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        ItemInput(
+            length=rng.uniform(1, 60), width=rng.uniform(1, 40), height=rng.uniform(1, 30),
+            weight=rng.uniform(0.1, 10), quantity=rng.randint(1, 5),
+            fragility=rng.choice([0.0, 0.29, 0.3, 0.5, 0.7, 1.0, rng.random()])
+        )
+        for _ in range(count)
+    ]
+
+
+def test_batch_matches_single_predictions():
+    predictor = BoxPredictor()
+    items = _random_items(500)
+    batch = predictor.predict_batch(items)
+
+    assert len(batch) == len(items)
+    for item, box in zip(items, batch):
+        expected = predictor.predict(item)
+        assert box.recommended_void_fill == expected.recommended_void_fill
+        for field in ("length", "width", "height", "volume"):
+            assert abs(getattr(box, field) - getattr(expected, field)) < 1e-6
+
+
+def test_empty_batch():
+    assert BoxPredictor().predict_batch([]) == []
+
+
+def test_batch_endpoint():
+    payload = [item.dict() for item in _random_items(50)]
+    response = client.post("/api/predict-box/batch", json=payload)
+
+    assert response.status_code == 200
+    boxes = response.json()
+    assert len(boxes) == 50
+    assert all(box["volume"] > 0 for box in boxes)
\ No newline at end of file
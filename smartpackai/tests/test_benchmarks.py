@@ -0,0 +1,75 @@
+# tests/test_benchmarks.py
+import json
+from benchmarks.generators import SCENARIOS, OrderProfile, generate_orders
+from benchmarks.run_benchmarks import run_suite, scaling_suite, serialization_suite, compare, main
+
+
+def test_generators_are_reproducible():
+    first = generate_orders(7, SCENARIOS["small_mixed"], 5)
+    again = generate_orders(7, SCENARIOS["small_mixed"], 5)
+    other = generate_orders(8, SCENARIOS["small_mixed"], 5)
+
+    assert [([i.dict() for i in items], box.dict()) for items, box in first] == \
+           [([i.dict() for i in items], box.dict()) for items, box in again]
+    assert first[0][0] != other[0][0]
+
+
+def test_profile_controls_order_shape():
+    orders = generate_orders(1, OrderProfile(lines=(4, 4), quantity="single", fragile_share=1.0), 10)
+    for items, box in orders:
+        assert len(items) == 4
+        assert all(i.quantity == 1 and i.fragility >= 0.7 for i in items)
+        assert box.length >= max(max(i.length, i.width, i.height) for i in items)
+
+
+def test_suite_reports_metrics():
+    results = run_suite(["single_items"], orders=3, batch_size=50, serialization=False, scaling=False)
+
+    assert set(results) == {"packing/single_items", "predict/single_items", "predict_batch/wave"}
+    packing = results["packing/single_items"]
+    assert packing["calls"] == 3
+    assert packing["p50_ms"] <= packing["p99_ms"]
+    assert 0 < packing["mean_utilization"] <= 1
+    assert results["predict_batch/wave"]["items_per_call"] == 50
+
+
+def test_compare_flags_regressions():
+    baseline = {"packing/x": {"p50_ms": 10.0, "p99_ms": 20.0, "throughput_per_s": 100.0,
+                              "peak_memory_mb": 1.0, "mean_utilization": 0.8}}
+    same = {"packing/x": dict(baseline["packing/x"], p50_ms=11.0)}
+    slower = {"packing/x": dict(baseline["packing/x"], p99_ms=30.0, mean_utilization=0.75)}
+
+    assert compare(same, baseline, threshold=0.2) == []
+    regressions = compare(slower, baseline, threshold=0.2)
+    assert len(regressions) == 2
+    assert any("p99_ms" in r for r in regressions)
+    assert any("mean_utilization" in r for r in regressions)
+
+
+def test_cli_saves_and_checks_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = ["--scenarios", "single_items", "--orders", "3", "--baseline", str(baseline), "--skip-serialization",
+            "--skip-scaling"]
+
+    # Without a baseline there is nothing to pass against
+    assert main(args) == 2
+    assert main(args + ["--save-baseline"]) == 0
+    assert json.loads(baseline.read_text())["results"]
+    # A generous threshold keeps timing noise from failing the check
+    assert main(args + ["--threshold", "100"]) == 0
+
+
+def test_serialization_suite():
+    results = serialization_suite(units=200, calls=2)
+
+    assert set(results) == {"serialize/response_model", "serialize/fast", "serialize/columnar"}
+    assert results["serialize/fast"]["units"] == 200
+    assert results["serialize/columnar"]["bytes"] < results["serialize/fast"]["bytes"]
+
+
+def test_scaling_suite():
+    results = scaling_suite(sizes=(20, 80), calls=1)
+
+    assert results["packing_scale/80"]["units"] == 80
+    assert results["packing_scale/20"]["ms_per_unit"] > 0
+    assert results["packing_scale/20-80"]["per_unit_growth"] > 0
\ No newline at end of file
@@ -0,0 +1,90 @@
+# tests/test_bulk_packing.py
+import asyncio
+import io
+import json
+import threading
+from fastapi.testclient import TestClient
+import main
+from services.bulk_packing import BulkPacker, orders_from_csv, orders_from_ndjson
+from services.executor import WorkerPool
+
+CSV = ("order_id,length,width,height,weight,quantity,is_rotatable,box_length,box_width,box_height\n"
+       "A,10,6,4,0.5,4,true,30,25,20\n"
+       "A,8,8,3,0.4,2,false,,,\n"
+       "B,20,15,10,1.2,1,true,,,\n"
+       "C,oops,6,4,0.5,1,true,,,\n"
+       "C,10,6,4,0.5,1,true,,,\n")
+
+
+def _ndjson(count: int) -> str:
+    order = {"items": [{"length": 10, "width": 6, "height": 4, "weight": 0.5, "quantity": 3}]}
+    return "\n".join(json.dumps(dict(order, order_id=f"O{i}")) for i in range(count)) + "\n"
+
+
+def test_parse_csv_groups_rows_by_order():
+    orders = list(orders_from_csv(io.StringIO(CSV)))
+    assert [o.order_id for o in orders] == ["A", "B", "C"]
+    assert len(orders[0].items) == 2 and orders[0].box.volume == 15000
+    assert orders[0].items[1].is_rotatable is False
+    assert orders[1].box is None and orders[1].error is None
+    assert orders[2].error.startswith("line 5")
+
+
+def test_parse_ndjson_reports_bad_lines():
+    text = _ndjson(2) + "\n{not json}\n" + json.dumps({"order_id": "X", "items": [{"length": -1}]}) + "\n"
+    orders = list(orders_from_ndjson(io.StringIO(text)))
+    assert [o.order_id for o in orders] == ["O0", "O1", "4", "X"]
+    assert orders[2].error.startswith("line 4") and orders[3].error is not None
+
+
+def test_stream_keeps_orders_in_flight_bounded():
+    pool = WorkerPool("bulk-test", kind="thread", max_workers=2)
+    packer = BulkPacker(pool, max_in_flight=3)
+    parsed = []
+    parser_threads = set()
+
+    def orders():
+        for order in orders_from_ndjson(io.StringIO(_ndjson(20))):
+            parsed.append(order.order_id)
+            parser_threads.add(threading.get_ident())
+            yield order
+
+    async def run():
+        lines = []
+        loop_thread = threading.get_ident()
+        async for line in packer.stream(orders()):
+            # Never more than max_in_flight orders parsed ahead of the output
+            assert len(parsed) - len(lines) <= 3
+            lines.append(json.loads(line))
+        # Reading and parsing the upload never blocks the event loop
+        assert loop_thread not in parser_threads
+        return lines
+
+    try:
+        lines = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    results, summary = lines[:-1], lines[-1]["summary"]
+    assert sorted(r["order_id"] for r in results) == sorted(f"O{i}" for i in range(20))
+    assert all(len(r["plans"]) >= 1 for r in results)
+    assert summary["packed"] == 20 and summary["failed"] == 0 and summary["orders_per_second"] > 0
+
+
+def test_bulk_endpoint_streams_ndjson():
+    client = TestClient(main.app)
+    response = client.post("/api/optimize-pack/bulk", files={"file": ("orders.csv", CSV, "text/csv")})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    by_order = {line["order_id"]: line for line in lines if "order_id" in line}
+    assert by_order["A"]["plans"][0]["box"]["volume"] == 15000
+    assert len(by_order["A"]["plans"][0]["items"]) == 6
+    assert "error" in by_order["C"]
+    assert lines[-1]["summary"] == dict(lines[-1]["summary"], orders=3, packed=2, failed=1)
+
+    response = client.post("/api/optimize-pack/bulk", params={"compact": True},
+                           files={"file": ("orders.txt", _ndjson(5), "application/x-ndjson")})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["summary"]["packed"] == 5
+    assert all(plan["blocks"] for line in lines[:-1] for plan in line["plans"])
\ No newline at end of file
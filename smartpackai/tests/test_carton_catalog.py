@@ -0,0 +1,91 @@
+# tests/test_carton_catalog.py
+import itertools
+import random
+import numpy as np
+import pytest
+from ml_model.carton_catalog import CartonCatalog
+from services.box_predictor import BoxPredictor
+from models.item_schema import ItemInput
+
+
+def _brute_force(cartons, dims, rotatable, min_volume=0.0):
+    best = None
+    for carton in cartons:
+        volume = carton[0] * carton[1] * carton[2]
+        if volume < min_volume or (best is not None and volume >= best):
+            continue
+        orientations = itertools.permutations(carton) if not rotatable else [sorted(carton)]
+        wanted = dims if not rotatable else sorted(dims)
+        if any(all(c >= d for c, d in zip(o, wanted)) for o in orientations):
+            best = volume
+    return best
+
+
+def test_lookup_matches_brute_force():
+    rng = random.Random(11)
+    cartons = [(rng.randint(5, 80), rng.randint(5, 60), rng.randint(5, 50)) for _ in range(300)]
+    catalog = CartonCatalog(cartons)
+
+    for _ in range(500):
+        dims = (rng.uniform(1, 70), rng.uniform(1, 60), rng.uniform(1, 50))
+        rotatable = rng.random() < 0.5
+        min_volume = rng.choice([0.0, rng.uniform(0, 60000)])
+        found = catalog.smallest_fit(dims, rotatable, min_volume)
+        expected = _brute_force(cartons, dims, rotatable, min_volume)
+        if expected is None:
+            assert found is None
+        else:
+            assert found is not None
+            assert found[0] * found[1] * found[2] == pytest.approx(expected)
+            # Returned orientation holds the item axis by axis
+            assert all(f >= d - 1e-6 for f, d in zip(found, dims))
+
+
+def test_vectorized_lookup_matches_single():
+    rng = np.random.default_rng(3)
+    catalog = CartonCatalog([tuple(b) for b in rng.integers(5, 60, size=(200, 3))])
+    dims = rng.uniform(1, 55, size=(1000, 3))
+    rotatable = rng.random(1000) < 0.5
+
+    many = catalog.smallest_fit_many(dims, rotatable)
+    for row, flag, found in zip(dims, rotatable, many):
+        single = catalog.smallest_fit(tuple(row), bool(flag))
+        if single is None:
+            assert np.isnan(found).all()
+        else:
+            assert tuple(found) == single
+
+
+def test_fixed_orientation_uses_rotated_carton():
+    catalog = CartonCatalog([(20, 15, 10), (50, 40, 30)])
+    # Tall upright item only fits the small carton stood on its end
+    assert catalog.smallest_fit((10, 8, 18), rotatable=False) == (10, 15, 20)
+
+
+def test_duplicates_are_pruned():
+    catalog = CartonCatalog([(20, 15, 10), (15, 20, 10), (20, 15, 10), (30, 30, 30)])
+    assert catalog._sorted.dims.shape[0] == 2
+    assert catalog.smallest_fit((12, 14, 9)) == (15, 20, 10)
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / "cartons.csv"
+    path.write_text("length,width,height\n40,30,20\n20,15,10\n")
+    catalog = CartonCatalog.from_file(str(path))
+
+    assert catalog.cartons == [(20.0, 15.0, 10.0), (40.0, 30.0, 20.0)]
+    assert catalog.largest == (40.0, 30.0, 20.0)
+
+
+def test_invalid_catalog():
+    with pytest.raises(ValueError):
+        CartonCatalog([])
+    with pytest.raises(ValueError):
+        CartonCatalog([(10, 0, 5)])
+
+
+def test_backend_predictor_checks_per_axis_fit():
+    # Volume alone would pick 20x15x10, but the item is too long for it
+    item = ItemInput(length=28, width=4, height=4, weight=1.0, fragility=0.0)
+    box = BoxPredictor().predict(item)
+    assert (box.length, box.width, box.height) == (30, 25, 20)
\ No newline at end of file
@@ -0,0 +1,104 @@
+# tests/test_carton_splitter.py
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from services.carton_splitter import CartonSplitter
+from services.box_predictor import predictor
+from models.item_schema import ItemInput
+
+client = TestClient(app)
+
+
+def _unit_count(plans):
+    return sum(len(p.items) for p in plans)
+
+
+def test_large_order_is_split_across_cartons():
+    items = [ItemInput(length=10, width=10, height=10, weight=1.0, quantity=150)]
+    plans = CartonSplitter().split(items)
+
+    # 60000 cm^3 holds at most 60 of these cubes
+    assert len(plans) == 3
+    assert _unit_count(plans) == 150
+    assert all(not p.unpacked_items for p in plans)
+
+
+def test_cartons_come_from_catalog():
+    items = [
+        ItemInput(length=12, width=8, height=5, weight=0.5, quantity=40),
+        ItemInput(length=20, width=15, height=4, weight=1.2, quantity=12, fragility=0.8),
+        ItemInput(length=6, width=6, height=6, weight=0.3, quantity=25),
+    ]
+    plans = CartonSplitter().split(items)
+
+    catalog = set(predictor.standard_boxes)
+    for plan in plans:
+        assert (plan.box.length, plan.box.width, plan.box.height) in catalog
+        assert 0 < plan.space_utilization <= 1
+    assert _unit_count(plans) == 77
+
+
+def test_small_order_shrinks_to_smallest_box():
+    items = [ItemInput(length=5, width=5, height=5, weight=0.2, quantity=4)]
+    plans = CartonSplitter().split(items)
+
+    assert len(plans) == 1
+    assert (plans[0].box.length, plans[0].box.width, plans[0].box.height) == (20, 15, 10)
+
+
+def test_volume_objective_never_uses_more_volume():
+    items = [
+        ItemInput(length=18, width=14, height=9, weight=1.0, quantity=9),
+        ItemInput(length=7, width=5, height=3, weight=0.1, quantity=30),
+    ]
+    splitter = CartonSplitter()
+    by_count = splitter.split(items, objective="count")
+    by_volume = splitter.split(items, objective="volume")
+
+    assert sum(p.box.volume for p in by_volume) <= sum(p.box.volume for p in by_count)
+    assert _unit_count(by_volume) == _unit_count(by_count) == 39
+
+
+def test_spent_budget_still_ships_every_unit():
+    items = [ItemInput(length=3 + i % 7, width=4 + i % 5, height=2 + i % 3, weight=0.5, quantity=1 + i % 4)
+             for i in range(60)]
+    # With no time at all only the first ordering runs and nothing is repacked
+    plans = CartonSplitter(max_time_ms=0).split(items)
+
+    catalog = set(predictor.standard_boxes)
+    assert all((p.box.length, p.box.width, p.box.height) in catalog for p in plans)
+    assert _unit_count(plans) == sum(i.quantity for i in items)
+    assert all(not p.unpacked_items for p in plans)
+
+
+def test_oversized_line_is_reported():
+    items = [
+        ItemInput(length=10, width=10, height=10, weight=1.0, quantity=5),
+        ItemInput(length=80, width=10, height=10, weight=3.0, quantity=2),
+    ]
+    plans = CartonSplitter().split(items)
+
+    assert _unit_count(plans) == 5
+    assert len(plans[-1].unpacked_items) == 2
+    assert any("ship separately" in step for step in plans[-1].packing_instructions)
+
+
+def test_nothing_shippable_raises():
+    with pytest.raises(ValueError):
+        CartonSplitter().split([ItemInput(length=90, width=90, height=90, weight=5.0)])
+
+
+def test_multi_pack_endpoint():
+    payload = [{"length": 10, "width": 10, "height": 10, "weight": 1.0, "quantity": 70}]
+    response = client.post("/api/optimize-pack/multi?objective=volume", json=payload)
+
+    assert response.status_code == 200
+    plans = response.json()
+    assert len(plans) == 2
+    assert sum(len(p["items"]) for p in plans) == 70
+
+    response = client.post("/api/optimize-pack/multi?objective=weight", json=payload)
+    assert response.status_code == 422
+
+    response = client.post("/api/optimize-pack/multi", json=[{"length": 90, "width": 90, "height": 90, "weight": 5.0}])
+    assert response.status_code == 400
\ No newline at end of file
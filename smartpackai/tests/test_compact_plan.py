@@ -0,0 +1,75 @@
+# tests/test_compact_plan.py
+from fastapi.testclient import TestClient
+from main import app
+from services.pack_optimizer import PackingOptimizer
+from models.item_schema import ItemInput, BoxOutput
+
+BOX = BoxOutput(length=100, width=60, height=60, volume=360000, recommended_void_fill="bubble_wrap")
+ITEMS = [
+    ItemInput(length=4, width=3, height=2, weight=0.1, quantity=5000),
+    ItemInput(length=7, width=5, height=5, weight=0.4, quantity=300, fragility=0.8),
+]
+
+
+def _expand(blocks):
+    units = []
+    for b in blocks:
+        for i in range(b.counts[0]):
+            for j in range(b.counts[1]):
+                for k in range(b.counts[2]):
+                    units.append((
+                        round(b.origin.x + i * b.pitch.x, 6),
+                        round(b.origin.y + j * b.pitch.y, 6),
+                        round(b.origin.z + k * b.pitch.z, 6),
+                        b.item.length, (b.rotation.x, b.rotation.y, b.rotation.z)
+                    ))
+    return units
+
+
+def test_blocks_describe_the_same_placements():
+    full = PackingOptimizer().optimize(ITEMS, BOX)
+    compact = PackingOptimizer().optimize(ITEMS, BOX, compact=True)
+
+    assert compact.items == []
+    assert len(compact.blocks) < 100
+    expected = sorted(
+        (round(p.position.x, 6), round(p.position.y, 6), round(p.position.z, 6),
+         p.item.length, (p.rotation.x, p.rotation.y, p.rotation.z))
+        for p in full.items
+    )
+    assert sorted(_expand(compact.blocks)) == expected
+    assert compact.space_utilization == full.space_utilization
+
+
+def test_unpacked_units_are_grouped():
+    box = BoxOutput(length=20, width=15, height=10, volume=3000, recommended_void_fill="bubble_wrap")
+    items = [ItemInput(length=5, width=5, height=5, weight=0.2, quantity=30)]
+    full = PackingOptimizer().optimize(items, box)
+    compact = PackingOptimizer().optimize(items, box, compact=True)
+
+    assert len(full.unpacked_items) == 6
+    assert len(compact.unpacked_items) == 1
+    assert compact.unpacked_items[0].quantity == 6
+    assert compact.packing_instructions == full.packing_instructions
+
+
+def test_compact_endpoint_is_smaller():
+    client = TestClient(app)
+    payload = {"items": [i.dict() for i in ITEMS], "box": BOX.dict()}
+    full = client.post("/api/optimize-pack", json=payload)
+    compact = client.post("/api/optimize-pack?compact=true", json=payload)
+
+    assert full.status_code == compact.status_code == 200
+    assert compact.json()["items"] == []
+    assert sum(b["counts"][0] * b["counts"][1] * b["counts"][2] for b in compact.json()["blocks"]) == len(full.json()["items"])
+    assert len(compact.content) * 50 < len(full.content)
+
+
+def test_compact_multi_carton():
+    items = [ItemInput(length=10, width=10, height=10, weight=1.0, quantity=150)]
+    response = TestClient(app).post("/api/optimize-pack/multi?compact=true", json=[i.dict() for i in items])
+
+    assert response.status_code == 200
+    plans = response.json()
+    units = sum(b["counts"][0] * b["counts"][1] * b["counts"][2] for p in plans for b in p["blocks"])
+    assert units == 150
\ No newline at end of file
@@ -0,0 +1,78 @@
+# tests/test_compiled_forest.py
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor, GradientBoostingRegressor
+from sklearn.tree import DecisionTreeRegressor
+from ml_model.compiled_forest import CompiledForest
+from ml_model.predict import BoxSizePredictor, FEATURE_COLUMNS
+
+rng = np.random.default_rng(1)
+X = rng.uniform(1, 40, size=(400, 6))
+Y = np.c_[X[:, 0] * 1.2 + rng.normal(0, 1, 400), X[:, 1] + X[:, 4], X[:, 2] * (1 + X[:, 5] / 40)]
+X_TEST = np.r_[rng.uniform(0, 45, size=(300, 6)), X[:20]]
+
+
+@pytest.mark.parametrize("model", [
+    RandomForestRegressor(n_estimators=20, random_state=0),
+    RandomForestRegressor(n_estimators=7, max_depth=4, random_state=0),
+    ExtraTreesRegressor(n_estimators=10, random_state=0),
+    DecisionTreeRegressor(random_state=0),
+])
+def test_matches_sklearn_exactly(model):
+    model.fit(X, Y)
+    compiled = CompiledForest.from_sklearn(model)
+
+    assert np.array_equal(compiled.predict(X_TEST), model.predict(X_TEST))
+    # Single rows take the scalar path
+    singles = np.concatenate([compiled.predict(X_TEST[i:i + 1]) for i in range(len(X_TEST))])
+    assert np.array_equal(singles, model.predict(X_TEST))
+    assert np.array_equal(compiled.apply(X_TEST[:1]).ravel(), compiled._leaves_of(X_TEST[0].tolist()))
+
+
+def test_single_output_shape():
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, Y[:, 0])
+    compiled = CompiledForest.from_sklearn(model)
+
+    assert compiled.predict(X_TEST).shape == (X_TEST.shape[0],)
+    assert compiled.predict(X_TEST[:1]).shape == (1,)
+    assert np.array_equal(compiled.predict(X_TEST), model.predict(X_TEST))
+
+
+def test_rejects_unsupported_models():
+    model = GradientBoostingRegressor(n_estimators=5).fit(X, Y[:, 0])
+    assert not CompiledForest.supports(model)
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(model)
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(RandomForestRegressor(n_estimators=3).fit(X, Y)).predict(X[:, :5])
+
+
+def test_compiled_artifact_can_be_memory_mapped(tmp_path):
+    compiled = CompiledForest.from_sklearn(RandomForestRegressor(n_estimators=5, random_state=0).fit(X, Y))
+    compiled.predict(X_TEST[:1])
+    path = tmp_path / "compiled.pkl"
+    joblib.dump(compiled, path)
+    loaded = joblib.load(path, mmap_mode="r")
+
+    assert isinstance(loaded.threshold, np.memmap)
+    # The scalar path's node table is not part of the artifact
+    assert loaded._nodes is None
+    assert np.array_equal(loaded.predict(X_TEST), compiled.predict(X_TEST))
+    assert np.array_equal(loaded.predict(X_TEST[:1]), compiled.predict(X_TEST[:1]))
+
+
+def test_predictor_uses_compiled_path(tmp_path):
+    frame = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(frame, Y)
+    path = tmp_path / "model.pkl"
+    joblib.dump(model, path)
+
+    predictor = BoxSizePredictor(str(path))
+    result = predictor.predict(12.0, 8.0, 5.0, 1.0, 2, 0.3)
+    expected = model.predict(pd.DataFrame([[12.0, 8.0, 5.0, 1.0, 2, 0.3]], columns=FEATURE_COLUMNS))[0]
+
+    assert predictor.status()["compiled"] is True
+    assert result["predicted_dimensions"]["length"] == round(expected[0], 2)
+    assert result["predicted_dimensions"]["height"] == round(expected[2], 2)
\ No newline at end of file
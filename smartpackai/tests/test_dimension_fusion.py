@@ -0,0 +1,66 @@
+# tests/test_dimension_fusion.py
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from camera_vision.dimension_fusion import DimensionFusion, landmark_points
+
+TRUE_DIMS = np.array([30.0, 20.0, 10.0])
+
+
+def _frames(count: int, noise: float = 0.01, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return TRUE_DIMS * (1 + rng.normal(0, noise, size=(count, 3)))
+
+
+def test_converges_and_reports_stable():
+    fusion = DimensionFusion(min_frames=5, tolerance=0.02)
+    estimates = [fusion.update(frame) for frame in _frames(30)]
+
+    stable_at = next(i for i, e in enumerate(estimates) if e.stable)
+    # 1% noise needs only a handful of frames to be within 2%
+    assert 4 <= stable_at < 15
+    assert estimates[stable_at].confidence >= 0.95
+    assert estimates[1].confidence < estimates[stable_at].confidence
+    assert np.allclose(estimates[-1].dimensions, TRUE_DIMS, rtol=0.02)
+
+
+def test_noisy_frames_take_longer():
+    quiet = DimensionFusion()
+    noisy = DimensionFusion()
+    first_stable = []
+    for fusion, noise in ((quiet, 0.005), (noisy, 0.04)):
+        first_stable.append(next((i for i, frame in enumerate(_frames(15, noise))
+                                  if fusion.update(frame).stable), None))
+    assert first_stable[0] is not None
+    assert first_stable[1] is None or first_stable[1] > first_stable[0]
+
+
+def test_rejects_outliers():
+    fusion = DimensionFusion()
+    frames = list(_frames(10))
+    frames.insert(7, TRUE_DIMS * 1.5)
+    for frame in frames:
+        estimate = fusion.update(frame)
+    assert estimate.rejected == 1 and estimate.frames == 10
+    assert np.allclose(estimate.dimensions, TRUE_DIMS, rtol=0.02)
+
+
+def test_canonical_footprint_and_invalid_frames():
+    fusion = DimensionFusion()
+    assert fusion.update((0, 20, 10)) is None
+    estimate = fusion.update((20, 30, 10))
+    assert estimate.dimensions == (30.0, 20.0, 10.0) and estimate.confidence == 0.0
+    assert fusion.update((float("nan"), 1, 1)) == estimate
+
+    fusion.reset()
+    assert fusion.estimate is None and not fusion.stable
+    with pytest.raises(ValueError):
+        DimensionFusion(window=3, min_frames=5)
+
+
+def test_landmark_points():
+    landmarks = SimpleNamespace(landmark=[SimpleNamespace(x=i, y=2 * i, z=3 * i) for i in range(9)])
+    points = landmark_points(landmarks)
+    assert points.shape == (9, 3)
+    assert np.array_equal(np.ptp(points, axis=0), [8, 16, 24])
+    assert landmark_points(points) is not None
\ No newline at end of file
@@ -0,0 +1,145 @@
+# tests/test_jobs.py
+import asyncio
+from fastapi.testclient import TestClient
+import main
+import services.jobs as jobs
+from services.jobs import JobQueue, run_pack_job, CANCELLED, QUEUED, RUNNING, SUCCEEDED
+
+ITEM = {"length": 10, "width": 6, "height": 4, "weight": 0.5, "quantity": 3}
+
+
+def _queue(path: str = "", **kwargs) -> JobQueue:
+    queue = JobQueue(path, poll_seconds=0.05, **kwargs)
+    ran = []
+
+    async def record(payload, progress):
+        if payload.get("hold"):
+            await asyncio.sleep(10)
+        ran.append(payload["name"])
+        await progress(1, 1)
+        return payload["name"]
+
+    queue.register("record", record)
+    queue.ran = ran
+    return queue
+
+
+def test_runs_by_priority_then_submission_order():
+    async def run():
+        queue = _queue(workers=1, reserved_workers=0)
+        jobs = [queue.submit("record", {"name": name}, priority=priority)
+                for name, priority in (("batch-1", 0), ("batch-2", 0), ("station", 10), ("urgent", 5))]
+        await queue.start()
+        for job in jobs:
+            await queue.wait(job.id, 5)
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(run())
+    assert queue.ran == ["station", "urgent", "batch-1", "batch-2"]
+    assert queue.stats()["jobs"][SUCCEEDED] == 4
+
+
+def test_reserved_worker_runs_interactive_jobs_past_batch_work():
+    async def run():
+        queue = _queue(workers=1, reserved_workers=1, interactive_priority=10)
+        batch = queue.submit("record", {"name": "batch", "hold": True})
+        await queue.start()
+        await asyncio.sleep(0.1)
+        station = await queue.wait(queue.submit("record", {"name": "station"}, priority=10).id, 5)
+        assert queue.get(batch.id).status == RUNNING
+        assert station.status == SUCCEEDED and queue.result(station.id) == b'"station"'
+
+        cancelled = queue.cancel(batch.id)
+        await queue.stop()
+        return cancelled
+
+    assert asyncio.run(run()).status == CANCELLED
+
+
+def test_cancel_from_another_thread_wakes_waiters():
+    async def run():
+        queue = _queue(workers=1, reserved_workers=0)
+        job = queue.submit("record", {"name": "long", "hold": True})
+        await queue.start()
+        await asyncio.sleep(0.1)
+        waiter = asyncio.ensure_future(queue.wait(job.id, 5))
+        await asyncio.sleep(0.05)
+        # What a plain-def request handler does from FastAPI's thread pool
+        await asyncio.get_running_loop().run_in_executor(None, queue.cancel, job.id)
+        job = await asyncio.wait_for(waiter, 1)
+        await queue.stop()
+        return job
+
+    assert asyncio.run(run()).status == CANCELLED
+
+
+def test_pack_jobs_use_the_job_deadline(monkeypatch):
+    deadlines = []
+
+    async def plans_for(order, compact=False, deadline_ms=None):
+        deadlines.append(deadline_ms)
+        return []
+
+    async def progress(done, total):
+        pass
+
+    monkeypatch.setattr(jobs.bulk_packer, "plans_for", plans_for)
+    monkeypatch.setattr(jobs.settings, "JOB_PACKING_DEADLINE_MS", 1234.0)
+    asyncio.run(run_pack_job({"orders": [{"items": [ITEM]}] * 2}, progress))
+    assert deadlines == [1234.0, 1234.0]
+
+
+def test_interrupted_jobs_survive_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def first_run():
+        queue = _queue(path, workers=1, reserved_workers=0)
+        job = queue.submit("record", {"name": "long", "hold": True})
+        await queue.start()
+        await asyncio.sleep(0.1)
+        assert queue.get(job.id).status == RUNNING
+        task = queue._running[job.id]
+        await queue.stop()
+        # Shutdown cancels the job's task without finishing the job
+        assert task.cancelled()
+        assert queue.get(job.id).status == QUEUED
+        queue.close()
+        return job.id
+
+    async def second_run(job_id):
+        queue = _queue(path, workers=1, reserved_workers=0)
+        queue.register("record", lambda payload, progress: asyncio.sleep(0, result="resumed"))
+        await queue.start()
+        job = await queue.wait(job_id, 5)
+        await queue.stop()
+        return job, queue.result(job_id)
+
+    job, result = asyncio.run(second_run(asyncio.run(first_run())))
+    assert job.status == SUCCEEDED and result == b'"resumed"'
+
+
+def test_job_endpoints():
+    with TestClient(main.app) as client:
+        orders = [{"order_id": "boxed", "items": [ITEM],
+                   "box": {"length": 30, "width": 25, "height": 20, "volume": 15000,
+                           "recommended_void_fill": "bubble_wrap"}},
+                  {"items": [ITEM]}]
+        response = client.post("/api/jobs/pack", json={"orders": orders, "priority": 10})
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] in ("queued", "running", "succeeded") and job["total"] == 2
+
+        job = client.get(f"/api/jobs/{job['id']}", params={"wait": 10}).json()
+        assert job["status"] == "succeeded" and job["done"] == 2
+        results = client.get(f"/api/jobs/{job['id']}/result").json()
+        assert [r["order_id"] for r in results] == ["boxed", "2"]
+        assert len(results[0]["plans"][0]["items"]) == 3
+
+        job = client.post("/api/jobs/predict-box", json={"items": [ITEM] * 3}).json()
+        job = client.get(f"/api/jobs/{job['id']}", params={"wait": 10}).json()
+        assert len(client.get(f"/api/jobs/{job['id']}/result").json()) == 3
+        assert client.delete(f"/api/jobs/{job['id']}").status_code == 409
+
+        assert client.get("/api/jobs/nope").status_code == 404
+        assert client.get("/api/jobs/stats").json()["jobs"]["succeeded"] >= 2
\ No newline at end of file
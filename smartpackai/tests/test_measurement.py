@@ -0,0 +1,151 @@
+# tests/test_measurement.py
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import main
+from services.executor import WorkerPool, PoolSaturated
+from services.measurement import DetectorKit, DetectorPool, MeasurementService, raw_frames, read_raw_frames, to_bgr
+
+WIDTH, HEIGHT = 64, 48
+LANDMARKS = SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z)
+                                      for x in (0.25, 0.75) for y in (0.5, 0.75) for z in (0.0, 0.1)])
+
+
+class FakeReference:
+    def reset_tracking(self):
+        pass
+
+    def detect_reference(self, frame, reference_type):
+        # Frames with a dark first pixel have no reference sheet in view
+        return (21.0, 29.7, None) if frame[0, 0, 0] else None
+
+
+class FakeObjectron:
+    def detect_object(self, frame):
+        return LANDMARKS, None
+
+
+class ScaleEstimator:
+    """Reference pixels map 1:1 to its size in cm"""
+
+    def calculate_focal_length(self, length_px, width_px, distance):
+        self.scale = 29.7 / length_px
+
+    def estimate_dimensions(self, length_px, width_px, height_px, distance):
+        return tuple(round(px * self.scale, 2) for px in (length_px, width_px, height_px))
+
+
+def fake_kit() -> DetectorKit:
+    fake_kit.built += 1
+    return DetectorKit(FakeReference(), FakeObjectron(), {"a4": ScaleEstimator()})
+
+
+fake_kit.built = 0
+
+
+def _frames(count: int, with_reference: bool = True) -> bytes:
+    frames = np.zeros((count, HEIGHT, WIDTH, 3), dtype=np.uint8)
+    frames[:, 0, 0, 0] = 255 if with_reference else 0
+    return frames.tobytes()
+
+
+@pytest.fixture
+def service():
+    pool = WorkerPool("vision-test", kind="thread", max_workers=2)
+    yield MeasurementService(pool, DetectorPool(2, fake_kit), max_frames=10)
+    pool.shutdown()
+
+
+def test_raw_frames_are_views_of_the_buffer():
+    body = _frames(3)
+    frames = raw_frames(body, WIDTH, HEIGHT)
+    assert frames.shape == (3, HEIGHT, WIDTH, 3)
+    assert not frames.flags.owndata and not frames.flags.writeable
+
+    rgb = raw_frames(bytes([1, 2, 3]) * WIDTH * HEIGHT, WIDTH, HEIGHT, "rgb24")
+    assert list(rgb[0, 0, 0]) == [3, 2, 1] and rgb.flags.c_contiguous
+    with pytest.raises(ValueError):
+        raw_frames(body[:-1], WIDTH, HEIGHT)
+
+
+def test_raw_frames_read_as_they_stream():
+    body = _frames(3)
+
+    async def chunks(size):
+        for i in range(0, len(body), size):
+            yield body[i:i + size]
+
+    for size in (1000, WIDTH * HEIGHT * 3, len(body)):
+        frames = asyncio.run(read_raw_frames(chunks(size), WIDTH, HEIGHT, max_frames=3))
+        assert np.array_equal(np.stack(frames), raw_frames(body, WIDTH, HEIGHT))
+    with pytest.raises(ValueError, match="at most 2"):
+        asyncio.run(read_raw_frames(chunks(1000), WIDTH, HEIGHT, max_frames=2))
+    body = body[:-1]
+    with pytest.raises(ValueError, match="whole number"):
+        asyncio.run(read_raw_frames(chunks(1000), WIDTH, HEIGHT, max_frames=3))
+
+    rgb = to_bgr([np.frombuffer(bytes([1, 2, 3]) * WIDTH * HEIGHT, dtype=np.uint8).reshape(HEIGHT, WIDTH, 3)],
+                 "rgb24")
+    assert list(rgb[0][0, 0]) == [3, 2, 1]
+
+
+def test_busy_detector_pool_is_saturated():
+    pool = DetectorPool(1, fake_kit)
+    with pool.checkout():
+        with pytest.raises(PoolSaturated):
+            with pool.checkout(timeout=0.01):
+                pass
+
+
+def test_detector_pool_reuses_kits():
+    fake_kit.built = 0
+    pool = DetectorPool(2, fake_kit)
+    for _ in range(5):
+        with pool.checkout() as kit:
+            assert kit.estimators["a4"]
+    assert fake_kit.built == 1
+    pool.warm_up()
+    assert fake_kit.built == 2 and pool.stats() == {"size": 2, "created": 2, "free": 2}
+
+
+def test_fuses_frames(service):
+    body = _frames(6)
+    result = asyncio.run(service.measure(lambda: raw_frames(body, WIDTH, HEIGHT)))
+    estimate = result["estimate"]
+    # 32 x 12 px footprint against a 29.7 px reference
+    assert estimate.dimensions == (32.0, 12.0, 6.4)
+    assert estimate.frames == 6 and estimate.stable
+    assert result["references_found"] == 6
+    assert set(result["timings"]) == {"queue", "decode", "reference", "detect", "estimate"}
+
+
+def test_measure_endpoint(monkeypatch, service):
+    monkeypatch.setattr(main, "measurement_service", service)
+    client = TestClient(main.app)
+    params = {"width": WIDTH, "height": HEIGHT, "weight": 0.8, "sku": "MEASURE-1"}
+
+    response = client.post("/api/measure", params=params, content=_frames(6),
+                           headers={"content-type": "application/octet-stream"})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["length"], body["width"], body["height"]) == (32.0, 12.0, 6.4)
+    assert body["frames_measured"] == 6 and body["stable"]
+    assert body["item"] == {"length": 32.0, "width": 12.0, "height": 6.4, "weight": 0.8,
+                            "quantity": 1, "fragility": 0.5, "is_rotatable": True}
+    assert body["sku"]["source"] == "vision"
+    assert client.post("/api/predict-box", json=body["item"]).status_code == 200
+    assert "measure_detect" in client.get("/metrics").text
+
+    response = client.post("/api/measure", params={"width": WIDTH, "height": HEIGHT}, content=_frames(2, False),
+                           headers={"content-type": "application/octet-stream"})
+    assert response.status_code == 422 and "reference found in 0/2" in response.json()["detail"]
+    assert client.post("/api/measure", content=_frames(1),
+                       headers={"content-type": "application/octet-stream"}).status_code == 400
+    assert client.post("/api/measure", params={"width": WIDTH, "height": HEIGHT}, content=_frames(11),
+                       headers={"content-type": "application/octet-stream"}).status_code == 400
+    assert client.post("/api/measure", params={"sku": "X"}, content=b"x").status_code == 400
+    # Not an image: rejected, or unavailable where OpenCV isn't installed
+    assert client.post("/api/measure", content=b"not a jpeg",
+                       headers={"content-type": "image/jpeg"}).status_code in (400, 503)
\ No newline at end of file
@@ -0,0 +1,75 @@
+# tests/test_metrics.py
+import json
+import logging
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+import main
+from services.metrics import MetricsRegistry, MetricsMiddleware, InstrumentedRoute, stage
+
+ITEM = {"length": 10, "width": 8, "height": 5, "weight": 0.5}
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    hist = registry.histogram("test_seconds", "A histogram", ("stage",), buckets=(0.1, 1.0))
+    counter = registry.counter("test_total", "A counter", ("path",))
+    registry.callback("test_gauge", "A gauge", lambda: {(): 3})
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    hist.observe(5, stage="a")
+    counter.inc(path='say "hi"\n')
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="a"} 3' in lines
+    assert 'test_total{path="say \\"hi\\"\\n"} 1.0' in lines
+    assert "test_gauge 3.0" in lines
+    # A second registration under a name is a bug, e.g. a module imported twice
+    with pytest.raises(ValueError):
+        registry.callback("test_gauge", "A gauge", lambda: {(): 4})
+
+
+def _app(log_sample_rate: float) -> FastAPI:
+    app = FastAPI()
+    app.router.route_class = InstrumentedRoute
+    app.add_middleware(MetricsMiddleware, log_sample_rate=log_sample_rate, slow_request_ms=10000)
+
+    @app.post("/echo/{value}")
+    async def echo(value: int):
+        if value < 0:
+            raise HTTPException(status_code=400, detail="negative")
+        with stage("work"):
+            return {"value": value}
+
+    return app
+
+
+def test_sampled_structured_logs(caplog):
+    with caplog.at_level(logging.INFO, logger="smartpack.access"):
+        TestClient(_app(1.0)).post("/echo/3")
+        TestClient(_app(0.0)).post("/echo/4")
+
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "smartpack.access"]
+    assert len(records) == 1
+    assert records[0]["route"] == "/echo/{value}" and records[0]["status"] == 200
+    assert {"parse", "work", "serialize"} <= set(records[0]["stages_ms"])
+
+
+def test_metrics_endpoint_reports_stages():
+    client = TestClient(main.app)
+    assert client.post("/api/predict-box", json=ITEM).status_code == 200
+    assert client.post("/api/predict-box", json={"length": -1}).status_code == 422
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for stage_name in ("parse", "serialize", "predict_volume", "select_box", "batch_queue"):
+        assert f'smartpack_stage_duration_seconds_count{{stage="{stage_name}"}}' in body
+    assert 'smartpack_requests_total{route="/api/predict-box",method="POST",status="200"}' in body
+    assert 'smartpack_requests_total{route="/api/predict-box",method="POST",status="422"}' in body
+    assert 'smartpack_pool_in_flight{pool="prediction"}' in body
\ No newline at end of file
@@ -0,0 +1,106 @@
+# tests/test_micro_batching.py
+import asyncio
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from fastapi.testclient import TestClient
+import main
+from services.batcher import MicroBatcher
+from services.box_predictor import predict_box_size
+from services.executor import WorkerPool, DeadlineExceeded
+from ml_model.predict import BoxSizePredictor, FEATURE_COLUMNS
+from models.item_schema import ItemInput
+
+ITEM = {"length": 10, "width": 8, "height": 5, "weight": 0.5}
+
+
+class RecordingBatch:
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+
+    def __call__(self, items):
+        self.calls.append(list(items))
+        time.sleep(self.delay)
+        return [item * 10 for item in items]
+
+
+def _gather(batcher, items, **kwargs):
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i, **kwargs) for i in items))
+    return asyncio.run(scenario())
+
+
+def test_concurrent_requests_share_one_batch():
+    batch_fn = RecordingBatch()
+    batcher = MicroBatcher("test", batch_fn, WorkerPool("test", max_workers=1), max_wait_ms=20)
+
+    assert _gather(batcher, range(5)) == [0, 10, 20, 30, 40]
+    assert batch_fn.calls == [[0, 1, 2, 3, 4]]
+    stats = batcher.stats()
+    assert stats["batches"] == 1 and stats["items"] == 5
+    assert stats["batch_size_histogram"]["8"] == 1
+    assert stats["queue_wait_ms"]["max"] > 0
+
+
+def test_full_batch_runs_without_waiting_for_the_window():
+    batch_fn = RecordingBatch()
+    batcher = MicroBatcher("test", batch_fn, WorkerPool("test", max_workers=2),
+                           max_batch_size=4, max_wait_ms=5000)
+
+    started = time.perf_counter()
+    assert _gather(batcher, range(8)) == [i * 10 for i in range(8)]
+    assert time.perf_counter() - started < 1
+    assert [len(call) for call in batch_fn.calls] == [4, 4]
+    assert batcher.stats()["batch_size_histogram"] == {"1": 0, "2": 0, "4": 2}
+
+
+def test_batch_failure_reaches_every_caller():
+    def failing(items):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher("test", failing, WorkerPool("test", max_workers=1))
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert batcher.stats()["failed_batches"] == 1
+
+
+def test_caller_deadline():
+    batcher = MicroBatcher("test", RecordingBatch(delay=0.3), WorkerPool("test", max_workers=1))
+    with pytest.raises(DeadlineExceeded):
+        _gather(batcher, [1], deadline_ms=50)
+
+
+def test_box_batcher_matches_single_prediction():
+    batcher = MicroBatcher("box", main.box_batcher.batch_fn, WorkerPool("test", max_workers=1))
+    items = [ItemInput(length=5 + i, width=4, height=3, weight=0.2 * (i + 1), quantity=i + 1) for i in range(6)]
+    assert _gather(batcher, items) == [predict_box_size(item) for item in items]
+
+
+def test_dimension_rows_match_single_prediction(tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(1, 40, size=(200, 6)), columns=FEATURE_COLUMNS)
+    model = RandomForestRegressor(n_estimators=5, max_depth=6, random_state=0).fit(X, X.values[:, :3] * 1.2)
+    path = tmp_path / "model.pkl"
+    joblib.dump(model, path)
+    predictor = BoxSizePredictor(str(path))
+
+    rows = [tuple(row) for row in X.values[:20]]
+    assert predictor.predict_many(rows) == [predictor.predict(*row) for row in rows]
+    assert predictor.predict_many([]) == []
+
+
+def test_predict_box_endpoint_is_batched():
+    client = TestClient(main.app)
+    before = client.get("/api/batching/stats").json()["box"]["items"]
+
+    response = client.post("/api/predict-box", json=ITEM)
+    assert response.status_code == 200
+    assert client.get("/api/batching/stats").json()["box"]["items"] == before + 1
\ No newline at end of file
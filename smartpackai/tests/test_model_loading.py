@@ -0,0 +1,77 @@
+# tests/test_model_loading.py
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from fastapi.testclient import TestClient
+import main
+from ml_model.predict import BoxSizePredictor, FEATURE_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(1, 40, size=(200, 6)), columns=FEATURE_COLUMNS)
+    y = X.values[:, :3] * 1.2 + 2
+    model = RandomForestRegressor(n_estimators=5, max_depth=6, random_state=0).fit(X, y)
+    path = tmp_path_factory.mktemp("model") / "model.pkl"
+    joblib.dump(model, path)
+    return str(path)
+
+
+def test_model_loads_lazily(model_path):
+    predictor = BoxSizePredictor(model_path)
+    assert predictor.status()["loaded"] is False
+
+    result = predictor.predict(10, 5, 3, 0.5)
+    assert result["status"] == "success"
+    assert predictor.status()["loaded"] is True
+    assert predictor.load_time_ms is not None
+
+
+def test_warm_up_marks_ready(model_path):
+    predictor = BoxSizePredictor(model_path)
+    assert not predictor.is_ready
+    assert predictor.warm_up()
+    assert predictor.status() == dict(predictor.status(), ready=True, loaded=True, error=None)
+
+
+def test_bad_model_does_not_break_import(tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"")
+    predictor = BoxSizePredictor(str(path))
+
+    assert predictor.predict(10, 5, 3, 0.5)["status"] == "error"
+    assert not predictor.warm_up()
+    assert predictor.status()["error"]
+
+
+def _wait_ready(client, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = client.get("/ready")
+        if response.json()["warmed_up"]:
+            return response
+        time.sleep(0.02)
+    return client.get("/ready")
+
+
+def test_readiness_endpoint(monkeypatch, model_path):
+    monkeypatch.setattr(main, "model_predictor", BoxSizePredictor(model_path))
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        response = _wait_ready(client)
+        assert response.status_code == 200
+        assert response.json()["model"]["ready"] is True
+
+
+def test_not_ready_without_model(monkeypatch, tmp_path):
+    path = tmp_path / "missing.pkl"
+    monkeypatch.setattr(main, "model_predictor", BoxSizePredictor(str(path)))
+    with TestClient(main.app) as client:
+        response = _wait_ready(client)
+        assert response.status_code == 503
+        assert response.json()["model"]["error"]
+        assert client.get("/health").status_code == 200
\ No newline at end of file
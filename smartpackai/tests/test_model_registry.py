@@ -0,0 +1,164 @@
+# tests/test_model_registry.py
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from fastapi.testclient import TestClient
+import main
+from ml_model.compiled_forest import CompiledForest
+from ml_model.predict import BoxSizePredictor, FEATURE_COLUMNS
+from ml_model.registry import ModelRegistry
+from ml_model.rollout import ModelRollout
+
+ROWS = np.random.default_rng(1).uniform(1, 40, size=(16, 6))
+
+
+def _train(tmp_path, scale: float, name: str) -> str:
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(1, 40, size=(200, 6)), columns=FEATURE_COLUMNS)
+    model = RandomForestRegressor(n_estimators=4, max_depth=5, random_state=0).fit(X, X.values[:, :3] * scale)
+    path = tmp_path / name
+    joblib.dump(model, path)
+    return str(path)
+
+
+def _wait_until(condition, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.publish(_train(tmp_path, 1.2, "a.pkl"), metadata={"scale": 1.2})
+    registry.publish(_train(tmp_path, 2.0, "b.pkl"))
+    registry.set_current("v1")
+    return registry
+
+
+def _serving(registry):
+    predictor = BoxSizePredictor()
+    rollout = ModelRollout(predictor, registry, shadow_sample_rate=1.0)
+    predictor.warm_up()
+    return predictor, rollout
+
+
+def test_registry_versions(registry, tmp_path):
+    assert registry.versions() == ["v1", "v2"]
+    assert registry.current() == "v1"
+    assert registry.metadata("v1") == {"scale": 1.2}
+    assert registry.next_version() == "v3"
+
+    registry.publish(_train(tmp_path, 1.0, "c.pkl"), version="v10")
+    assert registry.versions() == ["v1", "v2", "v10"]
+    with pytest.raises(ValueError):
+        registry.publish(_train(tmp_path, 1.0, "d.pkl"), version="v10")
+    with pytest.raises(KeyError):
+        registry.path_for("v99")
+
+
+def test_forests_are_published_compiled(registry, tmp_path):
+    """Workers map the published tree arrays instead of compiling their own copy"""
+    predictor = BoxSizePredictor(registry.path_for("v1"))
+    predictor.load()
+    assert isinstance(predictor.model, CompiledForest)
+    assert isinstance(predictor.compiled.threshold, np.memmap)
+    original = joblib.load(tmp_path / "a.pkl")
+    expected = original.predict(pd.DataFrame(ROWS, columns=FEATURE_COLUMNS))
+    assert np.array_equal(predictor.predict_features(ROWS), expected)
+
+
+def test_current_falls_back_to_newest(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.current() is None
+    registry.publish(_train(tmp_path, 1.0, "a.pkl"))
+    registry.publish(_train(tmp_path, 1.0, "b.pkl"))
+    assert registry.current() == "v2"
+
+
+def test_first_load_uses_registry(registry):
+    """A request that loads the model before warm-up still gets the registry's version"""
+    predictor = BoxSizePredictor()
+    ModelRollout(predictor, registry)
+    predictor.load()
+    assert predictor.version == "v1" and predictor.model_path == registry.path_for("v1")
+
+
+def test_hot_swap(registry):
+    predictor, rollout = _serving(registry)
+    assert predictor.version == "v1"
+    before = predictor.predict_features(ROWS)
+
+    rollout.start("v2")
+    _wait_until(lambda: rollout.state == "idle")
+
+    assert predictor.version == "v2"
+    assert predictor.is_ready
+    assert registry.current() == "v2"
+    expected = BoxSizePredictor(registry.path_for("v2")).predict_features(ROWS)
+    assert np.array_equal(predictor.predict_features(ROWS), expected)
+    assert not np.array_equal(before, expected)
+
+
+def test_failed_load_keeps_serving(registry, tmp_path):
+    broken = tmp_path / "broken.pkl"
+    broken.write_bytes(b"not a model")
+    with pytest.raises(ValueError):
+        registry.publish(str(broken), version="v3")
+    assert "v3" not in registry.versions()
+    # A published version corrupted on disk afterwards
+    registry.publish(_train(tmp_path, 1.0, "c.pkl"), version="v3")
+    (registry.root / "v3" / "model.pkl").write_bytes(b"not a model")
+    predictor, rollout = _serving(registry)
+
+    rollout.start("v3")
+    _wait_until(lambda: rollout.state != "loading")
+
+    assert rollout.state == "failed" and rollout.error
+    assert predictor.version == "v1" and predictor.is_ready
+    registry.set_current("v3")
+    assert not rollout.check_registry()
+
+
+def test_shadow_then_promote(registry):
+    predictor, rollout = _serving(registry)
+    rollout.start("v2", shadow=True)
+    _wait_until(lambda: rollout.state == "shadowing")
+
+    primary = predictor.predict_features(ROWS)
+    _wait_until(lambda: rollout.shadow_stats.rows == len(ROWS))
+    shadow = rollout.status()["shadow"]
+    assert shadow["batches"] == 1
+    assert shadow["mean_abs_delta"]["length"] > 0
+    assert predictor.version == "v1"
+    assert np.array_equal(predictor.predict_features(ROWS), primary)
+
+    rollout.promote()
+    assert predictor.version == "v2" and predictor.shadow is None
+    assert rollout.status()["shadow"] is None
+    rollout.shutdown()
+
+
+def test_watcher_picks_up_new_current(registry):
+    predictor, rollout = _serving(registry)
+    assert not rollout.check_registry()
+
+    registry.set_current("v2")
+    assert rollout.check_registry()
+    _wait_until(lambda: rollout.state == "idle")
+    assert predictor.version == "v2"
+
+
+def test_admin_endpoints_require_token(monkeypatch):
+    monkeypatch.setattr(main.settings, "ADMIN_TOKEN", "secret")
+    client = TestClient(main.app)
+
+    assert client.get("/api/admin/model").status_code == 401
+    response = client.get("/api/admin/model", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert "model" in response.json()
+    assert client.post("/api/admin/model/promote", headers={"X-Admin-Token": "secret"}).status_code == 409
\ No newline at end of file
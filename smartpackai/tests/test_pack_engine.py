@@ -0,0 +1,213 @@
+# tests/test_pack_engine.py
+import itertools
+import random
+import numpy as np
+import pytest
+import services.pack_optimizer as pack_optimizer
+from services.pack_optimizer import PackingOptimizer, ExtremePointPacker, ORIENTATIONS
+from services.spatial_index import SpatialGrid
+from services.placement_state import PlacementState
+from models.item_schema import ItemInput, BoxOutput
+
+BOX = BoxOutput(length=30, width=30, height=30, volume=27000, recommended_void_fill="bubble_wrap")
+
+
+def _extents(packed_item):
+    rotation = (packed_item.rotation.x, packed_item.rotation.y, packed_item.rotation.z)
+    axes = next(axes for axes, angles in ORIENTATIONS if angles == rotation)
+    dims = (packed_item.item.length, packed_item.item.width, packed_item.item.height)
+    return tuple(dims[a] for a in axes)
+
+
+def _aabbs(plan):
+    boxes = []
+    for p in plan.items:
+        dx, dy, dz = _extents(p)
+        boxes.append((p.position.x, p.position.y, p.position.z,
+                      p.position.x + dx, p.position.y + dy, p.position.z + dz))
+    return boxes
+
+
+def _assert_valid(plan, box):
+    boxes = _aabbs(plan)
+    for b in boxes:
+        assert b[0] >= 0 and b[1] >= 0 and b[2] >= 0
+        assert b[3] <= box.length + 1e-6
+        assert b[4] <= box.width + 1e-6
+        assert b[5] <= box.height + 1e-6
+    for a, b in itertools.combinations(boxes, 2):
+        overlap = all(a[i] < b[i + 3] - 1e-6 and b[i] < a[i + 3] - 1e-6 for i in range(3))
+        assert not overlap
+
+
+def test_fills_box_with_cubes():
+    item = ItemInput(length=10, width=10, height=10, weight=1.0, quantity=27)
+    plan = PackingOptimizer().optimize([item], BOX)
+
+    assert len(plan.items) == 27
+    assert plan.unpacked_items == []
+    assert plan.space_utilization == pytest.approx(1.0)
+    assert plan.placement_time_ms > 0
+    _assert_valid(plan, BOX)
+
+
+def test_overflow_is_reported():
+    item = ItemInput(length=10, width=10, height=10, weight=1.0, quantity=30)
+    plan = PackingOptimizer().optimize([item], BOX)
+
+    assert len(plan.items) == 27
+    assert len(plan.unpacked_items) == 3
+    assert any("did not fit" in step for step in plan.packing_instructions)
+
+
+def test_rotation_used_only_when_allowed():
+    box = BoxOutput(length=30, width=10, height=10, volume=3000, recommended_void_fill="bubble_wrap")
+    upright = ItemInput(length=10, width=10, height=30, weight=1.0, is_rotatable=False)
+    rotatable = ItemInput(length=10, width=10, height=30, weight=1.0)
+
+    assert len(PackingOptimizer().optimize([upright], box).items) == 0
+    plan = PackingOptimizer().optimize([rotatable], box)
+    assert len(plan.items) == 1
+    _assert_valid(plan, box)
+
+
+def test_mixed_order_has_no_overlaps():
+    items = [
+        ItemInput(length=12, width=8, height=5, weight=1.0, quantity=12),
+        ItemInput(length=6, width=6, height=6, weight=0.5, quantity=20),
+        ItemInput(length=15, width=10, height=4, weight=2.0, quantity=6),
+    ]
+    box = BoxOutput(length=40, width=30, height=30, volume=36000, recommended_void_fill="air_cushions")
+    plan = PackingOptimizer().optimize(items, box)
+
+    assert len(plan.items) + len(plan.unpacked_items) == 38
+    assert len(plan.items) > 30
+    _assert_valid(plan, box)
+
+
+def test_fragile_units_are_padded():
+    fragile = ItemInput(length=10, width=10, height=10, weight=1.0, fragility=0.9, quantity=27)
+    plan = PackingOptimizer().optimize([fragile], BOX)
+
+    # 3.8 cm of bubble wrap per edge leaves room for 2 x 2 x 2 of the 27 cubes
+    assert len(plan.items) == 8 and len(plan.unpacked_items) == 19
+    assert plan.space_utilization == pytest.approx(8000 / 27000)
+    _assert_valid(plan, BOX)
+    for a, b in itertools.combinations(_aabbs(plan), 2):
+        gap = max(max(b[i] - a[i + 3], a[i] - b[i + 3]) for i in range(3))
+        assert gap >= 3.8 - 1e-6
+    assert min(p.position.x for p in plan.items) == pytest.approx(1.9)
+
+    compact = PackingOptimizer().optimize([fragile], BOX, compact=True)
+    assert compact.blocks[0].origin.x == pytest.approx(1.9)
+    assert compact.blocks[0].pitch.x == pytest.approx(13.8)
+
+    sturdy = fragile.copy(update={"fragility": 0.5})
+    assert len(PackingOptimizer().optimize([sturdy], BOX).items) == 27
+
+
+def test_stacked_units_are_supported():
+    packer = ExtremePointPacker(10, 10, 10, cell_size=5, min_support=1.0)
+    assert packer.place((5, 5, 5)) == ((0, 0, 0), 0)
+    # A 10x10 slab cannot rest on a 5x5 base with full support required
+    assert packer.place((10, 10, 5), rotatable=False) is None
+
+
+def test_identical_units_placed_as_blocks():
+    packer = ExtremePointPacker(30, 30, 30, cell_size=10)
+    assert packer.place_run((10.0, 10.0, 10.0), True, 30, item_index=0) == 27
+    # One row per block, however many units it holds
+    assert len(packer.state) < 27 and packer.state.units == 27
+    origins, rows = packer.state.unit_origins()
+    assert sorted(map(tuple, origins.tolist())) == list(itertools.product((0.0, 10.0, 20.0), repeat=3))
+    assert packer.state.within((30, 30, 30))
+    assert packer.state.utilization(27000) == pytest.approx(1.0)
+
+
+def test_spatial_grid_candidates():
+    grid = SpatialGrid(cell_size=4)
+    grid.insert(0, (0, 0, 0), (10, 10, 5))
+    grid.insert(1, (20, 20, 20), (24, 24, 24))
+
+    assert set(grid.candidates((5, 5, 4), (8, 8, 6)).tolist()) == {0}
+    assert grid.candidates((13, 13, 13), (15, 15, 15)).size == 0
+
+
+def test_placement_state_vectorized_queries():
+    state = PlacementState(capacity=1)
+    state.add((0, 0, 0), (10, 10, 5), 0, 0)
+    state.add((10, 0, 0), (5, 5, 5), 1, 0)
+    ids = np.arange(len(state))
+
+    lo = np.array([[5, 5, 4], [15, 0, 0], [0, 0, 5]], dtype=float)
+    hi = np.array([[8, 8, 6], [17, 2, 2], [5, 20, 8]], dtype=float)
+    assert state.overlaps(ids, lo, hi).tolist() == [True, False, False]
+    assert state.supported_area(ids, lo, hi)[2] == pytest.approx(50)
+    assert state.contains(ids, np.array([[1, 1, 1], [16, 1, 1]], dtype=float)).tolist() == [True, False]
+    assert state.surface_below(ids, np.array([[3, 3, 20]], dtype=float))[0] == pytest.approx(5)
+    run = state.free_run(ids, np.array([[0, 0, 5], [0, 12, 0], [10, 6, 0]], dtype=float), (20, 20, 20))
+    assert run.tolist() == [[20, 20, 15], [20, 8, 20], [10, 14, 20]]
+    assert state.within((15, 10, 5))
+    assert state.packed_volume() == pytest.approx(625)
+    assert state.utilization(1250) == pytest.approx(0.5)
+
+    state.add((0, 15, 0), (20, 5, 20), 0, 1)
+    run = state.free_run(np.arange(len(state)), np.array([[0, 12, 0]], dtype=float), (20, 20, 20))
+    assert run.tolist() == [[20, 3, 20]]
+
+
+def test_commit_work_stays_local(monkeypatch):
+    """Placing a unit only revisits the boxes and points around it, however many are placed"""
+    touched = {"rows": [], "points": [], "searched": []}
+    free_run = PlacementState.free_run
+    clip = pack_optimizer.clip_free_run
+    place_in = ExtremePointPacker._place_in
+
+    def counting_free_run(self, ids, points, bounds):
+        touched["rows"].append(ids.size)
+        return free_run(self, ids, points, bounds)
+
+    def counting_clip(points, run, lo, hi):
+        touched["points"].append(points.shape[0])
+        return clip(points, run, lo, hi)
+
+    def counting_place_in(self, slots, *args):
+        touched["searched"].append(slots.size)
+        return place_in(self, slots, *args)
+
+    monkeypatch.setattr(PlacementState, "free_run", counting_free_run)
+    monkeypatch.setattr(ExtremePointPacker, "_place_in", counting_place_in)
+    monkeypatch.setattr(pack_optimizer, "clip_free_run", counting_clip)
+    rng = random.Random(0)
+    packer = ExtremePointPacker(60, 60, 60, cell_size=5)
+    placed = sum(packer.place((rng.uniform(2, 8), rng.uniform(2, 8), rng.uniform(2, 8))) is not None
+                 for _ in range(1000))
+
+    assert placed > 900 and len(packer.points) > 1000
+    # Late placements look at the rows and points along a few rays, not at all of them
+    for key, total in (("rows", len(packer.state)), ("points", len(packer.points))):
+        late = touched[key][-100:]
+        assert np.median(late) < 0.1 * total and max(late) < 0.25 * total
+    # and searches only gather the points of cells that can hold the unit
+    late = touched["searched"][-100:]
+    assert np.median(late) < 0.2 * len(packer.points) and max(late) < 0.3 * len(packer.points)
+    assert packer.state.within((60, 60, 60))
+
+
+def test_support_bound_keeps_plans():
+    """The support and blocker filters only skip candidates that would fail anyway"""
+    rng = random.Random(1)
+    items = [ItemInput(length=rng.uniform(2, 8), width=rng.uniform(2, 8), height=rng.uniform(2, 8), weight=1.0)
+             for _ in range(150)]
+    box = BoxOutput(length=30, width=30, height=30, volume=27000, recommended_void_fill="bubble_wrap")
+    plan = PackingOptimizer().optimize(items, box)
+    _assert_valid(plan, box)
+
+    packer = ExtremePointPacker(30, 30, 30, cell_size=5)
+    for item in PackingOptimizer().sort_items(items):
+        packer.place((item.length, item.width, item.height))
+        # Every raised point's bound covers what actually supports it today
+        slots = np.flatnonzero(packer._alive[:packer._slots] & (packer._points[:packer._slots, 2] > 0))
+        actual = packer._surface_area(np.arange(packer.state.size), slots)
+        assert (packer._support[slots] >= actual - 1e-6).all()
+    assert len(plan.items) == packer.state.units
\ No newline at end of file
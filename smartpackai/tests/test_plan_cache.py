@@ -0,0 +1,109 @@
+# tests/test_plan_cache.py
+import time
+from fastapi.testclient import TestClient
+from main import app
+from services.plan_cache import PlanCache, canonical_key, plan_cache, plan_variant
+from services.pack_optimizer import PackingOptimizer, optimize_packing
+from models.item_schema import ItemInput, BoxOutput
+
+BOX = BoxOutput(length=30, width=25, height=20, volume=15000, recommended_void_fill="bubble_wrap")
+ITEMS = [
+    ItemInput(length=10, width=8, height=5, weight=0.5, quantity=3),
+    ItemInput(length=6, width=6, height=6, weight=0.3, quantity=2, fragility=0.8),
+]
+
+
+def test_key_ignores_line_order():
+    assert canonical_key(ITEMS, BOX) == canonical_key(ITEMS[::-1], BOX)
+    other = [ITEMS[0], ItemInput(length=6, width=6, height=6, weight=0.3, quantity=3, fragility=0.8)]
+    assert canonical_key(ITEMS, BOX) != canonical_key(other, BOX)
+    bigger = BoxOutput(length=40, width=30, height=20, volume=24000, recommended_void_fill="bubble_wrap")
+    assert canonical_key(ITEMS, BOX) != canonical_key(ITEMS, bigger)
+
+
+def test_variant_buckets_search_budget():
+    assert plan_variant() == "" and plan_variant(None, True) == "compact"
+    assert plan_variant(100) == plan_variant(120) == "anytime@6"
+    assert plan_variant(50) != plan_variant(2000)
+    assert plan_variant(0.5, True) == "anytime@0|compact"
+    assert canonical_key(ITEMS, BOX, plan_variant(50)) != canonical_key(ITEMS, BOX, plan_variant(2000))
+
+
+def test_repeat_order_is_a_hit():
+    cache = PlanCache(max_entries=4)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return PackingOptimizer().optimize(ITEMS, BOX)
+
+    first = cache.get_or_compute(ITEMS, BOX, compute)
+    second = cache.get_or_compute(ITEMS[::-1], BOX, compute)
+
+    assert len(calls) == 1
+    assert second.dict(exclude={"placement_time_ms"}) == first.dict(exclude={"placement_time_ms"})
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_hit_reports_lookup_time():
+    cache = PlanCache()
+
+    def compute():
+        plan = PackingOptimizer().optimize(ITEMS, BOX)
+        return plan.copy(update={"placement_time_ms": 5000.0})
+
+    first = cache.get_or_compute(ITEMS, BOX, compute)
+    second = cache.get_or_compute(ITEMS, BOX, compute)
+
+    assert first.placement_time_ms == 5000.0
+    assert 0 < second.placement_time_ms < 1000
+    # The stored plan keeps its own timing
+    assert cache.get(canonical_key(ITEMS, BOX)).placement_time_ms == 5000.0
+
+
+def test_lru_eviction():
+    cache = PlanCache(max_entries=2)
+    plan = PackingOptimizer().optimize(ITEMS, BOX)
+    cache.put("a", plan)
+    cache.put("b", plan)
+    cache.get("a")
+    cache.put("c", plan)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is plan and cache.get("c") is plan
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = PlanCache(ttl_seconds=0.01)
+    cache.put("a", PackingOptimizer().optimize(ITEMS, BOX))
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / "plans.pkl")
+    cache = PlanCache(path=path)
+    plan = PackingOptimizer().optimize(ITEMS, BOX)
+    cache.put(canonical_key(ITEMS, BOX), plan)
+    cache.save()
+
+    restored = PlanCache(path=path)
+    cached = restored.get(canonical_key(ITEMS, BOX))
+    assert cached is not None
+    assert cached.dict() == plan.dict()
+
+
+def test_stats_endpoint():
+    plan_cache.clear()
+    optimize_packing(ITEMS, BOX)
+    optimize_packing(ITEMS, BOX)
+
+    response = TestClient(app).get("/api/cache/stats")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["hits"] >= 1
+    assert {"misses", "evictions", "hit_rate", "size"} <= set(stats)
\ No newline at end of file
@@ -0,0 +1,73 @@
+# tests/test_serialization.py
+import json
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+import main
+from models.item_schema import ItemInput, BoxOutput, PackingPlan
+from services.pack_optimizer import PackingOptimizer
+from services.serialization import COLUMNAR_MEDIA_TYPE, dumps, plan_to_columns
+
+ITEMS = [ItemInput(length=10, width=6, height=4, weight=0.5, quantity=12),
+         ItemInput(length=8, width=8, height=3, weight=0.4, quantity=5, fragility=0.9, is_rotatable=False)]
+BOX = BoxOutput(length=30, width=25, height=20, volume=15000, recommended_void_fill="bubble_wrap")
+PAYLOAD = {"items": [i.dict() for i in ITEMS], "box": BOX.dict()}
+
+
+def _plan(compact: bool = False) -> PackingPlan:
+    return PackingOptimizer().optimize(ITEMS, BOX, compact=compact)
+
+
+def test_fast_encoding_matches_response_model():
+    for compact in (False, True):
+        plan = _plan(compact)
+        # What FastAPI would send for response_model=PackingPlan
+        expected = jsonable_encoder(PackingPlan.validate(plan))
+        assert json.loads(dumps(plan)) == expected
+
+
+def test_columnar_units_rebuild_the_plan():
+    plan = _plan()
+    columns = json.loads(dumps(plan_to_columns(plan)))
+
+    units = columns["units"]
+    assert len(units["x"]) == len(plan.items)
+    for i, packed in enumerate(plan.items):
+        line = columns["lines"][units["line"][i]]
+        assert line == packed.item.dict()
+        assert [units["x"][i], units["y"][i], units["z"][i]] == [packed.position.x, packed.position.y, packed.position.z]
+        assert columns["rotations"][units["rotation"][i]] == [packed.rotation.x, packed.rotation.y, packed.rotation.z]
+        placed = sorted([units["dx"][i], units["dy"][i], units["dz"][i]])
+        assert placed == sorted([line["length"], line["width"], line["height"]])
+    assert len(columns["lines"]) == 2
+
+
+def test_columnar_blocks():
+    plan = _plan(compact=True)
+    blocks = json.loads(dumps(plan_to_columns(plan)))["blocks"]
+    assert len(blocks["nx"]) == len(plan.blocks)
+    assert sum(x * y * z for x, y, z in zip(blocks["nx"], blocks["ny"], blocks["nz"])) == \
+        sum(b.counts[0] * b.counts[1] * b.counts[2] for b in plan.blocks)
+
+
+def test_columns_of_plans_made_elsewhere():
+    """Plans without the engine's arrays, e.g. built by hand, encode the same way"""
+    for compact in (False, True):
+        plan = _plan(compact)
+        rebuilt = PackingPlan.construct(**plan.__dict__)
+        assert json.loads(dumps(plan_to_columns(rebuilt))) == json.loads(dumps(plan_to_columns(plan)))
+
+
+def test_endpoint_negotiates_format():
+    client = TestClient(main.app)
+    default = client.post("/api/optimize-pack", json=PAYLOAD)
+    assert default.headers["content-type"] == "application/json"
+    assert len(default.json()["items"]) == 17
+
+    columnar = client.post("/api/optimize-pack", json=PAYLOAD, headers={"Accept": COLUMNAR_MEDIA_TYPE})
+    assert columnar.headers["content-type"] == COLUMNAR_MEDIA_TYPE
+    assert columnar.headers["vary"] == "Accept"
+    body = columnar.json()
+    assert body["format"] == "columnar" and len(body["units"]["x"]) == 17
+
+    multi = client.post("/api/optimize-pack/multi", json=PAYLOAD["items"], headers={"Accept": COLUMNAR_MEDIA_TYPE})
+    assert all(plan["format"] == "columnar" for plan in multi.json())
\ No newline at end of file
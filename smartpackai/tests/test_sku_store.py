@@ -0,0 +1,130 @@
+# tests/test_sku_store.py
+import io
+import json
+import threading
+import pytest
+from fastapi.testclient import TestClient
+import main
+from models.item_schema import SkuMeasurement
+from services.box_predictor import predict_box_sizes
+from services.sku_store import SkuStore, records_from_csv, records_from_json, records_to_csv
+
+MUG = {"length": 12, "width": 9, "height": 10, "weight": 0.4, "confidence": 0.9, "source": "vision"}
+
+
+@pytest.fixture
+def store():
+    return SkuStore(box_fn=predict_box_sizes)
+
+
+def test_write_through_and_lookup(store):
+    record = store.record_measurement("MUG-1", SkuMeasurement(**MUG))
+    assert record.box is not None and record.measurements == 1
+
+    assert store.get("MUG-1") == record
+    assert store.stats()["hits"] == 1
+    assert store.get("nope") is None
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "skus.sqlite3")
+    SkuStore(path, box_fn=predict_box_sizes).record_measurement("MUG-1", SkuMeasurement(**MUG))
+
+    reopened = SkuStore(path)
+    record = reopened.get("MUG-1")
+    assert (record.length, record.width, record.height) == (12, 9, 10)
+    assert record.box.volume > 0
+
+
+def test_agreeing_measurements_are_averaged(store):
+    store.record_measurement("MUG-1", SkuMeasurement(**MUG))
+    # Same mug measured lying on its side
+    record = store.record_measurement("MUG-1", SkuMeasurement(**dict(MUG, length=10.6, height=12, confidence=0.9)))
+
+    assert record.measurements == 2 and record.conflicts == 0
+    assert (record.length, record.width, record.height) == (12, 9, 10.3)
+    assert not store.lookup("MUG-1").needs_measurement
+
+
+def test_conflicting_measurement_flags_sku(store):
+    store.record_measurement("MUG-1", SkuMeasurement(**MUG))
+    record = store.record_measurement("MUG-1", SkuMeasurement(**dict(MUG, length=30)))
+
+    assert record.length == 30 and record.conflicts == 1
+    assert record.confidence == pytest.approx(0.45)
+    assert store.lookup("MUG-1").needs_measurement
+
+
+def test_concurrent_measurements_are_all_merged(tmp_path):
+    path = str(tmp_path / "skus.sqlite3")
+    # Two stores on one file stand in for two server processes
+    stores = [SkuStore(path), SkuStore(path)]
+
+    def measure(store):
+        for _ in range(20):
+            store.record_measurement("MUG-1", SkuMeasurement(**MUG))
+
+    threads = [threading.Thread(target=measure, args=(stores[i % 2],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    record = SkuStore(path).get("MUG-1")
+    assert record.measurements == 80 and record.conflicts == 0
+
+
+def test_csv_round_trip(store):
+    csv_text = ("sku,length,width,height,weight,is_rotatable\n"
+                "A,10,5,3,0.5,true\n"
+                "B,20,10,8,1.5,0\n")
+    assert store.import_records(records_from_csv(io.StringIO(csv_text))) == 2
+    assert store.get("B").is_rotatable is False
+    assert store.get("A").box is not None
+
+    exported = "".join(records_to_csv(store.export_records(page_size=1)))
+    copy = SkuStore()
+    assert copy.import_records(records_from_csv(io.StringIO(exported))) == 2
+    assert list(copy.export_records()) == list(store.export_records())
+
+
+def test_endpoints():
+    client = TestClient(main.app)
+    assert client.get("/api/skus/ENDPOINT-1").status_code == 404
+
+    response = client.put("/api/skus/ENDPOINT-1", json=MUG)
+    assert response.status_code == 200
+    assert client.get("/api/skus/ENDPOINT-1").json()["box"] == response.json()["box"]
+
+    response = client.post("/api/skus", json=[dict(MUG, sku="ENDPOINT-2")])
+    assert response.json() == {"imported": 1}
+    assert client.post("/api/skus", content=b"sku,length\nX,oops\n",
+                       headers={"content-type": "text/csv"}).status_code == 400
+
+    # Uploads are parsed as they arrive, whatever the chunk boundaries
+    rows = [dict(MUG, sku=f"STREAM-{i}") for i in range(50)]
+    text = json.dumps(rows)
+    response = client.post("/api/skus", content=(text[i:i + 7].encode() for i in range(0, len(text), 7)),
+                           headers={"content-type": "application/json"})
+    assert response.json() == {"imported": 50}
+    csv_text = "sku,length,width,height,weight\n" + "".join(f"CSV-{i},10,8,6,1\n" for i in range(50))
+    response = client.post("/api/skus", content=(csv_text[i:i + 5].encode() for i in range(0, len(csv_text), 5)),
+                           headers={"content-type": "text/csv"})
+    assert response.json() == {"imported": 50}
+    assert client.get("/api/skus/CSV-49").json()["length"] == 10
+
+    exported = client.get("/api/skus").text
+    assert "ENDPOINT-1" in exported and "ENDPOINT-2" in exported
+    assert client.delete("/api/skus/ENDPOINT-2").status_code == 204
+    assert client.get("/api/cache/stats").json()["sku_store"]["records"] >= 1
+
+
+def test_json_records_split_anywhere():
+    text = json.dumps([dict(MUG, sku=f"J-{i}") for i in range(5)])
+    for size in (1, 3, len(text)):
+        records = list(records_from_json(text[i:i + size] for i in range(0, len(text), size)))
+        assert [r.sku for r in records] == [f"J-{i}" for i in range(5)]
+    with pytest.raises(ValueError):
+        list(records_from_json(iter([text[:-1]])))
+    with pytest.raises(ValueError):
+        list(records_from_json(iter(['{"sku": "J-1"}'])))
\ No newline at end of file
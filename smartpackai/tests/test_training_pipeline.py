@@ -0,0 +1,84 @@
+# tests/test_training_pipeline.py
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from ml_model.compiled_forest import CompiledForest
+from ml_model.predict import BoxSizePredictor
+from ml_model.registry import ModelRegistry
+from ml_model.train import TrainingConfig, main, prepare_chunk, train
+
+
+def _write_history(path, rows: int, seed: int, plain_names: bool = False):
+    rng = np.random.default_rng(seed)
+    dims = rng.uniform(2, 40, size=(rows, 3))
+    frame = pd.DataFrame({
+        "item_length": dims[:, 0],
+        "item_width": dims[:, 1],
+        "item_height": dims[:, 2],
+        "item_weight": rng.uniform(0.1, 5, rows),
+        "quantity": rng.integers(1, 5, rows),
+        "fragility": rng.uniform(0, 1, rows),
+    })
+    frame["box_length"] = frame.item_length * 1.1 + 2
+    frame["box_width"] = frame.item_width * 1.1 + 2
+    frame["box_height"] = frame.item_height * 1.1 + frame.quantity + 2
+    if plain_names:
+        frame = frame.rename(columns={"item_length": "length", "item_width": "width",
+                                      "item_height": "height", "item_weight": "weight"})
+    frame.to_csv(path, index=False)
+
+
+def test_prepare_chunk_defaults_and_drops_bad_rows():
+    chunk = pd.DataFrame({
+        "length": [10, 5, "oops"], "width": [8, 0, 3], "height": [4, 2, 2], "weight": [1, 1, 1],
+        "box_length": [12, 7, 5], "box_width": [10, 4, 5], "box_height": [6, 4, 4],
+    })
+    X, y = prepare_chunk(chunk)
+    assert X.tolist() == [[10, 8, 4, 1, 1, 0.5]]
+    assert y.tolist() == [[12, 10, 6]]
+
+    with pytest.raises(ValueError):
+        prepare_chunk(chunk.drop(columns=["box_height"]))
+
+    # Failed measurement records are skipped even when they carry numbers
+    retried = chunk.iloc[[0, 0]].assign(error=["Nothing measured", None])
+    X, _ = prepare_chunk(retried)
+    assert X.tolist() == [[10, 8, 4, 1, 1, 0.5]]
+
+
+def test_train_streams_chunks(tmp_path):
+    _write_history(tmp_path / "a.csv", 3000, 0)
+    _write_history(tmp_path / "b.csv", 2000, 1, plain_names=True)
+    (tmp_path / "empty.csv").write_text("")
+    config = TrainingConfig(chunk_size=1000, trees_per_chunk=2, max_trees=6, max_depth=8,
+                            holdout_fraction=0.1, n_jobs=2)
+
+    model, report = train(sorted(str(p) for p in tmp_path.glob("*.csv")), config)
+
+    assert isinstance(model, CompiledForest)
+    assert report["chunks"] == 5
+    assert report["trees"] == 6
+    assert report["rows_read"] == 5000
+    assert report["rows_train"] + report["rows_holdout"] == 5000
+    assert 0 < report["rows_holdout"] < 1000
+    assert all(m["r2"] > 0.8 for m in report["holdout_accuracy"].values())
+
+
+def test_cli_publishes_version(tmp_path):
+    _write_history(tmp_path / "history.csv", 2000, 0)
+    registry_dir = tmp_path / "registry"
+    report_path = tmp_path / "report.json"
+
+    status = main(["--data", str(tmp_path / "*.csv"), "--registry", str(registry_dir),
+                   "--chunk-size", "500", "--jobs", "1", "--report", str(report_path)])
+
+    assert status == 0
+    registry = ModelRegistry(str(registry_dir))
+    assert registry.versions() == ["v1"]
+    assert registry.metadata("v1")["artifact_bytes"] > 0
+    assert json.loads(report_path.read_text())["version"] == "v1"
+
+    predictor = BoxSizePredictor(registry.path_for("v1"))
+    assert predictor.warm_up()
+    assert predictor.predict(10, 8, 4, 1.0, 1, 0.5)["status"] == "success"
\ No newline at end of file
@@ -0,0 +1,147 @@
+# tests/test_vision_pipeline.py
+import time
+from types import SimpleNamespace
+import numpy as np
+from camera_vision.dimension_fusion import DimensionFusion
+from camera_vision.pipeline import FramePacket, FrameQueue, VisionPipeline, landmark_extent
+
+FRAME = np.zeros((480, 640, 3), dtype=np.uint8)
+# Box spanning half the frame width, a quarter of its height and 0.1 deep
+LANDMARKS = SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z)
+                                      for x in (0.25, 0.75) for y in (0.5, 0.75) for z in (0.0, 0.1)])
+
+
+class FakeCamera:
+    """Delivers ``frames`` frames at ``fps``"""
+
+    def __init__(self, frames: int, fps: float):
+        self.frames = frames
+        self.interval = 1 / fps
+
+    def read(self):
+        if self.frames == 0:
+            return False, None
+        self.frames -= 1
+        time.sleep(self.interval)
+        return True, FRAME
+
+
+class SlowDetector:
+    def __init__(self, seconds: float, result):
+        self.seconds = seconds
+        self.result = result
+        self.frames = []
+
+    def detect_reference(self, frame, reference_type, rgb=False):
+        assert rgb
+        self.frames.append(frame)
+        time.sleep(self.seconds)
+        return self.result
+
+    def detect_object(self, frame, rgb=False):
+        assert rgb
+        self.frames.append(frame)
+        time.sleep(self.seconds)
+        return self.result
+
+
+class ScaleEstimator:
+    """1 pixel per mm at the configured distance"""
+
+    def calculate_focal_length(self, length_px, width_px, distance):
+        self.scale = 297 / length_px
+
+    def estimate_dimensions(self, length_px, width_px, height_px, distance):
+        return tuple(round(px * self.scale / 10, 2) for px in (length_px, width_px, height_px))
+
+
+def test_frame_queue_keeps_newest():
+    queue = FrameQueue(maxsize=2)
+    for i in range(5):
+        queue.put(FramePacket(i, 0.0, FRAME))
+    queue.close()
+    assert [queue.get().index, queue.get().index] == [3, 4]
+    assert queue.dropped == 3 and queue.get() is None and queue.drained
+
+
+def test_landmark_extent():
+    assert landmark_extent(LANDMARKS, FRAME.shape) == (320.0, 120.0, 64.0)
+
+
+def test_pipeline_drops_stale_frames_under_load():
+    results = []
+    pipeline = VisionPipeline(
+        FakeCamera(frames=60, fps=200),
+        SlowDetector(0.002, (210.0, 297.0, None)),
+        SlowDetector(0.02, (LANDMARKS, None)),
+        ScaleEstimator(),
+        on_result=results.append
+    )
+    pipeline.start()
+    pipeline.join(timeout=10)
+    report = pipeline.report()
+
+    # The detector runs at ~50 FPS against a 200 FPS camera: older frames
+    # are dropped rather than queued, so results stay in order and fresh
+    assert 0 < len(results) < 60
+    assert [p.index for p in results] == sorted(p.index for p in results)
+    assert report["reference"]["dropped"] + report["detect"]["dropped"] > 0
+    assert report["end_to_end"]["latency_ms"]["p95"] < 100
+    assert report["capture"]["processed"] == 60
+    assert pipeline.latest().dimensions == (32.0, 12.0, 6.4)
+    assert report["detect"]["fps"] > 0 and report["detect"]["latency_ms"]["p50"] >= 20
+
+
+def test_stale_frames_are_skipped():
+    pipeline = VisionPipeline(
+        FakeCamera(frames=5, fps=1000),
+        SlowDetector(0.05, None),
+        SlowDetector(0.0, None),
+        ScaleEstimator(),
+        queue_size=5,
+        max_frame_age_ms=20
+    )
+    with pipeline:
+        pipeline.join(timeout=5)
+    report = pipeline.report()
+    # Frames wait 50 ms behind the reference detector, too long to be worth detecting
+    assert report["reference"]["processed"] >= 1 and report["reference"]["stale"] > 0
+    assert report["reference"]["processed"] + report["reference"]["stale"] == 5
+    # Objectron kept up, but the frames it finished waited too long to be measured
+    assert report["measure"]["stale"] == report["reference"]["processed"]
+    assert pipeline.latest() is None
+
+
+def test_stops_once_the_estimate_is_stable():
+    pipeline = VisionPipeline(
+        FakeCamera(frames=1000, fps=200),
+        SlowDetector(0.0, (210.0, 297.0, None)),
+        SlowDetector(0.005, (LANDMARKS, None)),
+        ScaleEstimator(),
+        fusion=DimensionFusion(min_frames=5),
+        stop_when_stable=True
+    )
+    pipeline.start()
+    estimate = pipeline.wait_stable(timeout=5)
+    pipeline.join(timeout=5)
+
+    assert estimate.stable and estimate.dimensions == (32.0, 12.0, 6.4)
+    # Scanning ended after a handful of frames, not the whole capture
+    assert pipeline.report()["capture"]["processed"] < 1000
+    assert pipeline.latest().estimate.stable
+
+
+def test_detectors_run_side_by_side():
+    reference = SlowDetector(0.03, (210.0, 297.0, None))
+    objectron = SlowDetector(0.03, (LANDMARKS, None))
+    pipeline = VisionPipeline(FakeCamera(frames=10, fps=10), reference, objectron, ScaleEstimator())
+    with pipeline:
+        pipeline.join(timeout=5)
+    report = pipeline.report()
+
+    assert report["measure"]["processed"] == 10
+    # Both 30 ms detections overlap instead of adding up to 60 ms
+    assert report["end_to_end"]["latency_ms"]["p50"] < 55
+    assert reference.tracking
+    # and both see the same RGB copy of each frame
+    assert all(a is b for a, b in zip(reference.frames, objectron.frames))
\ No newline at end of file
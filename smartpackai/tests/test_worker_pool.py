@@ -0,0 +1,87 @@
+# tests/test_worker_pool.py
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+import main
+from services.executor import WorkerPool, PoolSaturated, DeadlineExceeded
+
+ITEM = {"length": 10, "width": 8, "height": 5, "weight": 0.5}
+
+
+def _slow(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_runs_tasks():
+    pool = WorkerPool("test", max_workers=2)
+    assert asyncio.run(pool.run(sum, [1, 2, 3])) == 6
+    assert pool.stats()["completed"] == 1
+    assert pool.in_flight == 0
+    pool.shutdown()
+
+
+def test_rejects_when_saturated():
+    pool = WorkerPool("test", max_workers=1, max_queue=1)
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(_slow, 0.2)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(PoolSaturated):
+            await pool.run(_slow, 0)
+        return await asyncio.gather(*running)
+
+    assert asyncio.run(scenario()) == [0.2, 0.2]
+    assert pool.stats()["rejected"] == 1
+    pool.shutdown()
+
+
+def test_deadline_exceeded():
+    pool = WorkerPool("test", max_workers=1)
+
+    async def scenario():
+        with pytest.raises(DeadlineExceeded):
+            await pool.run(_slow, 0.3, deadline_ms=50)
+
+    asyncio.run(scenario())
+    assert pool.stats()["timed_out"] == 1
+    pool.shutdown()
+
+
+def test_process_pool():
+    pool = WorkerPool("test", kind="process", max_workers=1)
+    assert asyncio.run(pool.run(_slow, 0)) == 0
+    pool.shutdown()
+
+
+def test_endpoint_returns_429_when_saturated(monkeypatch):
+    pool = WorkerPool("prediction", max_workers=1, max_queue=0)
+    pool.in_flight = 1
+    monkeypatch.setattr(main.box_batcher, "pool", pool)
+
+    response = TestClient(main.app).post("/api/predict-box", json=ITEM)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+
+
+def test_endpoint_returns_503_past_deadline(monkeypatch):
+    def slow_predict(items):
+        time.sleep(0.3)
+
+    monkeypatch.setattr(main.box_batcher, "batch_fn", slow_predict)
+    response = TestClient(main.app).post("/api/predict-box?deadline_ms=50", json=ITEM)
+    assert response.status_code == 503
+
+
+def test_optimize_pack_runs_in_pool():
+    payload = {
+        "items": [dict(ITEM, quantity=4)],
+        "box": {"length": 30, "width": 25, "height": 20, "volume": 15000, "recommended_void_fill": "bubble_wrap"}
+    }
+    client = TestClient(main.app)
+    response = client.post("/api/optimize-pack", json=payload)
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 4
+    assert client.get("/api/pool/stats").json()["packing"]["in_flight"] == 0
\ No newline at end of file